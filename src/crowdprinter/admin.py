@@ -1,7 +1,20 @@
+import io
+
+from django import forms
 from django.contrib import admin
+from django.contrib import messages
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
 
+from . import bulk
+from . import labels
+from .models import BuildStep
 from .models import PrintAttempt
 from .models import Printer
 from .models import PrintJob
@@ -12,6 +25,15 @@ from .models import User
 @admin.register(Printer)
 class PrinterAdmin(admin.ModelAdmin):
     model = Printer
+    list_display = (
+        "slug",
+        "name",
+        "slicer_profile",
+        "profile_hash",
+        "build_x",
+        "build_y",
+        "build_z",
+    )
 
 
 class PrintAttemptInline(admin.TabularInline):
@@ -37,23 +59,94 @@ class PrintJobFileInline(admin.TabularInline):
     extra = 0
 
 
+class BuildStepInline(admin.TabularInline):
+    model = BuildStep
+    readonly_fields = (
+        "step",
+        "status",
+        "tries",
+        "started",
+        "ended",
+        "error",
+    )
+    fields = readonly_fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj):
+        return False
+
+
+def labels_response(attempts):
+    pdf = io.BytesIO()
+    labels.write_labels(pdf, attempts)
+    response = HttpResponse(pdf.getvalue(), content_type="application/pdf")
+    response["Content-Disposition"] = 'attachment; filename="labels.pdf"'
+    return response
+
+
+class PriorityActionForm(ActionForm):
+    priority = forms.IntegerField(required=False, min_value=0, max_value=100)
+
+
 @admin.register(PrintJob)
 class PrintJobAdmin(admin.ModelAdmin):
     model = PrintJob
+    action_form = PriorityActionForm
+    actions = ["publish", "unpublish", "set_priority", "print_labels"]
+    show_full_result_count = False
     inlines = [
         PrintJobFileInline,
         PrintAttemptInline,
+        BuildStepInline,
     ]
     list_display = (
         "slug",
         "count_needed",
-        "public"
+        "finished_count",
+        "running_or_finished_count",
+        "public",
+        "build_state",
     )
+    list_filter = [
+        ("build_state", admin.ChoicesFieldListFilter),
+    ]
+
+    @admin.action(description="Publish selected print jobs")
+    def publish(self, request, queryset):
+        count = bulk.update_jobs(queryset, public=True)
+        self.message_user(request, f"Published {count} print jobs.")
+
+    @admin.action(description="Unpublish selected print jobs")
+    def unpublish(self, request, queryset):
+        count = bulk.update_jobs(queryset, public=False)
+        self.message_user(request, f"Unpublished {count} print jobs.")
+
+    @admin.action(description="Set priority of selected print jobs")
+    def set_priority(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields["action"].choices = self.get_action_choices(request)
+        if not form.is_valid() or form.cleaned_data["priority"] is None:
+            self.message_user(
+                request, "Enter a priority from 0 to 100.", messages.ERROR
+            )
+            return
+        priority = form.cleaned_data["priority"]
+        count = bulk.update_jobs(queryset, priority=priority)
+        self.message_user(request, f"Set priority {priority} on {count} print jobs.")
+
+    @admin.action(description="Print labels for the attempts of selected print jobs")
+    def print_labels(self, request, queryset):
+        attempts = PrintAttempt.objects.filter(job__in=queryset, dropped_off=False)
+        return labels_response(attempts.order_by("job", "pk"))
 
 
 @admin.register(PrintAttempt)
 class PrintAttemptAdmin(admin.ModelAdmin):
     model = PrintAttempt
+    actions = ["mark_dropped_off", "end_attempts", "print_labels"]
+    list_select_related = ("user",)
+    show_full_result_count = False
     list_display = (
         "id",
         "user",
@@ -61,11 +154,13 @@ class PrintAttemptAdmin(admin.ModelAdmin):
         "started",
         "ended",
         "finished",
-        "dropped_off"
+        "dropped_off",
+        "expired",
     )
     list_filter = [
         ("finished", admin.BooleanFieldListFilter),
         ("dropped_off", admin.BooleanFieldListFilter),
+        ("expired", admin.BooleanFieldListFilter),
         ("user", admin.RelatedFieldListFilter)
     ]
 
@@ -77,6 +172,63 @@ class PrintAttemptAdmin(admin.ModelAdmin):
     job_link.admin_order_field = "job"
     job_link.short_description = "job"
 
+    @admin.action(description="Mark selected print attempts as dropped off")
+    def mark_dropped_off(self, request, queryset):
+        count = bulk.mark_dropped_off(queryset)
+        self.message_user(request, f"Marked {count} print attempts as dropped off.")
+
+    @admin.action(description="End selected print attempts as failed")
+    def end_attempts(self, request, queryset):
+        count = bulk.end_attempts(queryset)
+        self.message_user(request, f"Ended {count} print attempts as failed.")
+
+    @admin.action(description="Print labels for selected print attempts")
+    def print_labels(self, request, queryset):
+        return labels_response(queryset.order_by("job", "pk"))
+
+    def get_urls(self):
+        return [
+            path(
+                "scan/",
+                self.admin_site.admin_view(self.scan_view),
+                name="crowdprinter_printattempt_scan",
+            ),
+        ] + super().get_urls()
+
+    def scan_view(self, request):
+        """
+        Mark the attempts of scanned labels as dropped off, one code per
+        line as a barcode scanner types them.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        if request.method == "POST":
+            checked_in, unknown, invalid = bulk.check_in(
+                request.POST.get("codes", "").split()
+            )
+            self.message_user(
+                request, f"Marked {len(checked_in)} print attempts as dropped off."
+            )
+            if unknown:
+                self.message_user(
+                    request,
+                    f"Unknown print attempts: {', '.join(unknown)}",
+                    messages.WARNING,
+                )
+            if invalid:
+                self.message_user(
+                    request, f"Not a label: {', '.join(invalid)}", messages.WARNING
+                )
+            return redirect("admin:crowdprinter_printattempt_scan")
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Scan dropped off print attempts",
+        }
+        return TemplateResponse(
+            request, "admin/crowdprinter/printattempt/scan.html", context
+        )
+
 
 @admin.register(User)
 class UserAdmin(UserAdmin):
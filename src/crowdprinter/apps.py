@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class CrowdprinterConfig(AppConfig):
+    name = "crowdprinter"
+
+    def ready(self):
+        from . import signals  # noqa: F401
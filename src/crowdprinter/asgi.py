@@ -0,0 +1,18 @@
+"""
+ASGI config for crowdprinter project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Only the live updates on /events need it, everything else can still be served
+by the WSGI application.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crowdprinter.settings")
+
+application = get_asgi_application()
@@ -0,0 +1,146 @@
+"""
+The static files of the crowdprinter app which are actually used. Icons
+are served from one SVG sprite built from the icons the templates use, and
+collectstatic only collects the files referenced by the templates and,
+recursively, by those files' url()s.
+"""
+
+import functools
+import pathlib
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+
+from django.contrib.staticfiles.finders import AppDirectoriesFinder
+
+APP_DIR = pathlib.Path(__file__).parent
+STATIC_DIR = APP_DIR / "static"
+TEMPLATE_DIR = APP_DIR / "templates"
+ICON_DIR = STATIC_DIR / "crowdprinter/38c3/icons/32"
+SPRITE = "crowdprinter/icons.svg"
+
+SVG_NS = "http://www.w3.org/2000/svg"
+# {% static 'path' %} and {% icon 'name' ... %} with literal arguments
+STATIC_TAG_RE = re.compile(r"""{%\s*static\s+["']([^"']+)["']""")
+ICON_TAG_RE = re.compile(r"""{%\s*icon\s+["']([^"']+)["']""")
+# url(...) in stylesheets, and source maps in stylesheets and scripts
+URL_RE = re.compile(r"""url\(\s*["']?([^"')]+)["']?\s*\)""")
+SOURCE_MAP_RE = re.compile(r"""[#@] sourceMappingURL=(\S+?)(?:\s*\*/)?\s*$""", re.M)
+CLASS_RULE_RE = re.compile(r"\.([\w-]+)\s*{([^}]*)}")
+
+
+def templates():
+    return sorted(TEMPLATE_DIR.rglob("*.html"))
+
+
+def used_icons():
+    names = set()
+    for path in templates():
+        names.update(ICON_TAG_RE.findall(path.read_text()))
+    return sorted(names)
+
+
+def icon_symbol(name):
+    """
+    The <symbol> of an icon for the sprite. Class styles become attributes,
+    as the classes of different icons would clash in one document, and
+    invisible helper shapes are dropped.
+    """
+    root = ET.parse(ICON_DIR / f"{name}.svg").getroot()
+    styles = {}
+    for style in root.iter(f"{{{SVG_NS}}}style"):
+        for cls, body in CLASS_RULE_RE.findall(style.text or ""):
+            declarations = (item.split(":", 1) for item in body.split(";"))
+            styles[cls] = {
+                key.strip(): value.strip()
+                for key, value in (d for d in declarations if len(d) == 2)
+            }
+    symbol = ET.Element(f"{{{SVG_NS}}}symbol", id=name, viewBox=root.get("viewBox"))
+    for child in root:
+        if child.tag.removeprefix(f"{{{SVG_NS}}}") in ("defs", "style", "title"):
+            continue
+        attributes = {}
+        for cls in child.get("class", "").split():
+            attributes.update(styles.get(cls, {}))
+        invisible = attributes.get("opacity") == "0" or (
+            attributes.get("fill") == "none" and "stroke" not in attributes
+        )
+        if invisible:
+            continue
+        for key in ("class", "id", "data-name"):
+            child.attrib.pop(key, None)
+        child.attrib.update(attributes)
+        symbol.append(child)
+    return symbol
+
+
+def build_sprite(names=None):
+    """
+    The SVG sprite with a <symbol> for each of `names`, all icons the
+    templates use by default.
+    """
+    ET.register_namespace("", SVG_NS)
+    sprite = ET.Element(f"{{{SVG_NS}}}svg")
+    for name in used_icons() if names is None else names:
+        sprite.append(icon_symbol(name))
+    ET.indent(sprite)
+    return ET.tostring(sprite, encoding="unicode") + "\n"
+
+
+def references(path, content):
+    """
+    The static paths a stylesheet or script at `path` refers to.
+    """
+    found = set()
+    urls = SOURCE_MAP_RE.findall(content)
+    if path.endswith(".css"):
+        urls += URL_RE.findall(content)
+    for url in urls:
+        url = url.split("#")[0].split("?")[0]
+        if not url or url.startswith(("/", "data:")) or "//" in url:
+            continue
+        found.add(posixpath.normpath(posixpath.join(posixpath.dirname(path), url)))
+    return found
+
+
+@functools.cache
+def referenced_files():
+    """
+    The static paths of the crowdprinter app used by its templates, by the
+    stylesheets and scripts among them, and so on.
+    """
+    pending = {SPRITE}
+    for path in templates():
+        pending.update(STATIC_TAG_RE.findall(path.read_text()))
+    found = set()
+    while pending:
+        path = pending.pop()
+        if path in found or not (STATIC_DIR / path).is_file():
+            continue
+        found.add(path)
+        if path.endswith((".css", ".js")):
+            content = (STATIC_DIR / path).read_text(errors="replace")
+            pending.update(references(path, content) - found)
+    return found
+
+
+class ReferencedAppDirectoriesFinder(AppDirectoriesFinder):
+    """
+    AppDirectoriesFinder which skips the static files of the crowdprinter
+    app no template refers to, so they are neither collected nor served.
+    """
+
+    def is_pruned(self, app, path):
+        return app == "crowdprinter" and path not in referenced_files()
+
+    def list(self, ignore_patterns):
+        storage = self.storages.get("crowdprinter")
+        for path, path_storage in super().list(ignore_patterns):
+            if path_storage is storage and self.is_pruned("crowdprinter", path):
+                continue
+            yield path, path_storage
+
+    def find_in_app(self, app, path):
+        if self.is_pruned(app, path):
+            return None
+        return super().find_in_app(app, path)
@@ -0,0 +1,359 @@
+import datetime
+import json
+import os
+import tempfile
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.utils import timezone
+
+import crowdprinter.models as models
+import stl_generator
+from crowdprinter import caching
+from crowdprinter import metrics
+from crowdprinter import renders
+from stl_generator import gcode
+from stl_generator import mesh
+from stl_generator.cache import ArtifactCache
+
+Step = models.BuildStep.Step
+Status = models.BuildStep.Status
+
+SUFFIXES = {
+    Step.STL: ".stl",
+    Step.MESH: ".json",
+    Step.RENDER: ".png",
+    Step.GCODE: ".gcode",
+}
+
+
+def make_steps(job, text=None, profile_letters=True):
+    steps = [Step.MESH, Step.RENDER, Step.GCODE]
+    if text is not None:
+        steps.insert(0, Step.STL)
+    sign = json.dumps({"text": text, "profile_letters": profile_letters})
+    return [
+        models.BuildStep(
+            job=job,
+            step=step,
+            argument=sign if step == Step.STL else "",
+        )
+        for step in steps
+    ]
+
+
+def enqueue(job, text=None, profile_letters=True):
+    models.BuildStep.objects.bulk_create(make_steps(job, text, profile_letters))
+
+
+def claimable_steps():
+    stale = timezone.now() - datetime.timedelta(
+        seconds=settings.CROWDPRINTER_BUILD_TIMEOUT
+    )
+    pending = models.BuildStep.objects.filter(job=OuterRef("job")).exclude(
+        status=Status.DONE
+    )
+    return (
+        models.BuildStep.objects.filter(
+            Q(status=Status.QUEUED) | Q(status=Status.RUNNING, started__lt=stale)
+        )
+        # everything but the STL step needs the STL file of the job
+        .filter(Q(step=Step.STL) | ~Exists(pending.filter(step=Step.STL)))
+        # slicing needs the size of the part, to skip printers it doesn't fit
+        .filter(~Q(step=Step.GCODE) | ~Exists(pending.filter(step=Step.MESH))).order_by(
+            "created", "pk"
+        )
+    )
+
+
+def claim_steps(count):
+    claimed = []
+    for step in claimable_steps()[: count * 2]:
+        if len(claimed) == count:
+            break
+        # another worker might have been faster, only the update tells
+        if models.BuildStep.objects.filter(
+            pk=step.pk, status=step.status, started=step.started
+        ).update(status=Status.RUNNING, started=timezone.now()):
+            step.refresh_from_db()
+            claimed.append(step)
+    return claimed
+
+
+def get_artifact_cache():
+    if not settings.CROWDPRINTER_ARTIFACT_CACHE_SIZE:
+        return None
+    return ArtifactCache(
+        settings.CROWDPRINTER_ARTIFACT_CACHE_DIR,
+        settings.CROWDPRINTER_ARTIFACT_CACHE_SIZE,
+    )
+
+
+def run_tool(step, source, cache, printer="", **kwargs):
+    text_to_stl = stl_generator.text_to_stl
+    if settings.CROWDPRINTER_SIGN_GENERATOR == "native":
+        text_to_stl = stl_generator.braille_to_stl
+    tool = {
+        Step.STL: text_to_stl,
+        Step.RENDER: stl_generator.stl_to_png,
+        Step.GCODE: stl_generator.stl_to_gcode,
+    }[step]
+    start = time.perf_counter()
+    with tempfile.NamedTemporaryFile(suffix=SUFFIXES[step], delete=False) as f_out:
+        cache_hit = tool(source, f_out, cache=cache, **kwargs)
+    if not cache_hit:
+        metrics.tool_duration.labels(step=step, printer=printer).observe(
+            time.perf_counter() - start
+        )
+    return f_out.name, cache_hit
+
+
+def run_step(step, source, printers=(), profile_letters=True):
+    """
+    Run the external tool of a build step, without touching the database,
+    so this can run in a worker process. The stl step builds the sign with
+    the text `source`, with or without `profile_letters`. The gcode step
+    slices for all the given (slug, profile path, color changes) printers at
+    once, the render step also produces the scaled variants of the render.
+    The mesh step outputs the mesh info of the STL as JSON.
+
+    Returns a list of (printer slug or variant name, output path, whether
+    the output came from the artifact cache). The main output of a step
+    has no name, variants are never cached.
+    """
+    if step == Step.MESH:
+        with metrics.tool_duration.labels(step=step, printer="").time():
+            info = mesh.mesh_info(source)
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(info, f)
+        return [(None, f.name, None)]
+    cache = get_artifact_cache()
+    if step == Step.RENDER:
+        path, cache_hit = run_tool(step, source, cache)
+        variants = renders.make_variants(path)
+        return [(None, path, cache_hit)] + [
+            (variant, variant_path, None) for variant, variant_path in variants
+        ]
+    if step == Step.STL:
+        return [(None, *run_tool(step, source, cache, profile_letters=profile_letters))]
+
+    def slice_for(printer):
+        slug, profile, color_changes = printer
+        return (
+            slug,
+            *run_tool(
+                step,
+                source,
+                cache,
+                printer=slug,
+                profile=profile,
+                color_changes=color_changes,
+            ),
+        )
+
+    # the slicer runs as a subprocess, threads are enough to run it in parallel
+    with ThreadPoolExecutor(max_workers=max(1, len(printers))) as executor:
+        return list(executor.map(slice_for, printers))
+
+
+def step_printers(step):
+    """
+    The printers to slice for which the part of the job fits into, and the
+    ones it doesn't.
+    """
+    printers = models.Printer.objects.order_by("slug")
+    if step.argument:
+        printers = printers.filter(slug__in=step.argument.split(","))
+    fit, unfit = [], []
+    for printer in printers:
+        (fit if printer.fits(step.job) else unfit).append(printer)
+    return fit, unfit
+
+
+def step_args(step):
+    if step.step == Step.STL:
+        try:
+            sign = json.loads(step.argument)
+        except ValueError:
+            sign = None
+        if not isinstance(sign, dict):
+            # queued when the argument was just the text
+            sign = {"text": step.argument}
+        return (sign["text"], (), sign.get("profile_letters", True))
+    if step.step == Step.GCODE:
+        return (
+            step.job.file_stl.path,
+            [
+                (
+                    printer.slug,
+                    printer.slicer_profile.path if printer.slicer_profile else None,
+                    step.job.get_color_changes(printer),
+                )
+                for printer in step_printers(step)[0]
+            ],
+        )
+    return (step.job.file_stl.path,)
+
+
+def read_output(job, step, path):
+    with open(path, "rb") as f:
+        return ContentFile(f.read(), name=f"{job.slug}{SUFFIXES[step]}")
+
+
+def save_outputs(step, outputs):
+    job = step.job
+    if step.step == Step.STL:
+        job.file_stl = read_output(job, step.step, outputs[0][1])
+        job.save(update_fields=["file_stl"])
+    elif step.step == Step.MESH:
+        with open(outputs[0][1]) as f:
+            info = json.load(f)
+        # the slicer's estimates are better than the rough ones of the mesh
+        if job.files.filter(print_time__isnull=False).exists():
+            info.pop("print_time", None)
+            info.pop("filament_g", None)
+        for field, value in info.items():
+            setattr(job, field, value)
+        job.save(update_fields=list(info))
+    elif step.step == Step.RENDER:
+        job.file_render = read_output(job, step.step, outputs[0][1])
+        job.save(update_fields=["file_render"])
+        renders.save_variants(job, [(name, path) for name, path, _ in outputs[1:]])
+    elif step.step == Step.GCODE:
+        fit, unfit = step_printers(step)
+        printers = {printer.slug: printer for printer in fit + unfit}
+        replaced = list(job.files.filter(printer__in=fit + unfit))
+        models.PrintJobFile.objects.filter(
+            pk__in=[file.pk for file in replaced]
+        ).delete()
+        # the new files get their own names, so the old ones can go once the
+        # replacement is committed
+        transaction.on_commit(
+            lambda: [file.file_gcode.delete(save=False) for file in replaced]
+        )
+        job.unfit_printers.remove(*fit)
+        job.unfit_printers.add(*unfit)
+        files = models.PrintJobFile.objects.bulk_create(
+            models.PrintJobFile(
+                job=job,
+                printer=printers[slug],
+                profile_hash=printers[slug].profile_hash,
+                file_gcode=read_output(job, step.step, path),
+                **gcode.read_estimate(path),
+            )
+            for slug, path, _ in outputs
+        )
+        # the fastest printer's estimate replaces the rough one from the mesh
+        estimates = [file for file in files if file.print_time is not None]
+        if estimates:
+            fastest = min(estimates, key=lambda file: file.print_time)
+            job.print_time = fastest.print_time
+            job.filament_g = fastest.filament_g
+            job.save(update_fields=["print_time", "filament_g"])
+
+
+def update_build_state(job):
+    statuses = set(job.build_steps.values_list("status", flat=True))
+    if Status.FAILED in statuses:
+        state = models.BuildState.FAILED
+    elif statuses <= {Status.DONE}:
+        state = models.BuildState.READY
+    else:
+        state = models.BuildState.BUILDING
+    # steps queued for a built job, like reslicing, replace its outputs but
+    # don't take it off the list while they run or when they fail
+    models.PrintJob.objects.filter(pk=job.pk).exclude(
+        build_state=models.BuildState.READY
+    ).update(build_state=state)
+    caching.invalidate_jobs(job.slug)
+
+
+@transaction.atomic
+def finish_step(step, future):
+    step.tries += 1
+    step.ended = timezone.now()
+    try:
+        outputs = future.result()
+    except Exception:
+        step.error = traceback.format_exc()
+        if step.tries < settings.CROWDPRINTER_BUILD_RETRIES:
+            step.status = Status.QUEUED
+        else:
+            step.status = Status.FAILED
+    else:
+        for _, _, cache_hit in outputs:
+            if cache_hit is None:
+                continue
+            metrics.artifact_cache_requests.labels(
+                step=step.step, result="hit" if cache_hit else "miss"
+            ).inc()
+        try:
+            with transaction.atomic():
+                save_outputs(step, outputs)
+        except Exception:
+            # the outputs don't fit the job, running the tool again won't help
+            step.error = traceback.format_exc()
+            step.status = Status.FAILED
+        else:
+            step.status = Status.DONE
+            step.error = ""
+        finally:
+            for _, path, _ in outputs:
+                os.unlink(path)
+    step.save()
+    update_build_state(step.job)
+    return step
+
+
+@transaction.atomic
+def fail_step(step):
+    """
+    Fail a claimed step which can't even be started, with the traceback of
+    the current exception.
+    """
+    step.tries += 1
+    step.ended = timezone.now()
+    step.error = traceback.format_exc()
+    step.status = Status.FAILED
+    step.save()
+    update_build_state(step.job)
+    return step
+
+
+def run_worker(executor, slots, once=False, poll_interval=1, log=None):
+    """
+    Feed claimed build steps to the executor until interrupted. With `once`,
+    return as soon as nothing is running and nothing can be claimed.
+    """
+    running = {}
+    while True:
+        for step in claim_steps(slots - len(running)):
+            try:
+                args = step_args(step)
+            except Exception:
+                step = fail_step(step)
+                if log:
+                    log(step)
+                continue
+            running[executor.submit(run_step, step.step, *args)] = step
+
+        if not running:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            step = finish_step(running.pop(future), future)
+            if log:
+                log(step)
@@ -0,0 +1,126 @@
+"""
+Changes to many attempts or jobs at once, for the admin actions and the
+drop-off scan. Each is a single UPDATE, followed by what
+crowdprinter.signals does for saved objects: recounting the jobs and
+invalidating the caches, and telling open pages about the changes.
+"""
+
+import datetime
+import re
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from crowdprinter import caching
+from crowdprinter import live
+from crowdprinter import progress
+
+from .models import PrintAttempt
+from .models import PrintJob
+
+# a scanned attempt id followed by the slug of its job as on the labels, or a
+# URL ending in one, or just the id typed in by hand
+ATTEMPT_CODE_RE = re.compile(r"(?:.*/)?([0-9]+)/([-\w]+)/?|([0-9]+)")
+
+
+def attempt_code(attempt):
+    return f"{attempt.pk}/{attempt.job_id}"
+
+
+def parse_attempt_code(code):
+    """
+    The attempt id and, if given, the job slug of a scanned code, or None
+    if it isn't a code.
+    """
+    match = ATTEMPT_CODE_RE.fullmatch(code.strip())
+    if not match:
+        return None
+    if match[3]:
+        return int(match[3]), None
+    return int(match[1]), match[2]
+
+
+def attempts_changed(job_ids, unavailable=()):
+    if not job_ids:
+        return
+    PrintJob.objects.filter(pk__in=job_ids).update_counters()
+    caching.invalidate_attempts(*job_ids)
+    for job in unavailable:
+        live.publish_availability(job)
+    live.publish_progress(progress.compute_progress())
+
+
+@transaction.atomic
+def mark_dropped_off(attempts, today=None):
+    """
+    Mark `attempts` as finished and dropped off, ending the open ones, and
+    return how many changed.
+    """
+    today = today or datetime.date.today()
+    attempts = attempts.exclude(dropped_off=True).order_by()
+    job_ids = set(attempts.values_list("job_id", flat=True))
+    count = attempts.update(
+        ended=Coalesce(F("ended"), Value(today)), finished=True, dropped_off=True
+    )
+    attempts_changed(job_ids)
+    return count
+
+
+@transaction.atomic
+def check_in(codes, today=None):
+    """
+    Mark the attempts of the scanned `codes` as dropped off. Returns the
+    codes of the checked in attempts, including those checked in before,
+    the codes of no attempt, and the codes which aren't codes. A code's slug
+    has to match the attempt's job, so a mistyped id isn't checked in.
+    """
+    parsed, invalid = {}, []
+    for code in codes:
+        attempt = parse_attempt_code(code)
+        if attempt:
+            parsed[code] = attempt
+        else:
+            invalid.append(code)
+    ids = {pk for pk, _ in parsed.values()}
+    jobs = dict(PrintAttempt.objects.filter(pk__in=ids).values_list("pk", "job_id"))
+    checked_in, unknown = [], []
+    for code, (pk, slug) in parsed.items():
+        if pk in jobs and slug in (None, jobs[pk]):
+            checked_in.append(code)
+        else:
+            unknown.append(code)
+    mark_dropped_off(
+        PrintAttempt.objects.filter(pk__in=[parsed[code][0] for code in checked_in]),
+        today=today,
+    )
+    return checked_in, unknown, invalid
+
+
+@transaction.atomic
+def end_attempts(attempts, today=None):
+    """
+    End the open ones of `attempts` as not finished, which frees their
+    jobs, and return how many.
+    """
+    attempts = attempts.filter(ended__isnull=True).order_by()
+    job_ids = set(attempts.values_list("job_id", flat=True))
+    # to tell the browsers which of them can be taken again
+    unavailable = list(PrintJob.objects.filter(pk__in=job_ids, can_attempt=False))
+    count = attempts.update(ended=today or datetime.date.today())
+    attempts_changed(job_ids, unavailable)
+    return count
+
+
+@transaction.atomic
+def update_jobs(jobs, **fields):
+    """
+    Set `fields` on all `jobs` and return how many there were.
+    """
+    slugs = list(jobs.order_by().values_list("slug", flat=True))
+    count = PrintJob.objects.filter(pk__in=slugs).update(**fields)
+    caching.invalidate_jobs(*slugs)
+    if "public" in fields:
+        live.publish_progress(progress.compute_progress())
+    return count
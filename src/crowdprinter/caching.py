@@ -0,0 +1,76 @@
+"""
+Cached read paths, invalidated by crowdprinter.signals instead of waiting for
+timeouts. Every cache key contains the current versions of the data it was
+computed from, changing data bumps its version, so stale entries are never
+read again and just expire. Versions are:
+
+- "jobs": any print job
+- "attempts": any print attempt
+- "job:<slug>": one print job, including its attempt counters
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from crowdprinter import metrics
+
+MISSING = object()
+
+
+def version_key(name):
+    return f"crowdprinter:version:{name}"
+
+
+def get_versions(*names):
+    keys = [version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # not 1, so an evicted version doesn't bring back old entries
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def bump(names):
+    # a new value rather than incr(), which isn't atomic for all backends, so
+    # concurrent bumps from different processes can't cancel out
+    cache.set_many({version_key(name): time.time_ns() for name in names}, None)
+
+
+def invalidate(*names):
+    bump(names)
+    # until the transaction commits, readers still see the old data and
+    # might cache it again under the new version
+    transaction.on_commit(lambda: bump(names))
+
+
+def get_or_set(name, compute, versions, timeout=None):
+    """
+    Return the cached value of `name` for the current `versions`, computing
+    and storing it with `compute()` if there is none. Hits and misses are
+    counted by the part of `name` before the first colon.
+    """
+    key = f"crowdprinter:{name}:{get_versions(*versions)}"
+    value = cache.get(key, MISSING)
+    label = name.split(":")[0]
+    if value is not MISSING:
+        metrics.cache_requests.labels(cache=label, result="hit").inc()
+        return value
+    metrics.cache_requests.labels(cache=label, result="miss").inc()
+    value = compute()
+    if timeout is None:
+        timeout = settings.CROWDPRINTER_CACHE_TIMEOUT
+    cache.set(key, value, timeout)
+    return value
+
+
+def invalidate_jobs(*slugs):
+    invalidate("jobs", *(f"job:{slug}" for slug in slugs))
+
+
+def invalidate_attempts(*slugs):
+    invalidate("attempts", *(f"job:{slug}" for slug in slugs))
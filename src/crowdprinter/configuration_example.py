@@ -7,12 +7,24 @@ ALLOWED_HOSTS = ["*"]
 DOWNLOAD_FILE_PREFIX = ""
 
 SECRET_KEY = "<secret>"
+CROWDPRINTER_EXTERNAL_URL = "http://127.0.0.1:8000"
 
 DATABASE = {
     "ENGINE": "django_prometheus.db.backends.sqlite3",  # Database engine
     "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
 }
 
+# Cache, shared by all gunicorn workers, the build worker and the cron
+# commands. The default keeps it in files under src/cache, which only works
+# when they all run on one host. The django_prometheus backends export hit
+# ratios on /metrics, the redis one needs `pip install django-redis`.
+# CACHES = {
+#     "default": {
+#         "BACKEND": "django_prometheus.cache.backends.redis.RedisCache",
+#         "LOCATION": "redis://127.0.0.1:6379/0",
+#     }
+# }
+
 # allauth
 # https://django-allauth.readthedocs.io/en/latest/configuration.html
 ACCOUNT_EMAIL_REQUIRED = True
@@ -31,3 +43,19 @@ USE_TZ = True
 
 # Mail
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+DEFAULT_FROM_EMAIL = "c3tactile <c3tactile@example.org>"
+
+# End open print attempts 7 days after they were started, run
+# `python3 manage.py expireattempts` from cron every few minutes.
+# CROWDPRINTER_ATTEMPT_LEASE_DAYS = 7
+# CROWDPRINTER_ATTEMPT_REMINDER_DAYS = 1
+
+# Build Braille-only signs without openscad, signs with profile letters and
+# unknown characters still use it.
+# CROWDPRINTER_SIGN_GENERATOR = "native"
+
+# Log queries taking longer than 0.2 s with the code which ran them.
+# CROWDPRINTER_SLOW_QUERY_SECONDS = 0.2
+
+# Print the part labels on A4 sheets of 2 by 7 stickers.
+# CROWDPRINTER_LABEL_GRID = (2, 7)
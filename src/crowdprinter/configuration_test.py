@@ -7,6 +7,7 @@ ALLOWED_HOSTS = ["*"]
 DOWNLOAD_FILE_PREFIX = ""
 
 SECRET_KEY = "testtesttesttesttest"
+CROWDPRINTER_EXTERNAL_URL = "http://localhost:8000"
 
 DATABASE = {
     "ENGINE": "django_prometheus.db.backends.sqlite3",  # Database engine
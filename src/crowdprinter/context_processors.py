@@ -1,8 +1,38 @@
+import random
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
 import crowdprinter.models as models
+from crowdprinter import caching
+
+
+def compute_sample_pool():
+    return list(
+        models.PrintJob.objects.filter(build_state=models.BuildState.READY)
+        .order_by("?")
+        .values_list("slug", flat=True)[: settings.CROWDPRINTER_SAMPLE_POOL_SIZE]
+    )
+
+
+def get_sample_pool():
+    # the timeout draws a new random pool every now and then
+    return caching.get_or_set(
+        "sample_pool",
+        compute_sample_pool,
+        ["jobs"],
+        settings.CROWDPRINTER_SAMPLE_POOL_TIMEOUT,
+    )
+
+
+def sample_job_slugs(count):
+    pool = get_sample_pool()
+    return random.sample(pool, min(len(pool), count))
 
 
 def add_header_footer_stls(request):
+    # lists of job slugs, only computed if a template uses them
     return {
-        "stls_header": models.PrintJob.objects.order_by("?")[:40],
-        "stls_footer": models.PrintJob.objects.order_by("?")[:40],
+        "stls_header": SimpleLazyObject(lambda: sample_job_slugs(40)),
+        "stls_footer": SimpleLazyObject(lambda: sample_job_slugs(40)),
     }
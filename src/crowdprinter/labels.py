@@ -0,0 +1,90 @@
+"""
+Labels for printed parts, with a QR code of the attempt's code for the
+check-in, as PDF sheets of A4 sticker labels.
+"""
+
+import numpy as np
+import segno
+from django.conf import settings
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+
+from crowdprinter import bulk
+from crowdprinter.assets import STATIC_DIR
+
+DPI = 300
+PAGE_SIZE = (2480, 3508)  # A4 at DPI
+PADDING = 30
+FONT = STATIC_DIR / "crowdprinter/SpaceMono-Regular.ttf"
+
+
+def qr_image(code, size):
+    """
+    The QR code of `code` as an image of at most `size` pixels square, with
+    whole pixels per module so it stays sharp.
+    """
+    qr = segno.make(code, error="m", micro=False)
+    modules = np.array(list(qr.matrix_iter(border=2)), dtype=bool)
+    image = Image.fromarray(np.where(modules, 0, 255).astype(np.uint8))
+    scale = max(1, size // len(modules))
+    return image.resize((len(modules) * scale,) * 2, Image.Resampling.NEAREST)
+
+
+def fit_text(draw, text, font, width):
+    """
+    `text` shortened with an ellipsis until it fits into `width` pixels.
+    """
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def draw_label(page, box, attempt):
+    left, top, right, bottom = box
+    qr = qr_image(bulk.attempt_code(attempt), bottom - top - PADDING * 2)
+    page.paste(qr, (left + PADDING, top + (bottom - top - qr.height) // 2))
+    draw = ImageDraw.Draw(page)
+    text_left = left + PADDING * 2 + qr.width
+    width = right - PADDING - text_left
+    slug_font = ImageFont.truetype(FONT, 42)
+    id_font = ImageFont.truetype(FONT, 36)
+    center = (top + bottom) // 2
+    draw.text(
+        (text_left, center - 10),
+        fit_text(draw, attempt.job_id, slug_font, width),
+        font=slug_font,
+        fill=0,
+        anchor="ld",
+    )
+    draw.text(
+        (text_left, center + 10), f"#{attempt.pk}", font=id_font, fill=0, anchor="la"
+    )
+
+
+def label_pages(attempts):
+    """
+    The A4 pages with a label for each of `attempts`, in the grid of
+    CROWDPRINTER_LABEL_GRID.
+    """
+    columns, rows = settings.CROWDPRINTER_LABEL_GRID
+    width, height = PAGE_SIZE[0] // columns, PAGE_SIZE[1] // rows
+    pages = []
+    for i, attempt in enumerate(attempts):
+        position = i % (columns * rows)
+        if position == 0:
+            pages.append(Image.new("L", PAGE_SIZE, 255))
+        left = position % columns * width
+        top = position // columns * height
+        draw_label(pages[-1], (left, top, left + width, top + height), attempt)
+    return pages
+
+
+def write_labels(f, attempts):
+    """
+    Write the label sheets for `attempts` as PDF to `f`.
+    """
+    pages = label_pages(attempts) or [Image.new("L", PAGE_SIZE, 255)]
+    pages[0].save(f, "PDF", resolution=DPI, save_all=True, append_images=pages[1:])
@@ -0,0 +1,118 @@
+"""
+Open print attempts reserve their job until they end. With
+CROWDPRINTER_ATTEMPT_LEASE_DAYS set, `manage.py expireattempts` ends them
+once that many days have passed since they were started, so parts claimed by
+people who never print them are freed again, and reminds their users
+CROWDPRINTER_ATTEMPT_REMINDER_DAYS before.
+
+Both work on batches of attempts with one UPDATE each, rows being processed
+by a concurrent run are skipped, so the command can run from cron as often
+as needed.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from crowdprinter import caching
+from crowdprinter import live
+
+from .models import PrintAttempt
+from .models import PrintJob
+
+BATCH_SIZE = 1000
+
+
+def get_lease():
+    lease = settings.CROWDPRINTER_ATTEMPT_LEASE_DAYS
+    return None if lease is None else datetime.timedelta(days=lease)
+
+
+def expire_attempts(today=None, batch_size=BATCH_SIZE):
+    """
+    End all open attempts which were started before the lease, and return
+    how many.
+    """
+    lease = get_lease()
+    if lease is None:
+        return 0
+    today = today or datetime.date.today()
+    expired = (
+        PrintAttempt.objects.filter(ended__isnull=True, started__lt=today - lease)
+        .order_by()
+        .values_list("pk", "job_id")
+    )
+    count = 0
+    while True:
+        with transaction.atomic():
+            batch = list(expired.select_for_update(skip_locked=True)[:batch_size])
+            if not batch:
+                return count
+            job_ids = {job_id for _, job_id in batch}
+            # to tell the browsers which of them can be taken again
+            unavailable = list(
+                PrintJob.objects.filter(pk__in=job_ids, can_attempt=False)
+            )
+            count += PrintAttempt.objects.filter(
+                pk__in=[pk for pk, _ in batch], ended__isnull=True
+            ).update(ended=today, expired=True)
+            # .update() bypasses crowdprinter.signals
+            PrintJob.objects.filter(pk__in=job_ids).update_counters()
+            caching.invalidate_attempts(*job_ids)
+            for job in unavailable:
+                live.publish_availability(job)
+
+
+def send_reminders(today=None, batch_size=BATCH_SIZE):
+    """
+    Mail the users of attempts expiring within the reminder days, once per
+    attempt, and return how many were sent. Attempts are marked as reminded
+    before the mails are sent, so a failed mail is not sent again.
+    """
+    lease = get_lease()
+    if lease is None:
+        return 0
+    today = today or datetime.date.today()
+    remind = datetime.timedelta(days=settings.CROWDPRINTER_ATTEMPT_REMINDER_DAYS)
+    due = PrintAttempt.objects.filter(
+        ended__isnull=True,
+        reminded__isnull=True,
+        started__gte=today - lease,
+        started__lte=today - lease + remind,
+    ).order_by()
+    due = due.select_related("user").select_for_update(skip_locked=True, of=("self",))
+    sent = 0
+    while True:
+        with transaction.atomic():
+            batch = list(due[:batch_size])
+            if not batch:
+                return sent
+            PrintAttempt.objects.filter(pk__in=[a.pk for a in batch]).update(
+                reminded=today
+            )
+        messages = [reminder_message(a) for a in batch if a.user.email]
+        sent += send_mass_mail(messages)
+
+
+def reminder_message(attempt):
+    context = {
+        "attempt": attempt,
+        "url": settings.CROWDPRINTER_EXTERNAL_URL
+        + reverse("printjob_detail", kwargs={"slug": attempt.job_id}),
+    }
+    subject = render_to_string(
+        "crowdprinter/email/attempt_reminder_subject.txt", context
+    )
+    message = render_to_string(
+        "crowdprinter/email/attempt_reminder_message.txt", context
+    )
+    return (
+        " ".join(subject.split()),
+        message,
+        settings.DEFAULT_FROM_EMAIL,
+        [attempt.user.email],
+    )
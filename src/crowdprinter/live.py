@@ -0,0 +1,139 @@
+"""
+Live updates of the progress bar and of jobs becoming available or
+unavailable, pushed to the browsers as Server-Sent Events on /events.
+
+The views publish events when attempts change, as rows of LiveEvent in the
+same transaction, so they work from any process. Each ASGI process has one
+Broadcaster, which polls that table for all of its clients and hands new
+events to each of them: idle clients cost one query per process and poll
+interval, not one per client.
+"""
+
+import asyncio
+import datetime
+import json
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import BuildState
+from .models import LiveEvent
+from .models import PrintJob
+
+# browsers reconnect after this many milliseconds, sending the last event id
+RETRY = 5000
+# ends all streams of a process, e.g. when the database is unreachable
+CLOSE = object()
+# events are read again for this long, as a transaction publishing a lower id
+# can commit after one with a higher id was read
+OVERLAP = datetime.timedelta(seconds=10)
+
+
+def publish(kind, data):
+    retention = datetime.timedelta(seconds=settings.CROWDPRINTER_LIVE_EVENT_RETENTION)
+    LiveEvent.objects.filter(created__lt=timezone.now() - retention).delete()
+    return LiveEvent.objects.create(kind=kind, data=data)
+
+
+def publish_progress(progress):
+    publish(LiveEvent.Kind.PROGRESS, progress)
+
+
+def publish_availability(job):
+    """
+    Publish whether `job` can be taken, if that changed since it was loaded.
+    """
+    if not job.public or job.build_state != BuildState.READY:
+        return
+    available = PrintJob.objects.values_list("can_attempt", flat=True).get(pk=job.pk)
+    if available != job.can_attempt:
+        publish(LiveEvent.Kind.JOB, {"slug": job.slug, "available": available})
+
+
+def format_event(event):
+    data = json.dumps(event.data, separators=(",", ":"))
+    return f"id: {event.pk}\nevent: {event.kind}\ndata: {data}\n\n"
+
+
+def recent_events():
+    since = timezone.now() - OVERLAP
+    return since, LiveEvent.objects.filter(created__gte=since).order_by("pk")
+
+
+class Broadcaster:
+    def __init__(self):
+        self.queues = set()
+        # the creation times of the events sent within the overlap, by id
+        self.sent = {}
+        self.task = None
+
+    async def poll(self):
+        try:
+            # events published before the first browser connected aren't sent
+            _, events = recent_events()
+            self.sent = {
+                pk: created async for pk, created in events.values_list("pk", "created")
+            }
+            while self.queues:
+                since, events = recent_events()
+                async for event in events:
+                    if event.pk in self.sent:
+                        continue
+                    self.sent[event.pk] = event.created
+                    for queue in self.queues:
+                        queue.put_nowait(event)
+                self.sent = {
+                    pk: created for pk, created in self.sent.items() if created >= since
+                }
+                await asyncio.sleep(settings.CROWDPRINTER_LIVE_POLL_INTERVAL)
+        except Exception:
+            # the browsers reconnect and start a new poller
+            for queue in self.queues:
+                queue.put_nowait(CLOSE)
+            raise
+
+    async def subscribe(self, last_event_id=None):
+        """
+        Yield the events published from now on, preceded by those after
+        `last_event_id` if given. None is yielded instead after
+        CROWDPRINTER_LIVE_KEEPALIVE seconds without events.
+        """
+        queue = asyncio.Queue()
+        self.queues.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.poll())
+        try:
+            # subscribed before reading the missed events, so none fall in
+            # between, but some might be in both
+            seen = set()
+            if last_event_id is not None:
+                missed = LiveEvent.objects.filter(pk__gt=last_event_id).order_by("pk")
+                async for event in missed:
+                    seen.add(event.pk)
+                    yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), settings.CROWDPRINTER_LIVE_KEEPALIVE
+                    )
+                except TimeoutError:
+                    yield None
+                    continue
+                if event is CLOSE:
+                    return
+                if event.pk not in seen:
+                    yield event
+        finally:
+            self.queues.discard(queue)
+
+
+broadcaster = Broadcaster()
+
+
+async def stream(last_event_id=None):
+    yield f"retry: {RETRY}\n\n"
+    async for event in broadcaster.subscribe(last_event_id):
+        if event is None:
+            yield ": keepalive\n\n"
+        else:
+            yield format_event(event)
@@ -0,0 +1,110 @@
+"""
+Generated jobs, users and attempts at event scale, for the benchmark and
+query plan commands. Everything is created with bulk_create and named with a
+prefix, the callers run it in a transaction which is rolled back afterwards.
+"""
+
+import datetime
+import os
+import random
+import shutil
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import PrintAttempt
+from .models import Printer
+from .models import PrintJob
+from .models import PrintJobFile
+
+# share of all attempts in each state, like in the middle of an event
+OPEN = 0.25
+GIVEN_BACK = 0.15
+# the rest is finished
+
+STL = b"solid loadgen\nendsolid loadgen\n"
+GCODE = b"; loadgen\nG28\n" * 1000
+
+
+def write_files(prefix):
+    """
+    One STL, render and G-code file shared by all generated jobs, so the
+    downloads have something to send. Returns their names in MEDIA_ROOT.
+    """
+    names = {}
+    directory = os.path.join(settings.MEDIA_ROOT, prefix)
+    os.makedirs(directory, exist_ok=True)
+    for kind, content in [("stl", STL), ("png", b"\x89PNG"), ("gcode", GCODE)]:
+        names[kind] = f"{prefix}/part.{kind}"
+        with open(os.path.join(settings.MEDIA_ROOT, names[kind]), "wb") as f:
+            f.write(content)
+    return names
+
+
+def remove_files(prefix):
+    shutil.rmtree(os.path.join(settings.MEDIA_ROOT, prefix), ignore_errors=True)
+
+
+def generate(jobs, users, attempts, seed=0, prefix="loadgen"):
+    """
+    Create `jobs` public jobs sliced for one printer, `users` users and
+    `attempts` attempts in the OPEN, GIVEN_BACK and finished mix. Open and
+    finished attempts never exceed the prints a job needs, the remaining
+    ones are given back. Returns the users and jobs.
+    """
+    rng = random.Random(seed)
+    files = write_files(prefix)
+    printer = Printer.objects.create(slug=prefix, name=prefix)
+    user_objs = get_user_model().objects.bulk_create(
+        get_user_model()(
+            username=f"{prefix}-{i}",
+            email=f"{prefix}-{i}@example.org",
+        )
+        for i in range(max(1, users))
+    )
+    job_objs = PrintJob.objects.bulk_create(
+        PrintJob(
+            slug=f"{prefix}-{i}",
+            file_stl=files["stl"],
+            file_render=files["png"],
+            public=rng.random() < 0.9,
+            priority=rng.randrange(101),
+            count_needed=rng.choice([1, 1, 1, 2, 3, 5, 10]),
+        )
+        for i in range(jobs)
+    )
+    PrintJobFile.objects.bulk_create(
+        PrintJobFile(job=job, printer=printer, file_gcode=files["gcode"])
+        for job in job_objs
+    )
+
+    # each print a job needs can be taken by one open or finished attempt
+    slots = [job for job in job_objs for _ in range(job.count_needed)]
+    rng.shuffle(slots)
+    # every user can still take one more job
+    max_open = settings.CROWDPRINTER_DEFAULT_MAX_ATTEMPTS - 1
+    open_counts = {}
+    today = datetime.date.today()
+    attempt_objs = []
+    for _ in range(attempts):
+        state = rng.random()
+        user = rng.choice(user_objs)
+        is_open = GIVEN_BACK <= state < GIVEN_BACK + OPEN
+        capped = 0 <= max_open <= open_counts.get(user.pk, 0)
+        if state < GIVEN_BACK or not slots or (is_open and capped):
+            attempt = PrintAttempt(job=rng.choice(job_objs), user=user, ended=today)
+        elif is_open:
+            open_counts[user.pk] = open_counts.get(user.pk, 0) + 1
+            attempt = PrintAttempt(job=slots.pop(), user=user)
+        else:
+            attempt = PrintAttempt(
+                job=slots.pop(),
+                user=user,
+                ended=today,
+                finished=True,
+                dropped_off=rng.random() < 0.5,
+            )
+        attempt_objs.append(attempt)
+    PrintAttempt.objects.bulk_create(attempt_objs, batch_size=5000)
+    PrintJob.objects.filter(slug__startswith=f"{prefix}-").update_counters()
+    return user_objs, job_objs
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from stl_generator import insert_m600
+
+# the previous implementation, which read the whole file into memory
+READLINES = """
+import sys
+with open(sys.argv[2]) as file:
+    gcode = file.readlines()
+with open(sys.argv[2], "w") as file:
+    for line in gcode:
+        file.write(line)
+        if f";Z:{sys.argv[1]}" in line:
+            file.write("M600 ; filament change\\n")
+"""
+
+# the peak memory of a process includes that of its parent before exec, so
+# measure from a small interpreter instead of this Django process
+MEASURE = """
+import os, subprocess, sys
+process = subprocess.Popen(sys.argv[1:])
+_, status, usage = os.wait4(process.pid, 0)
+print(usage.ru_maxrss)
+sys.exit(os.waitstatus_to_exitcode(status))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "measure time and peak memory of the G-code post-processor on a large "
+        "synthetic G-code file, compared to reading the whole file at once"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=int, default=300)
+        parser.add_argument("--height", default="2.15")
+
+    def write_gcode(self, path, size):
+        layer = 0
+        with open(path, "w") as f:
+            while f.tell() < size:
+                layer += 1
+                f.write(
+                    f";LAYER_CHANGE\n;Z:{layer * 0.05:.2f}\nG1 Z{layer * 0.05:.2f}\n"
+                )
+                for i in range(1000):
+                    f.write(f"G1 X{i % 250}.{i % 10} Y{i % 210}.{i % 7} E0.0{i % 9}\n")
+
+    def run(self, args):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", MEASURE, sys.executable, *args],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        # ru_maxrss is in KiB on Linux
+        return time.perf_counter() - start, int(result.stdout) / 1024
+
+    def handle(self, *args, **options):
+        size = options["size_mb"] * 1024 * 1024
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.gcode")
+            for name, script in (
+                ("streaming", [insert_m600.__file__]),
+                ("readlines", ["-c", READLINES]),
+            ):
+                self.write_gcode(path, size)
+                seconds, max_rss = self.run([*script, options["height"], path])
+                self.stdout.write(
+                    f"{name:>10}: {seconds:6.2f} s, "
+                    f"{size / 1024 / 1024 / seconds:7.1f} MB/s, "
+                    f"peak memory {max_rss:8.1f} MB"
+                )
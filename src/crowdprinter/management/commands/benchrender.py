@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+import stl_generator
+from stl_generator import display
+
+TETRAHEDRON = """solid tetrahedron
+facet normal 0 0 -1 outer loop
+vertex 0 0 0 vertex 10 0 0 vertex 0 10 0
+endloop endfacet
+facet normal 0 -1 0 outer loop
+vertex 0 0 0 vertex 0 0 10 vertex 10 0 0
+endloop endfacet
+facet normal -1 0 0 outer loop
+vertex 0 0 0 vertex 0 10 0 vertex 0 0 10
+endloop endfacet
+facet normal 1 1 1 outer loop
+vertex 10 0 0 vertex 0 0 10 vertex 0 10 0
+endloop endfacet
+endsolid tetrahedron
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "compare renders per second of starting xvfb-run for each render with "
+        "rendering batches on the persistent display of the process"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=50)
+        parser.add_argument("--stl", help="STL file to render, a small solid if unset")
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+
+    def report(self, name, count, seconds):
+        self.stdout.write(
+            f"{name:>28}: {seconds:6.2f} s, {count / seconds:6.2f} renders/s"
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path_stl = options["stl"]
+            if not path_stl:
+                path_stl = os.path.join(tmp, "bench.stl")
+                with open(path_stl, "w") as f:
+                    f.write(TETRAHEDRON)
+            path_png = os.path.join(tmp, "bench.png")
+
+            start = time.perf_counter()
+            for _ in range(count):
+                with open(path_png, "wb") as f_png:
+                    stl_generator.stl_to_png(path_stl, f_png, persistent_display=False)
+            self.report("xvfb-run per render", count, time.perf_counter() - start)
+
+            for workers in sorted({1, options["workers"]}):
+                start = time.perf_counter()
+                outputs = stl_generator.stl_to_pngs([path_stl] * count, workers=workers)
+                seconds = time.perf_counter() - start
+                for path, _ in outputs:
+                    os.unlink(path)
+                self.report(f"persistent display, {workers} at once", count, seconds)
+        display.close_display()
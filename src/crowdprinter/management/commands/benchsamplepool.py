@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+import crowdprinter.models as models
+from crowdprinter import caching
+from crowdprinter.context_processors import add_header_footer_stls
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "measure the cost of the header/footer job sample for growing numbers "
+        "of jobs, in a transaction that is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+        )
+        parser.add_argument("--renders", type=int, default=1000)
+
+    def render(self):
+        context = add_header_footer_stls(None)
+        return len(context["stls_header"]) + len(context["stls_footer"])
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                created = 0
+                for size in sorted(options["sizes"]):
+                    models.PrintJob.objects.bulk_create(
+                        models.PrintJob(slug=f"bench-sample-{i}")
+                        for i in range(created, size)
+                    )
+                    created = size
+                    caching.invalidate("jobs")
+
+                    start = time.perf_counter()
+                    self.render()
+                    cold = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    for _ in range(options["renders"]):
+                        self.render()
+                    warm = (time.perf_counter() - start) / options["renders"]
+
+                    self.stdout.write(
+                        f"{size:>8} jobs: pool rebuild {cold * 1000:8.2f} ms, "
+                        f"per page {warm * 1000000:8.2f} µs"
+                    )
+                raise Rollback()
+        except Rollback:
+            caching.invalidate("jobs")
@@ -0,0 +1,58 @@
+import pathlib
+import re
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test import override_settings
+
+from crowdprinter.management.commands.benchviews import get_host
+
+# all static files of all apps, as collected before pruning
+ALL_FINDERS = [
+    "django.contrib.staticfiles.finders.FileSystemFinder",
+    "django.contrib.staticfiles.finders.AppDirectoriesFinder",
+]
+# src and href attributes, without the fragment naming a sprite's icon
+ATTRIBUTE_RE = re.compile(r"""(?:src|href)=["']([^"'#]+)""")
+
+
+class Command(BaseCommand):
+    help = (
+        "measure collectstatic with all static files and with only the "
+        "referenced ones, and count the static requests of the first page"
+    )
+
+    def handle(self, *args, **options):
+        for name, finders in [
+            ("all files", ALL_FINDERS),
+            ("referenced", settings.STATICFILES_FINDERS),
+        ]:
+            static_root = tempfile.mkdtemp()
+            try:
+                with override_settings(
+                    STATIC_ROOT=static_root, STATICFILES_FINDERS=finders
+                ):
+                    start = time.perf_counter()
+                    call_command("collectstatic", interactive=False, verbosity=0)
+                    duration = time.perf_counter() - start
+                    files = sum(
+                        path.is_file() for path in pathlib.Path(static_root).rglob("*")
+                    )
+                    # static URLs need the manifest of a collected STATIC_ROOT
+                    requests = self.first_page_requests()
+            finally:
+                shutil.rmtree(static_root)
+            self.stdout.write(
+                f"{name:>10}: collectstatic {duration:6.1f} s, {files:5} files, "
+                f"first page {requests} static requests"
+            )
+
+    def first_page_requests(self):
+        response = Client(HTTP_HOST=get_host()).get("/")
+        urls = ATTRIBUTE_RE.findall(response.content.decode())
+        return len({url for url in urls if url.startswith(settings.STATIC_URL)})
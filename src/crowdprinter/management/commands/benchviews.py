@@ -0,0 +1,210 @@
+import json
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.test import Client
+from django.test.client import ClientHandler
+from django.test.utils import CaptureQueriesContext
+
+from crowdprinter import caching
+from crowdprinter import loadgen
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+PREFIX = "bench"
+# in the order they run, give_back ends the attempts take started
+WORKLOADS = ["list", "detail", "take", "give_back", "download", "done"]
+# anonymous visitors browsing the list, each with its own session
+VISITORS = 20
+
+
+class Rollback(Exception):
+    pass
+
+
+def get_host():
+    # the test client's "testserver" is only allowed by the test runner
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*":
+            return host.lstrip(".")
+    return "testserver"
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "measure latency, queries and throughput of the views of the volunteer "
+        "workflow on generated data, in a transaction that is rolled back "
+        "afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=10000)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--attempts", type=int, default=30000)
+        parser.add_argument(
+            "--requests", type=int, default=200, help="requests per workload"
+        )
+        parser.add_argument(
+            "--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--json", action="store_true", help="print the results as JSON"
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.host = get_host()
+        # all clients share the middleware, loading it scans the static files
+        self.handler = ClientHandler(enforce_csrf_checks=False)
+        self.handler.load_middleware()
+        self.clients = {}
+        self.taken = []
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                self.users, _ = loadgen.generate(
+                    options["jobs"],
+                    options["users"],
+                    options["attempts"],
+                    seed=options["seed"],
+                    prefix=PREFIX,
+                )
+                # bulk_create doesn't send the signals invalidating caches
+                caching.invalidate("jobs", "attempts")
+                if not options["json"]:
+                    self.stdout.write(
+                        f"generated {options['jobs']} jobs, {options['users']} "
+                        f"users and {options['attempts']} attempts in "
+                        f"{time.perf_counter() - start:.1f} s"
+                    )
+                results = []
+                for name in WORKLOADS:
+                    if name in options["workloads"]:
+                        requests = getattr(self, f"requests_{name}")
+                        result = self.measure(name, requests(options["requests"]))
+                        results.append(result)
+                        if not options["json"]:
+                            self.report(result)
+                raise Rollback()
+        except Rollback:
+            pass
+        finally:
+            loadgen.remove_files(PREFIX)
+            caching.invalidate("jobs", "attempts")
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+
+    def measure(self, name, requests):
+        timings = []
+        queries = []
+        errors = 0
+        # setting up the next request, e.g. logging in, isn't measured
+        for client, method, path in requests:
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = getattr(client, method)(path)
+                timings.append(time.perf_counter() - start)
+            response.close()
+            queries.append(len(context.captured_queries))
+            if response.status_code >= 400:
+                errors += 1
+        if not timings:
+            return {"workload": name, "requests": 0}
+        return {
+            "workload": name,
+            "requests": len(timings),
+            "errors": errors,
+            "p50_ms": percentile(timings, 0.5) * 1000,
+            "p99_ms": percentile(timings, 0.99) * 1000,
+            "queries": sum(queries) / len(queries),
+            "requests_per_s": len(timings) / sum(timings),
+        }
+
+    def report(self, result):
+        if not result["requests"]:
+            self.stdout.write(f"{result['workload']:>10}: nothing to request")
+            return
+        self.stdout.write(
+            "{workload:>10}: {requests:5} requests, p50 {p50_ms:8.2f} ms, "
+            "p99 {p99_ms:8.2f} ms, {queries:5.1f} queries, "
+            "{requests_per_s:7.1f} requests/s, {errors} errors".format(**result)
+        )
+
+    def new_client(self):
+        client = Client(HTTP_HOST=self.host)
+        client.handler = self.handler
+        return client
+
+    def client(self, user):
+        if user.pk not in self.clients:
+            self.clients[user.pk] = self.new_client()
+            self.clients[user.pk].force_login(user)
+        return self.clients[user.pk]
+
+    def open_attempts(self, count):
+        return (
+            PrintAttempt.objects.filter(
+                job__slug__startswith=f"{PREFIX}-", ended__isnull=True
+            )
+            .select_related("user")
+            .order_by("?")[:count]
+        )
+
+    def requests_list(self, count):
+        visitors = [self.new_client() for _ in range(VISITORS)]
+        for i in range(count):
+            yield visitors[i % VISITORS], "get", "/"
+
+    def requests_detail(self, count):
+        slugs = list(
+            PrintJob.objects.filter(
+                slug__startswith=f"{PREFIX}-", public=True
+            ).values_list("slug", flat=True)
+        )
+        for _ in range(count):
+            user = self.rng.choice(self.users)
+            yield self.client(user), "get", f"/printjob/{self.rng.choice(slugs)}/"
+
+    def requests_take(self, count):
+        slugs = list(
+            PrintJob.objects.filter(
+                slug__startswith=f"{PREFIX}-", public=True, can_attempt=True
+            ).values_list("slug", flat=True)
+        )
+        # every generated user can take one more job
+        count = min(count, len(slugs), len(self.users))
+        users = self.rng.sample(self.users, count)
+        for user, slug in zip(users, self.rng.sample(slugs, count)):
+            yield self.client(user), "post", f"/printjob/{slug}/take"
+            self.taken.append((user, slug))
+
+    def requests_give_back(self, count):
+        taken = self.taken[:count]
+        taken += [
+            (attempt.user, attempt.job_id)
+            for attempt in self.open_attempts(count - len(taken))
+        ]
+        for user, slug in taken:
+            yield self.client(user), "post", f"/printjob/{slug}/give_back"
+
+    def requests_download(self, count):
+        for i, attempt in enumerate(self.open_attempts(count)):
+            path = f"/printjob/{attempt.job_id}/"
+            path += "stl" if i % 2 else f"file/{PREFIX}/gcode"
+            yield self.client(attempt.user), "get", path
+
+    def requests_done(self, count):
+        for attempt in self.open_attempts(count):
+            path = f"/printjob/{attempt.job_id}/done"
+            yield self.client(attempt.user), "post", path
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from crowdprinter import assets
+
+
+class Command(BaseCommand):
+    help = "bundle the icons used by the templates into the SVG sprite"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="exit non-zero if the sprite is outdated instead of writing it",
+        )
+
+    def handle(self, *args, **options):
+        path = assets.STATIC_DIR / assets.SPRITE
+        sprite = assets.build_sprite()
+        current = path.read_text() if path.exists() else None
+        if options["check"]:
+            if sprite != current:
+                raise CommandError(
+                    f"{assets.SPRITE} is outdated, run manage.py buildsprite"
+                )
+            return
+        path.write_text(sprite)
+        self.stdout.write(f"wrote {len(assets.used_icons())} icons to {path}")
@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from crowdprinter import builds
+
+
+class Command(BaseCommand):
+    help = "render and slice queued print jobs with a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="number of build steps running in parallel",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit when the queue is empty instead of waiting for new jobs",
+        )
+        parser.add_argument("--poll-interval", type=float, default=1)
+
+    def log(self, step):
+        self.stdout.write(f"{step.job.slug}: {step.step} {step.status}")
+        if step.error:
+            self.stderr.write(step.error)
+
+    def handle(self, *args, **options):
+        # worker processes only run the external tools, don't let them
+        # inherit our database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["processes"]) as executor:
+            builds.run_worker(
+                executor,
+                options["processes"],
+                once=options["once"],
+                poll_interval=options["poll_interval"],
+                log=self.log,
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from crowdprinter import leases
+
+
+class Command(BaseCommand):
+    help = (
+        "end open print attempts older than CROWDPRINTER_ATTEMPT_LEASE_DAYS "
+        "and remind users of attempts about to expire, safe to run from cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=leases.BATCH_SIZE,
+            help="attempts updated per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if leases.get_lease() is None:
+            self.stdout.write("CROWDPRINTER_ATTEMPT_LEASE_DAYS is not set.")
+            return
+        expired = leases.expire_attempts(batch_size=options["batch_size"])
+        reminded = leases.send_reminders(batch_size=options["batch_size"])
+        self.stdout.write(f"expired {expired} attempts, sent {reminded} reminders.")
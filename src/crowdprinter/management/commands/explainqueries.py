@@ -0,0 +1,112 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import transaction
+
+from crowdprinter import loadgen
+from crowdprinter.models import BuildState
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+PREFIX = "explain"
+
+
+def hot_queries(user, job):
+    """
+    The queries run for most requests, each with the index its plan should
+    use.
+    """
+    cutoff = datetime.date.today() - datetime.timedelta(days=7)
+    return [
+        (
+            "open attempts of a user",
+            PrintAttempt.objects.filter(user=user, ended__isnull=True),
+            "attempt_user_ended_idx",
+        ),
+        (
+            "my prints",
+            PrintAttempt.objects.filter(user=user).order_by("ended"),
+            "attempt_user_ended_idx",
+        ),
+        ("open attempts of a job", job.running_attempts, "attempt_job_open_idx"),
+        (
+            "finished attempts of a job",
+            job.attempts.filter(finished=True),
+            "attempt_job_finished_idx",
+        ),
+        (
+            "progress",
+            PrintAttempt.objects.filter(finished=True, job__public=True),
+            "attempt_job_finished_idx",
+        ),
+        (
+            "job list",
+            PrintJob.objects.filter(
+                public=True, can_attempt=True, build_state=BuildState.READY
+            ).order_by("priority"),
+            "printjob_listed_idx",
+        ),
+        (
+            "expired attempts",
+            PrintAttempt.objects.filter(ended__isnull=True, started__lt=cutoff),
+            "attempt_open_started_idx",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "show the query plans of the hot attempt and job queries, on generated "
+        "data which is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=10000)
+        parser.add_argument("--attempts", type=int, default=100000)
+        parser.add_argument(
+            "--existing",
+            action="store_true",
+            help="explain against the existing data instead of generating some",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="exit non-zero if a query doesn't use its index",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if not options["existing"]:
+                    loadgen.generate(
+                        options["jobs"],
+                        max(1, options["attempts"] // 100),
+                        options["attempts"],
+                        prefix=PREFIX,
+                    )
+                # the planners only prefer indexes once they know the table sizes
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                missing = self.explain()
+                transaction.set_rollback(True)
+        finally:
+            loadgen.remove_files(PREFIX)
+        if options["check"] and missing:
+            raise CommandError(f"Queries not using their index: {', '.join(missing)}")
+
+    def explain(self):
+        attempt = PrintAttempt.objects.select_related("user", "job").first()
+        if attempt is None:
+            raise CommandError("There are no attempts to explain queries for.")
+        missing = []
+        for name, queryset, index in hot_queries(attempt.user, attempt.job):
+            plan = queryset.explain()
+            used = index in plan
+            if not used:
+                missing.append(name)
+            self.stdout.write(f"{name}: {'uses' if used else 'MISSING'} {index}")
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+        return missing
@@ -0,0 +1,171 @@
+import csv
+import glob
+import json
+import os.path
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db import transaction
+from django.utils.text import slugify
+
+import crowdprinter.models as models
+from crowdprinter import builds
+from crowdprinter import caching
+
+
+class Command(BaseCommand):
+    help = (
+        "add many jobs at once from a directory or glob of STL files, or from a "
+        "CSV/JSON manifest with the columns slug, priority, count_needed, "
+        "color_changes, text and stl. Jobs which already exist are skipped, and "
+        "the steps an interrupted build left running are queued again, so an "
+        "interrupted import can simply be run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source", help="directory, glob pattern, or .csv/.json manifest"
+        )
+        parser.add_argument("--priority", type=int, default=100)
+        parser.add_argument("--count-needed", type=int, default=1)
+        parser.add_argument("--public", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="number of build steps running in parallel",
+        )
+        parser.add_argument(
+            "--no-build",
+            action="store_true",
+            help="only queue the jobs, leave building them to `manage.py buildworker`",
+        )
+
+    def read_manifest(self, path):
+        base = os.path.dirname(path)
+        with open(path, newline="") as f:
+            if path.endswith(".json"):
+                rows = json.load(f)
+            else:
+                rows = list(csv.DictReader(f))
+        for row in rows:
+            stl = row.get("stl")
+            if stl:
+                row["stl"] = os.path.join(base, stl)
+            if not row.get("slug"):
+                if not stl:
+                    raise CommandError(f"manifest row without slug or stl: {row}")
+                row["slug"] = os.path.splitext(os.path.basename(stl))[0]
+            yield row
+
+    def read_source(self, source):
+        if os.path.isfile(source) and source.endswith((".csv", ".json")):
+            yield from self.read_manifest(source)
+            return
+        if os.path.isdir(source):
+            source = os.path.join(source, "*.stl")
+        for path in sorted(glob.glob(source)):
+            yield {
+                "slug": os.path.splitext(os.path.basename(path))[0],
+                "stl": path,
+            }
+
+    def make_job(self, row, options):
+        slug = slugify(row["slug"])
+        try:
+            job = models.PrintJob(
+                slug=slug,
+                priority=int(row.get("priority") or options["priority"]),
+                count_needed=int(row.get("count_needed") or options["count_needed"]),
+                public=options["public"],
+                color_changes=row.get("color_changes") or "",
+                build_state=models.BuildState.BUILDING,
+            )
+            # bulk_create doesn't validate, the existing slugs are skipped
+            job.full_clean(
+                exclude=["file_stl", "file_render"],
+                validate_unique=False,
+                validate_constraints=False,
+            )
+        except (ValueError, ValidationError) as e:
+            raise CommandError(f"invalid manifest row {row}: {e}")
+        text = row.get("text") or None
+        if text is None:
+            if not row.get("stl"):
+                raise CommandError(f"job {slug} has neither text nor stl.")
+            with open(row["stl"], "rb") as f:
+                job.file_stl = default_storage.save(f"{slug}.stl", File(f))
+        return job, text
+
+    def import_batch(self, rows, options):
+        slugs = {slugify(row["slug"]) for row in rows}
+        existing = set(
+            models.PrintJob.objects.filter(slug__in=slugs).values_list(
+                "slug", flat=True
+            )
+        )
+        jobs, steps = [], []
+        for row in rows:
+            if slugify(row["slug"]) in existing:
+                continue
+            job, text = self.make_job(row, options)
+            existing.add(job.slug)
+            jobs.append(job)
+            steps += builds.make_steps(job, text)
+        with transaction.atomic():
+            models.PrintJob.objects.bulk_create(jobs)
+            models.BuildStep.objects.bulk_create(steps)
+        # bulk_create sends no signals
+        caching.invalidate_jobs()
+        if not options["no_build"]:
+            # left running by an interrupted import, the worker would only
+            # claim them again after CROWDPRINTER_BUILD_TIMEOUT
+            models.BuildStep.objects.filter(
+                job__in=slugs, status=models.BuildStep.Status.RUNNING
+            ).update(status=models.BuildStep.Status.QUEUED, started=None)
+        return len(jobs), len(rows) - len(jobs)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        imported = skipped = 0
+        batch = []
+        for row in self.read_source(options["source"]):
+            batch.append(row)
+            if len(batch) == options["batch_size"]:
+                counts = self.import_batch(batch, options)
+                imported, skipped = imported + counts[0], skipped + counts[1]
+                batch = []
+        if batch:
+            counts = self.import_batch(batch, options)
+            imported, skipped = imported + counts[0], skipped + counts[1]
+        self.stdout.write(f"queued {imported} jobs, skipped {skipped} existing.")
+
+        if options["no_build"]:
+            return
+
+        built = 0
+
+        def log(step):
+            nonlocal built
+            if step.status == models.BuildStep.Status.FAILED:
+                self.stderr.write(f"{step.job.slug}: {step.step} failed")
+                self.stderr.write(step.error)
+            elif step.step == models.BuildStep.Step.GCODE and step.status == "done":
+                built += 1
+
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["processes"]) as executor:
+            builds.run_worker(executor, options["processes"], once=True, log=log)
+
+        minutes = (time.monotonic() - start) / 60
+        self.stdout.write(
+            f"built {built} parts in {minutes:.1f} min, "
+            f"{built / max(minutes, 1 / 60):.1f} parts/min."
+        )
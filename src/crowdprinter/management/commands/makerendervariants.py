@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+import crowdprinter.models as models
+from crowdprinter import renders
+
+
+class Command(BaseCommand):
+    help = "create the scaled and converted variants of existing job renders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="also recreate variants of jobs which already have them",
+        )
+        parser.add_argument("--processes", type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        jobs = models.PrintJob.objects.exclude(file_render="").exclude(
+            file_render__isnull=True
+        )
+        if not options["all"]:
+            jobs = jobs.filter(render_variants=False)
+        jobs = list(jobs.only("slug", "file_render"))
+
+        connections.close_all()
+        done = 0
+        with ProcessPoolExecutor(max_workers=options["processes"]) as executor:
+            futures = {
+                executor.submit(renders.make_variants, job.file_render.path): job
+                for job in jobs
+            }
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    outputs = future.result()
+                except Exception as e:
+                    self.stderr.write(f"{job.slug}: {e}")
+                    continue
+                try:
+                    renders.save_variants(job, outputs)
+                finally:
+                    for _, path in outputs:
+                        os.unlink(path)
+                done += 1
+        self.stdout.write(f"created render variants of {done}/{len(jobs)} jobs.")
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import models
+from django.db import transaction
+
+import crowdprinter.models as crowdprinter_models
+from crowdprinter import caching
+
+
+class Command(BaseCommand):
+    help = "rebuild the attempt counters stored on each print job"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="only report jobs whose counters drifted, exit non-zero if any",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = list(
+                crowdprinter_models.PrintJob.objects.with_live_counts()
+                .filter(
+                    ~models.Q(finished_count=models.F("live_finished_count"))
+                    | ~models.Q(
+                        running_or_finished_count=models.F(
+                            "live_running_or_finished_count"
+                        )
+                    )
+                )
+                .values_list(
+                    "slug",
+                    "finished_count",
+                    "live_finished_count",
+                    "running_or_finished_count",
+                    "live_running_or_finished_count",
+                )
+            )
+            for slug, finished, live_finished, running, live_running in drifted:
+                self.stdout.write(
+                    f"{slug}: finished {finished} -> {live_finished}, "
+                    f"running or finished {running} -> {live_running}"
+                )
+
+            if options["check"]:
+                if drifted:
+                    raise CommandError(f"{len(drifted)} jobs have drifted counters.")
+                return
+
+            count = crowdprinter_models.PrintJob.objects.update_counters()
+            caching.invalidate_attempts(*[slug for slug, *_ in drifted])
+            self.stdout.write(f"recounted {count} jobs, {len(drifted)} had drifted.")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+import crowdprinter.models as models
+from crowdprinter import builds
+
+
+class Command(BaseCommand):
+    help = (
+        "queue slicing for all jobs which have no gcode for a printer yet, or "
+        "whose gcode was sliced with an older profile of the printer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        jobs = models.PrintJob.objects.exclude(
+            Q(file_stl="") | Q(file_stl__isnull=True)
+        ).exclude(
+            # jobs which are already waiting for gcode get all printers anyway
+            build_steps__in=models.BuildStep.objects.filter(
+                step=builds.Step.GCODE,
+                status__in=[builds.Status.QUEUED, builds.Status.RUNNING],
+            )
+        )
+        printers_by_job = {}
+        for printer in models.Printer.objects.all():
+            outdated = jobs.exclude(
+                files__in=models.PrintJobFile.objects.filter(
+                    printer=printer, profile_hash=printer.profile_hash
+                )
+            ).only("slug", "size_x", "size_y", "size_z")
+            for job in outdated:
+                # jobs too large for the printer have no gcode for it on purpose
+                if printer.fits(job):
+                    printers_by_job.setdefault(job.slug, []).append(printer.slug)
+
+        for slug, printers in sorted(printers_by_job.items()):
+            self.stdout.write(f"{slug}: {', '.join(printers)}")
+        if options["dry_run"]:
+            return
+
+        models.BuildStep.objects.bulk_create(
+            models.BuildStep(
+                job_id=slug,
+                step=builds.Step.GCODE,
+                argument=",".join(printers),
+            )
+            for slug, printers in printers_by_job.items()
+        )
+        self.stdout.write(
+            f"queued slicing of {len(printers_by_job)} jobs, "
+            "run `manage.py buildworker` to process them."
+        )
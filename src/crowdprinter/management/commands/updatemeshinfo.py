@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+import crowdprinter.models as models
+from crowdprinter import builds
+
+
+class Command(BaseCommand):
+    help = (
+        "queue the mesh step for jobs with an STL file but without mesh info, "
+        "e.g. ones created before it existed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="also read the mesh info of jobs which already have it",
+        )
+
+    def handle(self, *args, **options):
+        jobs = models.PrintJob.objects.exclude(
+            Q(file_stl="") | Q(file_stl__isnull=True)
+        ).exclude(
+            build_steps__in=models.BuildStep.objects.filter(
+                step=builds.Step.MESH,
+                status__in=[builds.Status.QUEUED, builds.Status.RUNNING],
+            )
+        )
+        if not options["all"]:
+            jobs = jobs.filter(triangle_count__isnull=True)
+        steps = models.BuildStep.objects.bulk_create(
+            models.BuildStep(job_id=slug, step=builds.Step.MESH)
+            for slug in jobs.values_list("slug", flat=True)
+        )
+        self.stdout.write(
+            f"queued the mesh info of {len(steps)} jobs, "
+            "run `manage.py buildworker` to process them."
+        )
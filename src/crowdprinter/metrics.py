@@ -0,0 +1,127 @@
+import contextvars
+import logging
+import time
+import traceback
+
+from django.conf import settings
+from prometheus_client import Counter
+from prometheus_client import Histogram
+
+# the build worker runs in its own process, set PROMETHEUS_MULTIPROC_DIR for
+# it and the web server to see these on the metrics endpoint
+artifact_cache_requests = Counter(
+    "crowdprinter_artifact_cache_requests_total",
+    "Build steps served from the artifact cache (hit) or by running the tool (miss)",
+    ["step", "result"],
+)
+cache_requests = Counter(
+    "crowdprinter_cache_requests_total",
+    "Reads of cached pages and queries, see crowdprinter.caching",
+    ["cache", "result"],
+)
+tool_duration = Histogram(
+    "crowdprinter_tool_duration_seconds",
+    "Runs of openscad, prusa-slicer and the mesh analysis, without cache hits",
+    ["step", "printer"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, float("inf")),
+)
+claims = Counter(
+    "crowdprinter_claims_total",
+    "Attempts to take a job, rejected if it was taken or the user can't take more",
+    ["result"],
+)
+claim_duration = Histogram(
+    "crowdprinter_claim_duration_seconds",
+    "Checking and reserving a job, including waiting for concurrent claims",
+)
+aggregation_duration = Histogram(
+    "crowdprinter_aggregation_duration_seconds",
+    "Aggregations over all attempts, like the progress and the job counters",
+    ["aggregation"],
+)
+view_queries = Histogram(
+    "crowdprinter_view_queries",
+    "Database queries per request",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float("inf")),
+)
+view_db_duration = Histogram(
+    "crowdprinter_view_db_duration_seconds",
+    "Time spent in database queries per request",
+    ["view"],
+)
+slow_queries = Counter(
+    "crowdprinter_slow_queries_total",
+    "Queries slower than CROWDPRINTER_SLOW_QUERY_SECONDS",
+)
+
+slow_query_log = logging.getLogger("crowdprinter.slow_queries")
+# the queries of the request being handled, see QueryMetricsMiddleware
+request_queries = contextvars.ContextVar("request_queries", default=None)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def instrument_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper installed on every connection, see signals.py.
+    Adds the query to the stats of the current request and logs it if it
+    was slow.
+    """
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        stats = request_queries.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += duration
+        threshold = settings.CROWDPRINTER_SLOW_QUERY_SECONDS
+        if threshold is not None and duration >= threshold:
+            log_slow_query(sql, params, duration)
+
+
+def log_slow_query(sql, params, duration):
+    slow_queries.inc()
+    # only our own frames, the ones of django and this module don't tell much
+    frames = [
+        frame
+        for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(str(settings.BASE_DIR))
+        and "site-packages" not in frame.filename
+    ]
+    slow_query_log.warning(
+        "slow query (%.3f s): %s\nparams: %r\n%s",
+        duration,
+        sql,
+        params,
+        "".join(traceback.format_list(frames)),
+    )
+
+
+class QueryMetricsMiddleware:
+    """
+    Observe the number of queries and the database time of each request,
+    labelled by view name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        token = request_queries.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_queries.reset(token)
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<unresolved>"
+        view_queries.labels(view=view).observe(stats.count)
+        view_db_duration.labels(view=view).observe(stats.duration)
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-17 23:48
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    PrintJob = apps.get_model("crowdprinter", "PrintJob")
+    PrintAttempt = apps.get_model("crowdprinter", "PrintAttempt")
+
+    attempts = (
+        PrintAttempt.objects.filter(job=models.OuterRef("pk")).order_by().values("job")
+    )
+
+    def count(qs):
+        return Coalesce(
+            models.Subquery(qs.annotate(c=models.Count("pk")).values("c")), 0
+        )
+
+    PrintJob.objects.update(
+        finished_count=count(attempts.filter(finished=True)),
+        running_or_finished_count=count(
+            attempts.filter(models.Q(ended__isnull=True) | models.Q(finished=True))
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0004_printjob_comment_printjob_internal_comment_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printjob",
+            name="running_or_finished_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="finished_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="can_attempt",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Q(
+                    ("running_or_finished_count__lt", models.F("count_needed"))
+                ),
+                output_field=models.BooleanField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="finished",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Q(("finished_count__gte", models.F("count_needed"))),
+                output_field=models.BooleanField(),
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-17 23:50
+
+import crowdprinter.models
+from django.db import migrations, models
+
+
+def shuffle_existing_jobs(apps, schema_editor):
+    # AddField gives every existing row the same default
+    PrintJob = apps.get_model("crowdprinter", "PrintJob")
+    jobs = list(PrintJob.objects.only("pk"))
+    for job in jobs:
+        job.shuffle_key = crowdprinter.models.random_shuffle_key()
+    PrintJob.objects.bulk_update(jobs, ["shuffle_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0005_printjob_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printjob",
+            name="shuffle_key",
+            field=models.BigIntegerField(
+                default=crowdprinter.models.random_shuffle_key, editable=False
+            ),
+        ),
+        migrations.RunPython(shuffle_existing_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.4 on 2026-10-17 23:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0006_printjob_shuffle_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printjob",
+            name="build_state",
+            field=models.CharField(
+                choices=[
+                    ("building", "Building"),
+                    ("failed", "Failed"),
+                    ("ready", "Ready"),
+                ],
+                default="ready",
+                help_text="Nur fertig gebaute Jobs werden angezeigt, siehe `manage.py buildworker`.",
+                max_length=16,
+            ),
+        ),
+        migrations.CreateModel(
+            name="BuildStep",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "step",
+                    models.CharField(
+                        choices=[
+                            ("stl", "Stl"),
+                            ("render", "Render"),
+                            ("gcode", "Gcode"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=16,
+                    ),
+                ),
+                ("argument", models.TextField(blank=True, default="")),
+                ("tries", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True, default="")),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("started", models.DateTimeField(blank=True, null=True)),
+                ("ended", models.DateTimeField(blank=True, null=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="build_steps",
+                        to="crowdprinter.printjob",
+                    ),
+                ),
+            ],
+        ),
+    ]
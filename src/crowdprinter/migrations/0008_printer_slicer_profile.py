@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-17 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0007_buildstep"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printer",
+            name="profile_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="printer",
+            name="slicer_profile",
+            field=models.FileField(
+                blank=True,
+                help_text="PrusaSlicer Konfiguration (.ini), mit der für diesen Drucker gesliced wird.",
+                null=True,
+                upload_to="printers/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="printjobfile",
+            name="profile_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0008_printer_slicer_profile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printjob",
+            name="render_variants",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
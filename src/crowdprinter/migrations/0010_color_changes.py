@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:11
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0009_printjob_render_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printer",
+            name="color_changes",
+            field=models.CharField(
+                blank=True,
+                default="2.15",
+                help_text="Schichthöhen in mm, kommagetrennt, nach denen das Filament gewechselt wird. Leer für keinen Wechsel.",
+                max_length=255,
+                validators=[
+                    django.core.validators.RegexValidator(
+                        "^\\d+(\\.\\d+)?(,\\d+(\\.\\d+)?)*$",
+                        "Kommagetrennte Schichthöhen in mm, z.B. 2.15,4.35",
+                    )
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="color_changes",
+            field=models.CharField(
+                blank=True,
+                help_text="Schichthöhen in mm für den Filamentwechsel, kommagetrennt. Leer für die Einstellung des Druckers, 0 für keinen Wechsel.",
+                max_length=255,
+                validators=[
+                    django.core.validators.RegexValidator(
+                        "^\\d+(\\.\\d+)?(,\\d+(\\.\\d+)?)*$",
+                        "Kommagetrennte Schichthöhen in mm, z.B. 2.15,4.35",
+                    )
+                ],
+            ),
+        ),
+    ]
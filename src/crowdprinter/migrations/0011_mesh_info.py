@@ -0,0 +1,71 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0010_color_changes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printjob",
+            name="filament_g",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="print_time",
+            field=models.PositiveIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="size_x",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="size_y",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="size_z",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="triangle_count",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="volume",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjobfile",
+            name="filament_g",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjobfile",
+            name="print_time",
+            field=models.PositiveIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="buildstep",
+            name="step",
+            field=models.CharField(
+                choices=[
+                    ("stl", "Stl"),
+                    ("mesh", "Mesh"),
+                    ("render", "Render"),
+                    ("gcode", "Gcode"),
+                ],
+                max_length=16,
+            ),
+        ),
+    ]
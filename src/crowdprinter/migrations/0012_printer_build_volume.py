@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0011_mesh_info"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printer",
+            name="build_x",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Bauraum in mm, leer für unbegrenzt.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="printer",
+            name="build_y",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="printer",
+            name="build_z",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="printjob",
+            name="unfit_printers",
+            field=models.ManyToManyField(
+                blank=True,
+                editable=False,
+                related_name="unfit_jobs",
+                to="crowdprinter.printer",
+            ),
+        ),
+    ]
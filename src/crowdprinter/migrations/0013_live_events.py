@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0012_printer_build_volume"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LiveEvent",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("progress", "Progress"), ("job", "Job")],
+                        max_length=16,
+                    ),
+                ),
+                ("data", models.JSONField()),
+                ("created", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0013_live_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="printattempt",
+            name="expired",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="printattempt",
+            name="reminded",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="printattempt",
+            index=models.Index(
+                condition=models.Q(("ended__isnull", True)),
+                fields=["started"],
+                name="attempt_open_started_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crowdprinter", "0014_attempt_leases"),
+    ]
+
+    operations = [
+        # the new indexes replace the ones of the foreign keys
+        migrations.AddIndex(
+            model_name="printattempt",
+            index=models.Index(fields=["user", "ended"], name="attempt_user_ended_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="printattempt",
+            index=models.Index(
+                fields=["job", "finished"], name="attempt_job_finished_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="printattempt",
+            index=models.Index(
+                condition=models.Q(("ended__isnull", True)),
+                fields=["job"],
+                name="attempt_job_open_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="printjob",
+            index=models.Index(
+                condition=models.Q(
+                    ("build_state", "ready"), ("can_attempt", True), ("public", True)
+                ),
+                fields=["priority"],
+                name="printjob_listed_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="printattempt",
+            name="job",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attempts",
+                to="crowdprinter.printjob",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="printattempt",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
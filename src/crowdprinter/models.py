@@ -1,40 +1,152 @@
+import datetime
+import hashlib
+import random
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import RegexValidator
 from django.db import models
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import LessThan
+
+from . import metrics
+
+validate_color_changes = RegexValidator(
+    r"^\d+(\.\d+)?(,\d+(\.\d+)?)*$",
+    "Kommagetrennte Schichthöhen in mm, z.B. 2.15,4.35",
+)
 
 
 class Printer(models.Model):
     slug = models.SlugField(primary_key=True)
     name = models.CharField(max_length=64)
+    slicer_profile = models.FileField(
+        upload_to="printers/",
+        null=True,
+        blank=True,
+        help_text="PrusaSlicer Konfiguration (.ini), mit der für diesen Drucker gesliced wird.",
+    )
+    # changes whenever the profile does, see `manage.py reslice`
+    profile_hash = models.CharField(max_length=64, blank=True, editable=False)
+    color_changes = models.CharField(
+        max_length=255,
+        blank=True,
+        default="2.15",
+        validators=[validate_color_changes],
+        help_text="Schichthöhen in mm, kommagetrennt, nach denen das Filament gewechselt wird. Leer für keinen Wechsel.",
+    )
+    build_x = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Bauraum in mm, leer für unbegrenzt."
+    )
+    build_y = models.PositiveIntegerField(null=True, blank=True)
+    build_z = models.PositiveIntegerField(null=True, blank=True)
+
+    def compute_profile_hash(self):
+        if not self.slicer_profile:
+            return ""
+        digest = hashlib.sha256()
+        # an uploaded file must stay open until it is saved
+        self.slicer_profile.open("rb")
+        for chunk in self.slicer_profile.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def fits(self, job):
+        """
+        Whether the bounding box of `job` fits into the build volume, turned
+        by 90° around the Z axis if needed. Parts are never tipped over, and
+        parts of unknown size always fit.
+        """
+        if job.size_x is None:
+            return True
+
+        def within(size, limit):
+            return limit is None or size <= limit
+
+        if not within(job.size_z, self.build_z):
+            return False
+        return any(
+            within(x, self.build_x) and within(y, self.build_y)
+            for x, y in [(job.size_x, job.size_y), (job.size_y, job.size_x)]
+        )
+
+    def save(self, *args, **kwargs):
+        self.profile_hash = self.compute_profile_hash()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Printer {self.slug} ({self.name})"
 
 
+# shuffle keys are taken modulo this prime, so that multiplying them with a
+# seed gives a different permutation of the jobs for every seed
+SHUFFLE_MODULUS = 2**31 - 1
+
+
+def random_shuffle_key():
+    return random.randrange(SHUFFLE_MODULUS)
+
+
+def count_subquery(qs):
+    """
+    Count the rows of `qs`, which has to be grouped by `.values()` to at
+    most one group, as a subquery expression.
+    """
+    return Coalesce(
+        models.Subquery(qs.annotate(c=models.Count("pk")).values("c")),
+        0,
+    )
+
+
 class PrintJobQuerySet(models.QuerySet):
-    def with_finished(self):
+    def with_live_counts(self):
+        """
+        Count the attempts of each job from scratch. The result should
+        always match the stored counters, see `update_counters`.
+        """
         return self.annotate(
-            finished_count=models.Count(
+            live_finished_count=models.Count(
                 "attempts", filter=models.Q(attempts__finished=True)
             ),
-            finished=models.Q(finished_count__gte=models.F("count_needed")),
-            running_or_finished_count=models.Count(
+            live_running_or_finished_count=models.Count(
                 "attempts",
                 filter=(
                     models.Q(attempts__ended__isnull=True)
                     | models.Q(attempts__finished=True)
                 ),
             ),
-            can_attempt=models.Q(
-                running_or_finished_count__lt=models.F("count_needed")
+        )
+
+    def shuffled(self, seed):
+        multiplier = random.Random(seed).randrange(1, SHUFFLE_MODULUS)
+        return self.annotate(
+            shuffle=models.ExpressionWrapper(
+                models.F("shuffle_key") * multiplier % SHUFFLE_MODULUS,
+                output_field=models.BigIntegerField(),
+            )
+        )
+
+    @metrics.aggregation_duration.labels(aggregation="counters").time()
+    def update_counters(self):
+        attempts = (
+            PrintAttempt.objects.filter(job=models.OuterRef("pk"))
+            .order_by()
+            .values("job")
+        )
+        return self.update(
+            finished_count=count_subquery(attempts.filter(finished=True)),
+            running_or_finished_count=count_subquery(
+                attempts.filter(models.Q(ended__isnull=True) | models.Q(finished=True))
             ),
         )
 
 
-class PrintJobManager(models.Manager):
-    def get_queryset(self):
-        return PrintJobQuerySet(self.model, using=self._db).with_finished()
+class BuildState(models.TextChoices):
+    BUILDING = "building"
+    FAILED = "failed"
+    READY = "ready"
 
 
 class PrintJob(models.Model):
@@ -48,17 +160,71 @@ class PrintJob(models.Model):
     count_needed = models.PositiveIntegerField(default=1)
     public = models.BooleanField(
         default=False,
-        help_text="Auf der Startseite anzeigen, mit dem Link wird es immer angezeigt.")
+        help_text="Auf der Startseite anzeigen, mit dem Link wird es immer angezeigt.",
+    )
     comment = models.TextField(
-        default='',
-        blank=True,
-        help_text="Öffentlicher Kommentar")
+        default="", blank=True, help_text="Öffentlicher Kommentar"
+    )
     internal_comment = models.TextField(
-        default='',
+        default="", blank=True, help_text="Interner Kommentar"
+    )
+    color_changes = models.CharField(
+        max_length=255,
         blank=True,
-        help_text="Interner Kommentar")
+        validators=[validate_color_changes],
+        help_text="Schichthöhen in mm für den Filamentwechsel, kommagetrennt. Leer für die Einstellung des Druckers, 0 für keinen Wechsel.",
+    )
+    shuffle_key = models.BigIntegerField(default=random_shuffle_key, editable=False)
+    # scaled and converted copies of file_render, see crowdprinter.renders
+    render_variants = models.BooleanField(default=False, editable=False)
+    # read from the STL by the mesh build step, in mm and mm³
+    triangle_count = models.PositiveIntegerField(null=True, editable=False)
+    size_x = models.FloatField(null=True, editable=False)
+    size_y = models.FloatField(null=True, editable=False)
+    size_z = models.FloatField(null=True, editable=False)
+    volume = models.FloatField(null=True, editable=False, db_index=True)
+    # in g and s, estimated from the volume until the slicer's estimate is known
+    filament_g = models.FloatField(null=True, editable=False)
+    print_time = models.PositiveIntegerField(null=True, editable=False, db_index=True)
+    # printers the part is too large for, recorded by the gcode build step
+    unfit_printers = models.ManyToManyField(
+        Printer, blank=True, editable=False, related_name="unfit_jobs"
+    )
+    build_state = models.CharField(
+        max_length=16,
+        choices=BuildState,
+        default=BuildState.READY,
+        help_text="Nur fertig gebaute Jobs werden angezeigt, siehe `manage.py buildworker`.",
+    )
+
+    # maintained by crowdprinter.signals, rebuild with `manage.py recountjobs`
+    finished_count = models.PositiveIntegerField(default=0, editable=False)
+    running_or_finished_count = models.PositiveIntegerField(default=0, editable=False)
+    finished = models.GeneratedField(
+        expression=models.Q(finished_count__gte=models.F("count_needed")),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+    can_attempt = models.GeneratedField(
+        expression=models.Q(running_or_finished_count__lt=models.F("count_needed")),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
 
-    objects = PrintJobManager()
+    objects = PrintJobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # the jobs shown in the list, a small part of all jobs once the
+            # event is running
+            models.Index(
+                fields=["priority"],
+                condition=models.Q(
+                    public=True, can_attempt=True, build_state=BuildState.READY
+                ),
+                name="printjob_listed_idx",
+            ),
+        ]
 
     @property
     def running_attempts(self):
@@ -70,8 +236,50 @@ class PrintJob(models.Model):
         users = get_user_model().objects.filter(pk__in=user_ids)
         return users
 
+    @transaction.atomic
+    def claim(self, user):
+        """
+        Create an attempt of `user` on this job, if it still needs prints
+        and the user may take another one. Checking and reserving is a
+        single conditional UPDATE of the job row, so concurrent claims can't
+        take more than `count_needed`.
+
+        Returns the new attempt, or None if the job can't be claimed.
+        """
+        with metrics.claim_duration.time():
+            # serializes concurrent claims of the same user on different jobs
+            User.objects.select_for_update().filter(pk=user.pk).first()
+
+            open_attempts = PrintAttempt.objects.filter(user=user, ended__isnull=True)
+            claimable = PrintJob.objects.filter(
+                ~models.Exists(open_attempts.filter(job=models.OuterRef("pk"))),
+                pk=self.pk,
+                can_attempt=True,
+                build_state=BuildState.READY,
+            )
+            max_attempts = user.get_max_attempts()
+            if max_attempts:
+                claimable = claimable.filter(
+                    LessThan(
+                        count_subquery(open_attempts.order_by().values("user")),
+                        max_attempts,
+                    )
+                )
+            if not claimable.update(
+                running_or_finished_count=models.F("running_or_finished_count") + 1
+            ):
+                metrics.claims.labels(result="rejected").inc()
+                return None
+            metrics.claims.labels(result="accepted").inc()
+            return PrintAttempt.objects.create(job=self, user=user)
+
+    def get_color_changes(self, printer):
+        if self.color_changes == "0":
+            return ""
+        return self.color_changes or printer.color_changes
+
     def get_user_attempt(self, user):
-        return self.running_attempts.filter(user=user).get()
+        return self.running_attempts.filter(user=user).first()
 
     def __str__(self):
         return f"{self.slug}"
@@ -82,21 +290,120 @@ class PrintJobFile(models.Model):
     file_gcode = models.FileField()
     job = models.ForeignKey(PrintJob, models.CASCADE, related_name="files")
     printer = models.ForeignKey(Printer, models.PROTECT)
+    profile_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # estimates of the slicer, in g and s
+    filament_g = models.FloatField(null=True, editable=False)
+    print_time = models.PositiveIntegerField(null=True, editable=False, db_index=True)
+
+
+class BuildStep(models.Model):
+    class Step(models.TextChoices):
+        STL = "stl"
+        MESH = "mesh"
+        RENDER = "render"
+        GCODE = "gcode"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    job = models.ForeignKey(
+        PrintJob, on_delete=models.CASCADE, related_name="build_steps"
+    )
+    step = models.CharField(max_length=16, choices=Step)
+    status = models.CharField(max_length=16, choices=Status, default=Status.QUEUED)
+    # input of the step which is not stored on the job, e.g. the text of a sign
+    # or the printers to slice for (all if empty)
+    argument = models.TextField(default="", blank=True)
+    tries = models.PositiveIntegerField(default=0)
+    error = models.TextField(default="", blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    ended = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Build step {self.step} of {self.job}: {self.status}"
 
 
 class PrintAttempt(models.Model):
+    # indexed together with other fields, see Meta
     job = models.ForeignKey(
-        "PrintJob", on_delete=models.CASCADE, related_name="attempts"
+        "PrintJob", on_delete=models.CASCADE, related_name="attempts", db_index=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False
     )
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     started = models.DateField(auto_now_add=True)
     ended = models.DateField(null=True, blank=True)
     finished = models.BooleanField(default=False)
     dropped_off = models.BooleanField(default=False)
+    # set by the expireattempts command
+    reminded = models.DateField(null=True, blank=True, editable=False)
+    expired = models.BooleanField(default=False, editable=False)
+
+    _loaded_job_id = None
+
+    class Meta:
+        indexes = [
+            # open attempts of a user, and all of them ordered for "my prints"
+            models.Index(fields=["user", "ended"], name="attempt_user_ended_idx"),
+            # finished attempts of a job, for its counters and the progress
+            models.Index(fields=["job", "finished"], name="attempt_job_finished_idx"),
+            # open attempts of a job
+            models.Index(
+                fields=["job"],
+                condition=models.Q(ended__isnull=True),
+                name="attempt_job_open_idx",
+            ),
+            # the expireattempts command looks for old open attempts
+            models.Index(
+                fields=["started"],
+                condition=models.Q(ended__isnull=True),
+                name="attempt_open_started_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_job_id = instance.__dict__.get("job_id")
+        return instance
 
     def __str__(self):
         return f"Print Attempt at {self.job}: user={self.user}, ended={self.ended}"
 
+    @property
+    def expires(self):
+        """
+        Last day of an open attempt before it is ended by the expireattempts
+        command, None if it doesn't expire.
+        """
+        lease = settings.CROWDPRINTER_ATTEMPT_LEASE_DAYS
+        if lease is None or self.ended is not None:
+            return None
+        return self.started + datetime.timedelta(days=lease)
+
+
+class LiveEvent(models.Model):
+    """
+    A change pushed to the browsers by crowdprinter.live. The table carries
+    the events from the processes handling requests to the ones serving the
+    event streams, they are deleted after CROWDPRINTER_LIVE_EVENT_RETENTION.
+    """
+
+    class Kind(models.TextChoices):
+        PROGRESS = "progress"
+        JOB = "job"
+
+    kind = models.CharField(max_length=16, choices=Kind)
+    data = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Live event {self.pk}: {self.kind}"
+
 
 class User(AbstractUser):
     max_attempts = models.IntegerField(
@@ -104,14 +411,23 @@ class User(AbstractUser):
         blank=True,
         help_text=f"Maximale anzahl gleichzeitiger Drucke. 0 für unbegrenzt, leer = Default({settings.CROWDPRINTER_DEFAULT_MAX_ATTEMPTS})",
     )
-    allow_messages_during_event_from_humans = models.BooleanField(null=True,
-                                                     default=None,
-                                                     help_text="Das c3tactile Team darf dich *während* dem Event kontaktieren")
-
-    allow_messages_after_event_from_humans = models.BooleanField(null=True,
-                                                     default=None,
-                                                     help_text="Das c3tactile Team darf dich per E-Mail für über zukünftige Events informieren")
+    allow_messages_during_event_from_humans = models.BooleanField(
+        null=True,
+        default=None,
+        help_text="Das c3tactile Team darf dich *während* dem Event kontaktieren",
+    )
 
+    allow_messages_after_event_from_humans = models.BooleanField(
+        null=True,
+        default=None,
+        help_text="Das c3tactile Team darf dich per E-Mail für über zukünftige Events informieren",
+    )
 
     class Meta:
         db_table = "auth_user"
+
+    def get_max_attempts(self):
+        """Number of concurrent attempts allowed, 0 means unlimited."""
+        if self.max_attempts is None:
+            return settings.CROWDPRINTER_DEFAULT_MAX_ATTEMPTS
+        return self.max_attempts
@@ -0,0 +1,34 @@
+"""
+The progress of all public jobs, for the progress bar of the list and its
+live updates.
+"""
+
+import math
+
+from django.db.models import Sum
+
+from crowdprinter import caching
+from crowdprinter import metrics
+
+from .models import PrintAttempt
+from .models import PrintJob
+
+
+@metrics.aggregation_duration.labels(aggregation="progress").time()
+def compute_progress():
+    all_count = (
+        PrintJob.objects.filter(public=True).aggregate(Sum("count_needed"))[
+            "count_needed__sum"
+        ]
+        or 0
+    )
+    done_count = PrintAttempt.objects.filter(finished=True, job__public=True).count()
+    return {
+        "all_count": all_count,
+        "done_count": done_count,
+        "progress_percent": math.floor((done_count / max(1, all_count)) * 100),
+    }
+
+
+def get_progress():
+    return caching.get_or_set("progress", compute_progress, ["jobs", "attempts"])
@@ -0,0 +1,67 @@
+import io
+import os.path
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+# name -> width in pixels, "detail" is as large as the original render
+VARIANT_SIZES = {
+    "thumb": 320,
+    "detail": 800,
+}
+VARIANT_FORMATS = {
+    "avif": {"format": "AVIF", "quality": 60},
+    "webp": {"format": "WEBP", "quality": 80},
+    "png": {"format": "PNG", "optimize": True},
+}
+# the original render already is the PNG in detail size
+VARIANTS = [
+    f"{size}.{ext}"
+    for size in VARIANT_SIZES
+    for ext in VARIANT_FORMATS
+    if (size, ext) != ("detail", "png")
+]
+
+
+def variant_name(slug, variant):
+    return f"renders/{slug}/{variant}"
+
+
+def make_variants(path_png):
+    """
+    Scale and convert a render into all variants, without touching the
+    database, so this can run in a worker process. Returns a list of
+    (variant, path of the temporary file).
+    """
+    outputs = []
+    with Image.open(path_png) as image:
+        for variant in VARIANTS:
+            size, ext = variant.split(".")
+            scaled = image.copy()
+            scaled.thumbnail((VARIANT_SIZES[size], VARIANT_SIZES[size]))
+            buffer = io.BytesIO()
+            scaled.save(buffer, **VARIANT_FORMATS[ext])
+            with tempfile.NamedTemporaryFile(suffix=f".{ext}", delete=False) as f:
+                f.write(buffer.getvalue())
+            outputs.append((variant, f.name))
+    return outputs
+
+
+def save_variants(job, outputs):
+    for variant, path in outputs:
+        name = variant_name(job.slug, variant)
+        # keep the URL stable, renders are cached by browsers for a long time
+        default_storage.delete(name)
+        with open(path, "rb") as f:
+            default_storage.save(name, ContentFile(f.read()))
+    job.render_variants = True
+    job.save(update_fields=["render_variants"])
+
+
+def variant_path(slug, variant):
+    if variant not in VARIANTS:
+        return None
+    path = default_storage.path(variant_name(slug, variant))
+    return path if os.path.exists(path) else None
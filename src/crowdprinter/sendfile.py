@@ -0,0 +1,123 @@
+import mimetypes
+import os
+import re
+import urllib.parse
+
+from django.conf import settings
+from django.http import FileResponse
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+from django.utils.http import http_date
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """
+    Read at most `length` bytes of `file`, starting at its current position.
+    Keeps `fileno`, so WSGI servers can still use os.sendfile, which sends
+    as many bytes as the Content-Length says.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return the (start, end) of a single "bytes=" range, end inclusive, None
+    if the header can be ignored, or raise ValueError if nothing of the file
+    is in the range.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # multiple ranges and other units are allowed to be ignored
+        return None
+    start, end = match.groups()
+    if start == "":
+        start, end = max(0, size - int(end)), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def offload_response(path, as_attachment, filename):
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = HttpResponse(content_type=content_type)
+    response["Content-Disposition"] = content_disposition_header(
+        as_attachment, filename
+    )
+    if settings.CROWDPRINTER_SENDFILE == "x-accel-redirect":
+        relpath = os.path.relpath(path, settings.MEDIA_ROOT)
+        response["X-Accel-Redirect"] = urllib.parse.quote(
+            settings.CROWDPRINTER_SENDFILE_URL + relpath
+        )
+    else:
+        response["X-Sendfile"] = path
+    return response
+
+
+def serve_file(request, path, as_attachment, filename):
+    """
+    Let the front proxy send the file if configured, otherwise stream it
+    ourselves with support for conditional and range requests.
+    """
+    if settings.CROWDPRINTER_SENDFILE:
+        return offload_response(path, as_attachment, filename)
+
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is not None:
+        return response
+
+    byte_range = None
+    header = request.headers.get("Range")
+    if header and request.headers.get("If-Range", etag) in (
+        etag,
+        http_date(stat.st_mtime),
+    ):
+        try:
+            byte_range = parse_range(header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+    f = open(path, mode="rb")
+    if byte_range is None:
+        response = FileResponse(f, as_attachment=as_attachment, filename=filename)
+    else:
+        start, end = byte_range
+        f.seek(start)
+        response = FileResponse(
+            RangeFile(f, end - start + 1),
+            as_attachment=as_attachment,
+            filename=filename,
+            status=206,
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return response
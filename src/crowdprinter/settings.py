@@ -53,11 +53,80 @@ CROWDPRINTER_DEFAULT_MAX_ATTEMPTS = getattr(
     configuration, "CROWDPRINTER_DEFAULT_MAX_ATTEMPTS", 3
 )
 CROWDPRINTER_EXTERNAL_URL = getattr(configuration, "CROWDPRINTER_EXTERNAL_URL")
-
+# random jobs shown in header and footer are drawn from a pool of this many
+# jobs, which is rebuilt after the given number of seconds or when jobs change
+CROWDPRINTER_SAMPLE_POOL_SIZE = getattr(
+    configuration, "CROWDPRINTER_SAMPLE_POOL_SIZE", 500
+)
+CROWDPRINTER_SAMPLE_POOL_TIMEOUT = getattr(
+    configuration, "CROWDPRINTER_SAMPLE_POOL_TIMEOUT", 300
+)
+# the job list is shown in pages of this size, shuffled with one of a fixed
+# number of seeds per visitor, browsers may cache pages for some seconds
+CROWDPRINTER_LIST_PAGE_SIZE = getattr(configuration, "CROWDPRINTER_LIST_PAGE_SIZE", 48)
+CROWDPRINTER_SHUFFLE_SEEDS = getattr(configuration, "CROWDPRINTER_SHUFFLE_SEEDS", 32)
+CROWDPRINTER_LIST_CACHE_TIMEOUT = getattr(
+    configuration, "CROWDPRINTER_LIST_CACHE_TIMEOUT", 30
+)
+# the default cache is shared through files by all processes of one host, as
+# the build worker and cron commands invalidate what the web processes cached,
+# across hosts use a shared one like redis, see configuration_example.py
+CACHES = getattr(
+    configuration,
+    "CACHES",
+    {
+        "default": {
+            "BACKEND": "django_prometheus.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(BASE_DIR, "cache"),
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    },
+)
+# cached pages and queries are invalidated when their data changes, the
+# timeout only bounds how long unused entries are kept
+CROWDPRINTER_CACHE_TIMEOUT = getattr(
+    configuration, "CROWDPRINTER_CACHE_TIMEOUT", 24 * 3600
+)
+# live updates on /events: each ASGI process looks for new events this often
+# (in seconds) for all of its clients, idle streams get a keepalive comment,
+# events are kept long enough for reconnecting clients to catch up
+CROWDPRINTER_LIVE_POLL_INTERVAL = getattr(
+    configuration, "CROWDPRINTER_LIVE_POLL_INTERVAL", 1
+)
+CROWDPRINTER_LIVE_KEEPALIVE = getattr(configuration, "CROWDPRINTER_LIVE_KEEPALIVE", 15)
+CROWDPRINTER_LIVE_EVENT_RETENTION = getattr(
+    configuration, "CROWDPRINTER_LIVE_EVENT_RETENTION", 600
+)
+# open attempts are ended by the expireattempts command this many days after
+# they were started, None keeps them open until their users end them. Users
+# get a reminder the given number of days before.
+CROWDPRINTER_ATTEMPT_LEASE_DAYS = getattr(
+    configuration, "CROWDPRINTER_ATTEMPT_LEASE_DAYS", None
+)
+CROWDPRINTER_ATTEMPT_REMINDER_DAYS = getattr(
+    configuration, "CROWDPRINTER_ATTEMPT_REMINDER_DAYS", 1
+)
+# failed build steps are retried this often, steps running for longer than
+# the timeout (in seconds) are assumed to belong to a dead worker
+CROWDPRINTER_BUILD_RETRIES = getattr(configuration, "CROWDPRINTER_BUILD_RETRIES", 3)
+CROWDPRINTER_BUILD_TIMEOUT = getattr(configuration, "CROWDPRINTER_BUILD_TIMEOUT", 3600)
+# signs are built by openscad, or "native" to build the Braille-only ones in
+# milliseconds without openscad
+CROWDPRINTER_SIGN_GENERATOR = getattr(
+    configuration, "CROWDPRINTER_SIGN_GENERATOR", "openscad"
+)
+# queries taking at least this many seconds are logged with their stack to
+# the crowdprinter.slow_queries logger, None disables the log
+CROWDPRINTER_SLOW_QUERY_SECONDS = getattr(
+    configuration, "CROWDPRINTER_SLOW_QUERY_SECONDS", None
+)
+# columns and rows of the A4 sticker sheets the part labels are printed on
+CROWDPRINTER_LABEL_GRID = getattr(configuration, "CROWDPRINTER_LABEL_GRID", (3, 8))
 # Mail
 EMAIL_BACKEND = getattr(
     configuration, "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
 )
+DEFAULT_FROM_EMAIL = getattr(configuration, "DEFAULT_FROM_EMAIL", "webmaster@localhost")
 
 # allauth
 # https://django-allauth.readthedocs.io/en/latest/configuration.html
@@ -93,6 +162,31 @@ STATIC_ROOT = getattr(
     configuration, "STATIC_ROOT", os.path.join(BASE_DIR, "staticfiles")
 )
 MEDIA_ROOT = getattr(configuration, "MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
+# of the crowdprinter app only the static files the templates refer to are
+# collected and served, see crowdprinter/assets.py
+STATICFILES_FINDERS = [
+    "django.contrib.staticfiles.finders.FileSystemFinder",
+    "crowdprinter.assets.ReferencedAppDirectoriesFinder",
+]
+
+# outputs of openscad and prusa-slicer are cached by their inputs, up to this
+# many bytes, 0 disables the cache
+CROWDPRINTER_ARTIFACT_CACHE_DIR = getattr(
+    configuration,
+    "CROWDPRINTER_ARTIFACT_CACHE_DIR",
+    os.path.join(MEDIA_ROOT, "artifact-cache"),
+)
+CROWDPRINTER_ARTIFACT_CACHE_SIZE = getattr(
+    configuration, "CROWDPRINTER_ARTIFACT_CACHE_SIZE", 5 * 1024**3
+)
+
+# downloads can be handed to the front proxy: None to send them from python,
+# "x-accel-redirect" (nginx, MEDIA_ROOT mapped to an internal location at
+# CROWDPRINTER_SENDFILE_URL) or "x-sendfile" (apache, lighttpd)
+CROWDPRINTER_SENDFILE = getattr(configuration, "CROWDPRINTER_SENDFILE", None)
+CROWDPRINTER_SENDFILE_URL = getattr(
+    configuration, "CROWDPRINTER_SENDFILE_URL", "/protected-media/"
+)
 
 STORAGES = {
     "default": {
@@ -124,6 +218,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "crowdprinter.metrics.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -158,6 +253,7 @@ TEMPLATES = [
 
 SETTINGS_EXPORT = [
     "CROWDPRINTER_EXTERNAL_URL",
+    "CROWDPRINTER_ATTEMPT_LEASE_DAYS",
 ]
 
 
@@ -0,0 +1,43 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import caching
+from . import metrics
+from .models import PrintAttempt
+from .models import PrintJob
+
+
+@receiver(post_save, sender=PrintAttempt)
+@receiver(post_delete, sender=PrintAttempt)
+def update_job_counters(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # an attempt can be moved to another job in the admin, both jobs need
+    # their counters updated afterwards
+    job_ids = {instance.job_id, instance._loaded_job_id}
+    job_ids.discard(None)
+    PrintJob.objects.filter(pk__in=job_ids).update_counters()
+    instance._loaded_job_id = instance.job_id
+    caching.invalidate_attempts(*job_ids)
+
+
+@receiver(post_save, sender=PrintJob)
+@receiver(post_delete, sender=PrintJob)
+def invalidate_job_caches(sender, instance, **kwargs):
+    caching.invalidate_jobs(instance.slug)
+
+
+@receiver(post_save, sender=PrintJob)
+def refresh_job_counters(sender, instance, created, raw, **kwargs):
+    # a full save writes back the counters as they were loaded, which might
+    # have changed since
+    if not created and not raw:
+        PrintJob.objects.filter(pk=instance.pk).update_counters()
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if metrics.instrument_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.instrument_query)
@@ -0,0 +1,21 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from crowdprinter import assets
+
+register = template.Library()
+
+
+@register.simple_tag
+def icon(name, label):
+    """
+    An icon from the sprite, see the buildsprite command. `label` replaces
+    the alt text of an <img>.
+    """
+    return format_html(
+        '<svg class="icon" role="img" aria-label="{}"><use href="{}#{}"></use></svg>',
+        label,
+        static(assets.SPRITE),
+        name,
+    )
@@ -29,6 +29,8 @@ urlpatterns = [
     path("inprint", views.InprintView.as_view(), name="inprint"),
     path("dataprotection", views.DataProtectionView.as_view(), name="dataprotection"),
     path("myprints", views.MyPrintAttempts.as_view(), name="my_printattempts"),
+    path("events", views.live_events, name="live_events"),
+    path("checkin", views.CheckInView.as_view(), name="checkin"),
     path(
         "create/text",
         views.PrintJobTextCreateView.as_view(),
@@ -51,6 +53,11 @@ urlpatterns = [
                     name="printjobfile",
                 ),
                 path("render", views.ServeRenderView.as_view(), name="printjob_render"),
+                path(
+                    "render/<variant>",
+                    views.ServeRenderVariantView.as_view(),
+                    name="printjob_render_variant",
+                ),
                 path("take", views.take_print_job, name="printjob_take"),
                 path("give_back", views.give_back_print_job, name="printjob_give_back"),
                 path("done", views.printjob_done, name="printjob_done"),
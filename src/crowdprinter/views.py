@@ -1,7 +1,7 @@
 import datetime
-import math
+import json
 import os.path
-import tempfile
+import random
 
 from django import forms
 from django.conf import settings
@@ -10,16 +10,20 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
-from django.core.files.base import ContentFile
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
-from django.db.models import Sum
-from django.http import FileResponse
+from django.db.models import Q
 from django.http import Http404
+from django.http import HttpResponse
 from django.http import HttpResponseRedirect
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.views.decorators.cache import cache_control
 from django.views.generic import CreateView
 from django.views.generic import DetailView
@@ -29,9 +33,15 @@ from django.views.generic.base import View
 from allauth.account.forms import SignupForm
 
 import crowdprinter.models as models
-import stl_generator
+from crowdprinter import builds
+from crowdprinter import bulk
+from crowdprinter import caching
+from crowdprinter import live
+from crowdprinter import progress
+from crowdprinter import renders
 
 from .models import PrintJob
+from .sendfile import serve_file
 
 
 class SuperUserRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -39,40 +49,96 @@ class SuperUserRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
         return self.request.user.is_superuser
 
 
+# upper limits of the estimated print time the list can be filtered by
+PRINT_TIME_FILTER_HOURS = [1, 3, 8]
+
+
 class PrintJobListView(ListView):
     model = models.PrintJob
-    # paginate_by = 8
     context_object_name = "jobs"
 
+    def get_template_names(self):
+        if "fragment" in self.request.GET:
+            return ["crowdprinter/printjob_list_page.html"]
+        return ["crowdprinter/printjob_list.html"]
+
+    def get_seed(self):
+        # the seed is part of the fragment URLs, so those don't depend on the
+        # session and can be cached by anyone
+        try:
+            seed = int(self.request.GET["seed"])
+        except (KeyError, ValueError):
+            seed = self.request.session.get("shuffle_seed")
+        if seed not in range(1, settings.CROWDPRINTER_SHUFFLE_SEEDS + 1):
+            seed = random.randint(1, settings.CROWDPRINTER_SHUFFLE_SEEDS)
+            self.request.session["shuffle_seed"] = seed
+        return seed
+
+    def get_max_hours(self):
+        try:
+            hours = int(self.request.GET["hours"])
+        except (KeyError, ValueError):
+            return None
+        return hours if hours in PRINT_TIME_FILTER_HOURS else None
+
+    def get_page(self, queryset, after):
+        if after:
+            try:
+                priority, shuffle, slug = after.split(".", 2)
+                priority, shuffle = int(priority), int(shuffle)
+            except ValueError:
+                raise Http404()
+            queryset = queryset.filter(
+                Q(priority__gt=priority)
+                | Q(priority=priority, shuffle__gt=shuffle)
+                | Q(priority=priority, shuffle=shuffle, slug__gt=slug)
+            )
+        page_size = settings.CROWDPRINTER_LIST_PAGE_SIZE
+        jobs = list(queryset[: page_size + 1])
+        next_cursor = None
+        if len(jobs) > page_size:
+            jobs = jobs[:page_size]
+            last = jobs[-1]
+            next_cursor = f"{last.priority}.{last.shuffle}.{last.slug}"
+        return {"jobs": jobs, "next": next_cursor}
+
     def get_context_data(self):
         context = super().get_context_data()
-        all_count = models.PrintJob.objects.filter(public=True).aggregate(Sum("count_needed"))[
-            "count_needed__sum"
-        ]
-        done_count = models.PrintAttempt.objects.filter(finished=True, job__public=True).count()
-        context["all_count"] = all_count
-        context["done_count"] = done_count
-        context["progress_percent"] = math.floor(
-            (done_count / max(1, all_count)) * 100
+        context.update(progress.get_progress())
+        after = self.request.GET.get("after", "")
+        context["seed"] = self.seed
+        context["after"] = after
+        context["hours"] = self.max_hours
+        context["hours_choices"] = PRINT_TIME_FILTER_HOURS
+        # only evaluated on a cache miss of the list fragment
+        context["page"] = SimpleLazyObject(
+            lambda: self.get_page(self.object_list, after)
         )
+        context["list_version"] = caching.get_versions("jobs", "attempts")
+        context["list_cache_timeout"] = settings.CROWDPRINTER_CACHE_TIMEOUT
         return context
 
     def get_queryset(self):
-        return super().get_queryset().filter(can_attempt=True, public=True).order_by("priority", "?")
-
-
-def make_gcode_files(job):
-    for printer in [
-        # TODO: support multiple printers w/ presets
-        models.Printer.objects.first()
-    ]:
-        with (tempfile.NamedTemporaryFile(suffix=".gcode", delete=False) as f_gcode,):
-            stl_generator.stl_to_gcode(job.file_stl.path, f_gcode)
-            models.PrintJobFile.objects.create(
-                job=job,
-                printer=printer,
-                file_gcode=ContentFile(f_gcode.read(), name=f"{job.slug}.gcode"),
+        self.seed = self.get_seed()
+        self.max_hours = self.get_max_hours()
+        queryset = (
+            super()
+            .get_queryset()
+            .filter(can_attempt=True, public=True, build_state=models.BuildState.READY)
+        )
+        if self.max_hours:
+            queryset = queryset.filter(print_time__lte=self.max_hours * 3600)
+        return queryset.shuffled(self.seed).order_by("priority", "shuffle", "slug")
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if "fragment" in request.GET and "seed" in request.GET:
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=settings.CROWDPRINTER_LIST_CACHE_TIMEOUT,
             )
+        return response
 
 
 class PrintJobTextForm(forms.ModelForm):
@@ -80,6 +146,11 @@ class PrintJobTextForm(forms.ModelForm):
         required=True,
         widget=forms.Textarea(attrs={"rows": 4, "cols": 40}),
     )
+    profile_letters = forms.BooleanField(
+        required=False,
+        initial=True,
+        help_text="Raised letters next to the Braille",
+    )
 
     class Meta:
         model = PrintJob
@@ -87,29 +158,21 @@ class PrintJobTextForm(forms.ModelForm):
             "slug",
             "priority",
             "count_needed",
+            "color_changes",
             "text",
+            "profile_letters",
         ]
 
     @transaction.atomic
     def save(self, commit=True):
         job = super().save(commit=False)
-        slug = self.cleaned_data.get("slug")
-
-        with (
-            tempfile.NamedTemporaryFile(suffix=".stl", delete=False) as f_stl,
-            tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f_png,
-        ):
-            stl_generator.text_to_stl(self.cleaned_data.get("text"), f_stl)
-            f_stl.seek(0)
-            job.file_stl = ContentFile(f_stl.read(), name=f"{slug}.stl")
-
-            stl_generator.stl_to_png(f_stl.name, f_png)
-            f_png.seek(0)
-            job.file_render = ContentFile(f_png.read(), name=f"{slug}.png")
-
-            job.save()
-            make_gcode_files(job)
-
+        job.build_state = models.BuildState.BUILDING
+        job.save()
+        builds.enqueue(
+            job,
+            text=self.cleaned_data.get("text"),
+            profile_letters=self.cleaned_data.get("profile_letters"),
+        )
         return job
 
 
@@ -118,33 +181,31 @@ class PrintJobTextCreateView(SuperUserRequiredMixin, SuccessMessageMixin, Create
     model = PrintJob
     form_class = PrintJobTextForm
     success_url = reverse_lazy("printjob_create_text")
-    success_message = "Job %(slug)s was created successfully"
+    success_message = "Job %(slug)s was created, it will be listed once it is built"
 
 
 class PrintJobStlForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # optional on the model for text jobs, whose STL is built
+        self.fields["file_stl"].required = True
+
     class Meta:
         model = PrintJob
         fields = [
             "slug",
             "priority",
             "count_needed",
+            "color_changes",
             "file_stl",
         ]
 
     @transaction.atomic
     def save(self, commit=True):
         job = super().save(commit=False)
-        slug = self.cleaned_data.get("slug")
-
-        with (tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f_png,):
-            stl_generator.stl_to_png(job.file_stl.path, f_png)
-            f_png.seek(0)
-            job.file_render = ContentFile(f_png.read(), name=f"{slug}.png")
-
-            job.save()
-
-            make_gcode_files(job)
-
+        job.build_state = models.BuildState.BUILDING
+        job.save()
+        builds.enqueue(job)
         return job
 
 
@@ -153,7 +214,7 @@ class PrintJobStlCreateView(SuperUserRequiredMixin, SuccessMessageMixin, CreateV
     model = PrintJob
     form_class = PrintJobStlForm
     success_url = reverse_lazy("printjob_create_stl")
-    success_message = "Job %(slug)s was created successfully"
+    success_message = "Job %(slug)s was created, it will be listed once it is built"
 
 
 class MyPrintAttempts(LoginRequiredMixin, ListView):
@@ -172,69 +233,82 @@ class MyPrintAttempts(LoginRequiredMixin, ListView):
         return context
 
     def get_queryset(self):
-        return super().get_queryset().filter(user=self.request.user)
+        return (
+            super().get_queryset().filter(user=self.request.user).select_related("job")
+        )
 
 
-def can_take_job(user, job):
-    if user.max_attempts is None:
-        max_jobs = settings.CROWDPRINTER_DEFAULT_MAX_ATTEMPTS
-    else:
-        max_jobs = user.max_attempts
-    if user.max_attempts == 0:
-        return user not in job.attempting_users
+def can_take_job(user, user_attempt):
+    if user_attempt is not None:
+        return False
+    max_jobs = user.get_max_attempts()
+    if max_jobs == 0:
+        return True
     return (
         models.PrintAttempt.objects.filter(user=user, ended__isnull=True).count()
         < max_jobs
-    ) and user not in job.attempting_users
+    )
 
 
 class PrintJobDetailView(DetailView):
     model = models.PrintJob
     context_object_name = "job"
 
+    def get_object(self):
+        name = f"job:{self.kwargs['slug']}"
+        return caching.get_or_set(name, super().get_object, [name])
+
     def get_context_data(self, object):
         context = super().get_context_data()
         max_jobs = settings.CROWDPRINTER_DEFAULT_MAX_ATTEMPTS
-        if self.request.user.is_authenticated:
-            context["can_take_job"] = can_take_job(self.request.user, self.object)
-            if self.request.user.max_attempts is not None:
-                max_jobs = self.request.user.max_attempts
+        user = self.request.user
+        if user.is_authenticated:
+            user_attempt = self.object.get_user_attempt(user)
+            context["user_attempt"] = user_attempt
+            context["can_take_job"] = can_take_job(user, user_attempt)
+            max_jobs = user.get_max_attempts()
+            if user_attempt is not None:
+                context["files"] = self.object.files.select_related("printer")
+                context["unfit_printers"] = self.object.unfit_printers.all()
         context["max_jobs"] = max_jobs
         return context
 
 
 @login_required
+@transaction.atomic
 def take_print_job(request, slug):
-    job = get_object_or_404(models.PrintJob, slug=slug)
-    if request.method == "POST" and can_take_job(request.user, job):
-        models.PrintAttempt.objects.create(
-            job=job,
-            user=request.user,
-        )
+    job = get_object_or_404(
+        models.PrintJob, slug=slug, build_state=models.BuildState.READY
+    )
+    if request.method == "POST" and job.claim(request.user):
+        live.publish_availability(job)
 
     return HttpResponseRedirect(reverse("printjob_detail", kwargs={"slug": slug}))
 
 
 @login_required
+@transaction.atomic
 def give_back_print_job(request, slug):
     if request.method == "POST":
         attempt = get_object_or_404(
-            models.PrintAttempt,
+            models.PrintAttempt.objects.select_related("job"),
             job__slug=slug,
             user=request.user,
             ended__isnull=True,
         )
         attempt.ended = datetime.date.today()
         attempt.save()
+        live.publish_availability(attempt.job)
 
     return HttpResponseRedirect(reverse("printjob_detail", kwargs={"slug": slug}))
 
 
 @login_required
+@transaction.atomic
 def printjob_done(request, slug):
     if request.method == "POST":
         attempt = get_object_or_404(
-            models.PrintAttempt,
+            models.PrintAttempt.objects.select_related("job"),
             job__slug=slug,
             user=request.user,
             ended__isnull=True,
@@ -242,22 +316,59 @@ def printjob_done(request, slug):
         attempt.ended = datetime.date.today()
         attempt.finished = True
         attempt.save()
+        if attempt.job.public:
+            live.publish_progress(progress.compute_progress())
 
     return HttpResponseRedirect(reverse("printjob_detail", kwargs={"slug": slug}))
 
 
+class CheckInView(SuperUserRequiredMixin, TemplateView):
+    """
+    The drop-off station: scanned label codes are queued in the browser and
+    posted as JSON, so scanning goes on while the connection is down.
+    """
+
+    template_name = "crowdprinter/checkin.html"
+
+    def post(self, request):
+        try:
+            codes = json.loads(request.body)["codes"]
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"error": "invalid request"}, status=400)
+        if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+            return JsonResponse({"error": "invalid request"}, status=400)
+        checked_in, unknown, invalid = bulk.check_in(codes)
+        return JsonResponse(
+            {"checked_in": checked_in, "unknown": unknown, "invalid": invalid}
+        )
+
+
+async def live_events(request):
+    if not isinstance(request, ASGIRequest):
+        # under WSGI each open stream would block a worker, 204 tells the
+        # browser not to reconnect
+        return HttpResponse(status=204)
+    try:
+        last_event_id = int(request.headers["Last-Event-ID"])
+    except (KeyError, ValueError):
+        last_event_id = None
+    response = StreamingHttpResponse(
+        live.stream(last_event_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx would otherwise hold back the events until its buffer is full
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 class ServeFileView(View):
     as_attachment = True
 
-    def get(self, *args, **kwargs):
+    def get(self, request, *args, **kwargs):
         path = self.get_file_path(**kwargs)
         ext = os.path.splitext(path)[1]
         dl_filename = f'{settings.DOWNLOAD_FILE_PREFIX}{kwargs["slug"]}{ext}'
-        return FileResponse(
-            open(path, mode="rb"),
-            as_attachment=self.as_attachment,
-            filename=dl_filename,
-        )
+        return serve_file(request, path, self.as_attachment, dl_filename)
 
     def get_file_path(self, **kwargs):
         raise NotImplementedError()
@@ -269,7 +380,8 @@ class ServeStlView(ServeFileView):
             models.PrintJob,
             slug=kwargs["slug"],
         )
-        if self.request.user not in printjob.attempting_users:
+        user = self.request.user
+        if not user.is_authenticated or printjob.get_user_attempt(user) is None:
             raise Http404()
         return printjob.file_stl.path
 
@@ -283,17 +395,32 @@ class ServeRenderView(ServeFileView):
             models.PrintJob,
             slug=kwargs["slug"],
         )
+        if not printjob.file_render:
+            raise Http404()
         return printjob.file_render.path
 
 
+class ServeRenderVariantView(ServeRenderView):
+    def get_file_path(self, **kwargs):
+        path = renders.variant_path(kwargs["slug"], kwargs["variant"])
+        if path is None:
+            raise Http404()
+        return path
+
+
 class ServeJobFileView(ServeFileView):
     def get_file_path(self, **kwargs):
-        printjobfile = get_object_or_404(
-            models.PrintJobFile,
+        printjobfile = models.PrintJobFile.objects.filter(
             printer=kwargs["printer"],
             job__slug=kwargs["slug"],
             job__attempts__user=self.request.user,
-        )
+        ).first()
+        if printjobfile is None:
+            if models.PrintJob.objects.filter(
+                slug=kwargs["slug"], unfit_printers=kwargs["printer"]
+            ).exists():
+                raise Http404("The part does not fit into this printer.")
+            raise Http404()
 
         if kwargs["ext"] == "3mf":
             return printjobfile.file_3mf.path
@@ -1,18 +1,89 @@
 #!/usr/bin/env python3
 
+import functools
 import pathlib
+import shlex
+import shutil
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from stl_generator import braille
+from stl_generator import display
+from stl_generator.insert_m600 import DEFAULT_HEIGHTS
 
 BASE_DIR = pathlib.Path(__file__).parent
 
 
-def text_to_stl(text, f_stl):
+@functools.cache
+def tool_version(tool):
+    # openscad prints its version to stderr, prusa-slicer the first line of --help
+    flag = "--version" if tool == "openscad" else "--help"
+    result = subprocess.run([tool, flag], capture_output=True, text=True)
+    output = result.stdout or result.stderr
+    return output.splitlines()[0] if output else tool
+
+
+def cached(key_parts):
+    """
+    Serve the output of the decorated function from an ArtifactCache, if one
+    is passed as `cache`. `key_parts` gets the arguments of the call and
+    returns everything the output depends on. The decorated function returns
+    whether the output came from the cache.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(source, f_out, cache=None, **kwargs):
+            if cache is None:
+                func(source, f_out, **kwargs)
+                return False
+            key = cache.key(func.__name__, *key_parts(source, **kwargs))
+            if cache.get(key, f_out.name):
+                return True
+            func(source, f_out, **kwargs)
+            f_out.flush()
+            cache.put(key, f_out.name)
+            return False
+
+        return wrapper
+
+    return decorator
+
+
+def read_bytes(path):
+    return pathlib.Path(path).read_bytes()
+
+
+def scad_string(text):
+    """
+    `text` as an openscad string literal, so it can't end the string and
+    inject code into the generated source.
+    """
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+    escaped = escaped.replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+    return f'"{escaped}"'
+
+
+@cached(
+    lambda text, profile_letters=True: (
+        tool_version("openscad"),
+        read_bytes(BASE_DIR / "generate_braille_lib.scad"),
+        text,
+        profile_letters,
+    )
+)
+def text_to_stl(text, f_stl, profile_letters=True):
     path_lib = BASE_DIR / "generate_braille_lib.scad"
     with tempfile.NamedTemporaryFile("w", suffix=".scad", delete=False) as f_scad:
-        f_scad.write(f'BrailleText1="{text.lower()}";')
-        f_scad.write(f'ProfilText1="{text}";')
-        f_scad.write(f"include<{path_lib}>;")
+        if profile_letters:
+            f_scad.write(f"BrailleText1={scad_string(text.lower())};")
+            f_scad.write(f"ProfilText1={scad_string(text)};")
+            f_scad.write(f"include<{path_lib}>;")
+        else:
+            # only the library's modules, without the sign it builds itself
+            f_scad.write(f"use<{path_lib}>;")
+            f_scad.write(f"Braille({scad_string(text.lower())});")
         f_scad.flush()
         subprocess.check_call(
             [
@@ -26,14 +97,48 @@ def text_to_stl(text, f_stl):
         )
 
 
-def stl_to_png(path_stl, f_png):
+def braille_to_stl(text, f_stl, cache=None, profile_letters=True):
+    """
+    Like text_to_stl, but builds signs without profile letters with NumPy
+    instead of openscad, in milliseconds, so they are never cached. Signs
+    with profile letters, and text with characters the native builder has
+    no Braille cells for, still go to text_to_stl, which drops those
+    characters like the library always did.
+    """
+    if profile_letters:
+        return text_to_stl(text, f_stl, cache=cache)
+    try:
+        triangles = braille.sign_triangles(text)
+    except ValueError:
+        return text_to_stl(text, f_stl, cache=cache, profile_letters=False)
+    braille.write_stl(f_stl, triangles)
+    return False
+
+
+def run_headless(args, persistent=True):
+    """
+    Run a command which needs an X display. Uses the display of this process
+    if Xvfb is installed, otherwise starts a new one with xvfb-run.
+    """
+    if persistent and shutil.which("Xvfb"):
+        subprocess.check_call(args, env=display.get_display().env())
+    else:
+        subprocess.check_call(["xvfb-run", "-a", *args])
+
+
+@cached(
+    lambda path_stl, persistent_display=True: (
+        tool_version("openscad"),
+        "800,800",
+        read_bytes(path_stl),
+    )
+)
+def stl_to_png(path_stl, f_png, persistent_display=True):
     with tempfile.NamedTemporaryFile("w", suffix=".scad", delete=False) as f_scad:
         f_scad.write(f'import("{path_stl}");')
         f_scad.flush()
-        subprocess.check_call(
+        run_headless(
             [
-                "xvfb-run",
-                "-a",
                 "openscad",
                 f_scad.name,
                 "-o",
@@ -41,20 +146,50 @@ def stl_to_png(path_stl, f_png):
                 "--export-format",
                 "png",
                 "--imgsize=800,800",
-            ]
+            ],
+            persistent=persistent_display,
         )
 
 
-def stl_to_gcode(path_stl, f_gcode):
-    path_pp_script = BASE_DIR / "insert_m600.py"
-    subprocess.check_call(
-        [
-            "prusa-slicer",
-            path_stl,
+def stl_to_pngs(paths_stl, cache=None, workers=1):
+    """
+    Render many STL files on the display of this process, `workers` at a
+    time. Returns a list of (path of the PNG, whether it came from the
+    cache) in the order of `paths_stl`, the PNGs are temporary files which
+    the caller has to remove.
+    """
+
+    def render(path_stl):
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f_png:
+            return f_png.name, stl_to_png(path_stl, f_png, cache=cache)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render, paths_stl))
+
+
+@cached(
+    lambda path_stl, profile=None, color_changes=DEFAULT_HEIGHTS: (
+        tool_version("prusa-slicer"),
+        read_bytes(BASE_DIR / "insert_m600.py"),
+        read_bytes(profile) if profile else b"",
+        color_changes,
+        read_bytes(path_stl),
+    )
+)
+def stl_to_gcode(path_stl, f_gcode, profile=None, color_changes=DEFAULT_HEIGHTS):
+    """
+    `color_changes` are the comma separated layer heights in millimeters to
+    change the filament at, see insert_m600.py, empty for none.
+    """
+    args = ["prusa-slicer", path_stl]
+    if color_changes:
+        # the slicer appends the path of the G-code file to the command
+        path_pp_script = BASE_DIR / "insert_m600.py"
+        args += [
             "--post-process",
-            path_pp_script,
-            "--export-gcode",
-            "--output",
-            f_gcode.name,
+            f"{shlex.quote(str(path_pp_script))} {shlex.quote(color_changes)}",
         ]
-    )
+    if profile:
+        args += ["--load", profile]
+    args += ["--export-gcode", "--output", f_gcode.name]
+    subprocess.check_call(args)
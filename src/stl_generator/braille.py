@@ -0,0 +1,307 @@
+"""
+Braille signs as binary STL, built with NumPy instead of openscad CSG.
+
+Reproduces the Braille part of generate_braille_lib.scad: the base plate
+rounded by its minkowski hemisphere, the dots on the library's grid and
+optionally the eyelet. The parts are closed shells which only touch each
+other, so no union is needed. The profile letters still need openscad,
+see text_to_stl.
+"""
+
+import math
+
+import numpy as np
+
+from stl_generator.mesh import BINARY_HEADER_SIZE
+from stl_generator.mesh import BINARY_TRIANGLE
+
+# parameters of generate_braille_lib.scad, in mm
+GRUNDPLATTEN_STAERKE = 1  # plate thickness and radius of its rounding
+BRAILLEZELLENABSTAND_ZUSATZ = 0.4  # additional distance between cells
+SENKRECHTER_ABSTAND = 5
+DOT_SIZE = 2
+DOT_DIST = 2.5
+CELL_DOT_DIST0 = 6
+CELL_DOT_DIST0_VERT = 10
+# the dots stand on a cylinder of this height, minkowski adds this to the plate
+DOT_RAISE = 0.25
+PLATE_CORE = 0.06
+# the ring of the eyelet, the hole has a radius this much smaller
+OESE_WIDTH = 4
+# $fn of the dots and of the hemisphere rounding the plate
+DOT_FRAGMENTS = 10
+ROUNDING_FRAGMENTS = 12
+
+CELL_DOT_DIST = CELL_DOT_DIST0 - DOT_DIST
+CELL_DOT_DIST_VERT = CELL_DOT_DIST0_VERT - DOT_DIST * 2
+CELL_LENGTH = CELL_DOT_DIST + DOT_DIST
+CELL_HEIGHT = CELL_DOT_DIST_VERT + DOT_DIST * 2
+CELL_PITCH = CELL_LENGTH + BRAILLEZELLENABSTAND_ZUSATZ
+# the Braille module shifts the cells by half a millimeter
+FIRST_DOT_X = 1 / 2 + CELL_DOT_DIST / 2
+
+# position of each dot of a cell
+DOTS = {
+    "1": (0, DOT_DIST * 2),
+    "2": (0, DOT_DIST),
+    "3": (0, 0),
+    "4": (DOT_DIST, DOT_DIST * 2),
+    "5": (DOT_DIST, DOT_DIST),
+    "6": (DOT_DIST, 0),
+}
+
+# the cells of each character, as in braillealphabet of the library
+NUMBER_SIGN = "3456"
+ALPHABET = {
+    "a": ["1"],
+    "b": ["12"],
+    "c": ["14"],
+    "d": ["145"],
+    "e": ["15"],
+    "f": ["124"],
+    "g": ["1245"],
+    "h": ["125"],
+    "i": ["24"],
+    "j": ["245"],
+    "k": ["13"],
+    "l": ["123"],
+    "m": ["134"],
+    "n": ["1345"],
+    "o": ["135"],
+    "p": ["1234"],
+    "q": ["12345"],
+    "r": ["1235"],
+    "s": ["234"],
+    "t": ["2345"],
+    "u": ["136"],
+    "v": ["1236"],
+    "w": ["2456"],
+    "x": ["1346"],
+    "y": ["13456"],
+    "z": ["1356"],
+    "ä": ["345"],
+    "ö": ["246"],
+    "ü": ["1256"],
+    "ß": ["2346"],
+    ",": ["2"],
+    ";": ["23"],
+    ":": ["25"],
+    "?": ["26"],
+    "!": ["235"],
+    "(": ["2356"],
+    ")": ["2356"],
+    ".": ["3"],
+    "-": ["36"],
+    "§": ["346"],
+    "/": ["5", "2"],
+    "&": ["5", "136"],
+    "\\": ["4", "35"],
+    "@": ["4", "345"],
+    "_": ["4", "456"],
+    " ": [""],
+    # every digit gets its own number sign, like the library does
+    "1": [NUMBER_SIGN, "1"],
+    "2": [NUMBER_SIGN, "12"],
+    "3": [NUMBER_SIGN, "14"],
+    "4": [NUMBER_SIGN, "145"],
+    "5": [NUMBER_SIGN, "15"],
+    "6": [NUMBER_SIGN, "124"],
+    "7": [NUMBER_SIGN, "1245"],
+    "8": [NUMBER_SIGN, "125"],
+    "9": [NUMBER_SIGN, "24"],
+    "0": [NUMBER_SIGN, "245"],
+}
+
+
+def cells(text):
+    """
+    The dots of each cell for `text`, e.g. ["1", "12"] for "ab". Raises
+    ValueError for characters without a Braille cell, the library drops
+    them silently.
+    """
+    text = text.lower()
+    unknown = sorted(set(text) - set(ALPHABET))
+    if unknown:
+        raise ValueError(f"No Braille cells for {''.join(unknown)!r}")
+    return [cell for char in text for cell in ALPHABET[char]]
+
+
+def fragments(r, fn=0, fa=12, fs=2):
+    # openscad's get_fragments_from_r
+    if fn > 0:
+        return max(fn, 3)
+    return int(math.ceil(max(min(360 / fa, r * 2 * math.pi / fs), 5)))
+
+
+def hemisphere(radius, fn):
+    """
+    The (z, radius) rings of the upper half of an openscad sphere, starting
+    with its cut at z = 0.
+    """
+    count = (fn + 1) // 2
+    phi = np.pi * (np.arange(count) + 0.5) / count
+    z = radius * np.cos(phi)
+    r = radius * np.sin(phi)
+    upper = z > 1e-9
+    # the rings are symmetric, the cut has the radius of the ring on or below
+    # the equator
+    cut = r[np.count_nonzero(upper)]
+    return [(0.0, cut)] + list(zip(z[upper][::-1], r[upper][::-1]))
+
+
+def circle(fn):
+    angles = 2 * np.pi * np.arange(fn) / fn
+    return np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+def loft(rings):
+    """
+    The triangles of a closed shell through `rings` of the same number of
+    points, from bottom to top, each counterclockwise seen from above. The
+    bottom and top ring must be convex.
+    """
+    rings = np.asarray(rings, dtype=np.float64)
+    count = rings.shape[1]
+    i = np.arange(count)
+    j = (i + 1) % count
+    lower, upper = rings[:-1], rings[1:]
+    sides = np.concatenate(
+        [
+            np.stack([lower[:, i], lower[:, j], upper[:, j]], axis=2),
+            np.stack([lower[:, i], upper[:, j], upper[:, i]], axis=2),
+        ]
+    ).reshape(-1, 3, 3)
+    fan = np.arange(1, count - 1)
+    bottom, top = rings[0], rings[-1]
+    caps = [
+        np.stack([np.repeat(bottom[:1], len(fan), 0), bottom[fan + 1], bottom[fan]], 1),
+        np.stack([np.repeat(top[:1], len(fan), 0), top[fan], top[fan + 1]], 1),
+    ]
+    return np.concatenate([sides, *caps])
+
+
+def revolve(profile, fn):
+    """
+    The triangles of a closed ring made by turning the closed (radius, z)
+    `profile`, counterclockwise seen from in front of the ring, around the z
+    axis in `fn` steps.
+    """
+    profile = np.asarray(profile, dtype=np.float64)
+    directions = circle(fn)
+    # points[angle, profile point]
+    points = np.concatenate(
+        [
+            directions[:, None, :] * profile[None, :, :1],
+            np.broadcast_to(profile[None, :, 1:], (fn, len(profile), 1)),
+        ],
+        axis=2,
+    )
+    a = np.arange(fn)
+    b = (a + 1) % fn
+    p = np.arange(len(profile))
+    q = (p + 1) % len(profile)
+    a, p = np.meshgrid(a, p, indexing="ij")
+    b, q = np.meshgrid(b, q, indexing="ij")
+    return np.concatenate(
+        [
+            np.stack([points[a, p], points[b, p], points[b, q]], axis=2),
+            np.stack([points[a, p], points[b, q], points[a, q]], axis=2),
+        ]
+    ).reshape(-1, 3, 3)
+
+
+def rounded_box(width, height, rounding):
+    """
+    The minkowski sum of a thin box and the plate's rounding hemisphere, as
+    its rings. The box starts at the origin.
+    """
+    directions = circle(ROUNDING_FRAGMENTS)
+    quarter = ROUNDING_FRAGMENTS // 4
+    corners = []
+    for k, (x, y) in enumerate([(width, height), (0, height), (0, 0), (width, 0)]):
+        corner = directions[
+            np.arange(k * quarter, (k + 1) * quarter + 1) % len(directions)
+        ]
+        corners.append((corner, (x, y)))
+    rings = []
+    for z, r in hemisphere(rounding, ROUNDING_FRAGMENTS):
+        ring = np.concatenate([corner * r + offset for corner, offset in corners])
+        z = z + PLATE_CORE if z > 0 else z
+        rings.append(np.column_stack([ring, np.full(len(ring), z)]))
+    return rings
+
+
+def dot(base, bottom):
+    """
+    The triangles of a dot placed by the library at height `base`, cut off
+    at `bottom`: a cylinder up to DOT_RAISE above its base, topped by a
+    hemisphere.
+    """
+    radius = DOT_SIZE / 2
+    directions = circle(DOT_FRAGMENTS)
+    rings = [(bottom, radius)]
+    rings += [(base + DOT_RAISE + z, r) for z, r in hemisphere(radius, DOT_FRAGMENTS)]
+    return loft(
+        [np.column_stack([directions * r, np.full(DOT_FRAGMENTS, z)]) for z, r in rings]
+    )
+
+
+def sign_triangles(text, thickness=GRUNDPLATTEN_STAERKE, oese=False):
+    """
+    The triangles of the Braille sign for `text`, placed like the Braille
+    module of the library places it, i.e. on z = 0 with the first cell at
+    the origin. The dots are cut off at the plate instead of reaching into
+    it. `oese` adds the eyelet left of the plate, as a shell overlapping it.
+    """
+    row = cells(text)
+    if not row:
+        raise ValueError("No text for the sign")
+    width = len(row) * CELL_PITCH
+    plate_rings = rounded_box(
+        width + 1 - thickness * 2, CELL_HEIGHT - thickness * 2, thickness
+    )
+    plate_rings = [ring + [thickness, thickness, 0] for ring in plate_rings]
+    parts = [loft(plate_rings)]
+
+    positions = np.array(
+        [
+            (FIRST_DOT_X + i * CELL_PITCH + x, CELL_DOT_DIST_VERT / 2 + y, 0)
+            for i, cell in enumerate(row)
+            for x, y in (DOTS[number] for number in cell)
+        ]
+    )
+    if len(positions):
+        plate_top = plate_rings[-1][0, 2]
+        template = dot(thickness, max(thickness, plate_top))
+        parts.append((template[None] + positions[:, None, None]).reshape(-1, 3, 3))
+
+    if oese:
+        outer = (CELL_HEIGHT + SENKRECHTER_ABSTAND) / 2
+        inner = outer - OESE_WIDTH
+        rings = hemisphere(thickness, ROUNDING_FRAGMENTS)
+        lift = [z + PLATE_CORE if z > 0 else z for z, _ in rings]
+        # outwards side from bottom to top, hole side back down
+        profile = [(outer + r, z) for (_, r), z in zip(rings, lift)]
+        profile += [(inner - r, z) for (_, r), z in zip(rings[::-1], lift[::-1])]
+        center = (thickness - (outer + inner) / 2, CELL_HEIGHT / 2, 0)
+        parts.append(revolve(profile, fragments(outer)) + center)
+    return np.concatenate(parts)
+
+
+def write_stl(f, triangles):
+    data = np.zeros(len(triangles), dtype=BINARY_TRIANGLE)
+    data["vertices"] = triangles
+    normals = np.cross(
+        triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+    )
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    data["normal"] = np.divide(
+        normals, lengths, out=np.zeros_like(normals), where=lengths > 0
+    )
+    f.write(b"crowdprinter braille".ljust(BINARY_HEADER_SIZE - 4, b" "))
+    f.write(len(data).to_bytes(4, "little"))
+    f.write(data.tobytes())
+
+
+def text_to_stl(text, f_stl, thickness=GRUNDPLATTEN_STAERKE, oese=False):
+    write_stl(f_stl, sign_triangles(text, thickness=thickness, oese=oese))
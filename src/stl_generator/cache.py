@@ -0,0 +1,87 @@
+import hashlib
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+
+
+class ArtifactCache:
+    """
+    Content addressed store for the outputs of openscad and prusa-slicer.
+    Keys are hashes of everything that went into an output, the least
+    recently used outputs are removed once the cache exceeds `max_bytes`.
+    That takes a walk over the whole cache, so it happens at most every
+    `evict_interval` seconds, shared by all processes using the cache.
+    """
+
+    def __init__(self, root, max_bytes, evict_interval=60):
+        self.root = pathlib.Path(root)
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+
+    @staticmethod
+    def key(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            # length prefix, so ("ab", "c") and ("a", "bc") differ
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return self.root / key[:2] / key
+
+    def get(self, key, path_out):
+        path = self.path(key)
+        try:
+            shutil.copyfile(path, path_out)
+        except FileNotFoundError:
+            return False
+        # the modification time doubles as last access time for eviction
+        path.touch()
+        return True
+
+    def put(self, key, path_in):
+        # it would only evict everything else and then itself
+        if os.path.getsize(path_in) > self.max_bytes:
+            return
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # copy next to the final path first, so readers never see half a file
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f_tmp:
+            with open(path_in, "rb") as f_in:
+                shutil.copyfileobj(f_in, f_tmp)
+        os.replace(f_tmp.name, path)
+        if self.eviction_due():
+            self.evict()
+
+    def eviction_due(self):
+        # outside of the */* entries, so it is never evicted itself
+        marker = self.root / "evicted"
+        try:
+            if time.time() - marker.stat().st_mtime < self.evict_interval:
+                return False
+        except FileNotFoundError:
+            pass
+        marker.touch()
+        return True
+
+    def evict(self):
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,74 @@
+import multiprocessing.util
+import os
+import subprocess
+import threading
+
+
+class Display:
+    """
+    A headless X server for openscad to render on. It is started once and
+    shared by all renders of a process, instead of a new `xvfb-run` with its
+    own server for each render.
+    """
+
+    def __init__(self):
+        # Xvfb picks a free display number itself and writes it to this pipe
+        # once it accepts connections
+        read_fd, write_fd = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [
+                    "Xvfb",
+                    "-displayfd",
+                    str(write_fd),
+                    "-screen",
+                    "0",
+                    "1024x768x24",
+                    "-nolisten",
+                    "tcp",
+                ],
+                pass_fds=[write_fd],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        finally:
+            os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            number = f.readline().strip()
+        if not number:
+            self.close()
+            raise RuntimeError("Xvfb exited before opening a display")
+        self.name = f":{number}"
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def env(self):
+        return {**os.environ, "DISPLAY": self.name}
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+_display = None
+_lock = threading.Lock()
+
+
+def get_display():
+    global _display
+    with _lock:
+        if _display is None or not _display.alive():
+            _display = Display()
+            # unlike atexit, also runs when a multiprocessing worker exits
+            multiprocessing.util.Finalize(_display, _display.close, exitpriority=10)
+        return _display
+
+
+def close_display():
+    global _display
+    with _lock:
+        if _display is not None:
+            _display.close()
+            _display = None
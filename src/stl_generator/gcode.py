@@ -0,0 +1,35 @@
+import os
+import re
+
+# PrusaSlicer writes its estimates as comments at the end of the G-code,
+# followed only by the slicer configuration
+TAIL_SIZE = 256 * 1024
+PRINT_TIME_RE = re.compile(rb"^; estimated printing time \(normal mode\) = (.+)$", re.M)
+FILAMENT_RE = re.compile(rb"^; (?:total )?filament used \[g\] = ([\d.]+)", re.M)
+DURATION_RE = re.compile(r"(\d+)([dhms])")
+SECONDS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def parse_duration(text):
+    """
+    Seconds of a duration like "1d 2h 3m 4s", as written by PrusaSlicer.
+    """
+    return sum(
+        int(amount) * SECONDS[unit] for amount, unit in DURATION_RE.findall(text)
+    )
+
+
+def read_estimate(path):
+    """
+    The print time in s and the filament in g the slicer estimated for a
+    G-code file, each None if the file doesn't say.
+    """
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - TAIL_SIZE))
+        tail = f.read()
+    estimate = {"print_time": None, "filament_g": None}
+    if match := PRINT_TIME_RE.search(tail):
+        estimate["print_time"] = parse_duration(match[1].decode("ascii", "replace"))
+    if match := FILAMENT_RE.search(tail):
+        estimate["filament_g"] = float(match[1])
+    return estimate
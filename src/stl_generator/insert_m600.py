@@ -1,14 +1,79 @@
 #!/usr/bin/env python3
+"""
+PrusaSlicer post-processing script, inserts a filament change after the layer
+change to each of the given heights:
 
+    insert_m600.py [HEIGHTS] GCODE_FILE
+
+HEIGHTS are comma separated millimeters, 2.15 if not given. The G-code is
+streamed into a temporary file next to the original, which then replaces it,
+so neither memory use nor the risk of a truncated file grow with its size.
+"""
+
+import decimal
+import os
+import re
+import shutil
 import sys
+import tempfile
+
+DEFAULT_HEIGHTS = "2.15"
+BUFFER_SIZE = 1024 * 1024
+# written by PrusaSlicer at every layer change
+LAYER_CHANGE_RE = re.compile(rb"^;Z:([^\r\n]*)\r?\n", re.MULTILINE)
+
+
+def parse_heights(heights):
+    # compared as decimals, so "2.15" matches ";Z:2.150" without float rounding
+    return {decimal.Decimal(height) for height in heights.split(",") if height.strip()}
+
+
+def insert_m600(f_in, f_out, heights, buffer_size=BUFFER_SIZE):
+    rest = b""
+    while True:
+        chunk = f_in.read(buffer_size)
+        data = rest + chunk
+        if chunk:
+            # an incomplete last line is completed by the next chunk
+            end = data.rfind(b"\n") + 1
+            data, rest = data[:end], data[end:]
+        start = 0
+        for match in LAYER_CHANGE_RE.finditer(data):
+            try:
+                z = decimal.Decimal(match[1].decode("ascii", "replace"))
+            except decimal.InvalidOperation:
+                continue
+            if z in heights:
+                f_out.write(data[start : match.end()])
+                f_out.write(b"M600 ; filament change\n")
+                start = match.end()
+        f_out.write(data[start:])
+        if not chunk:
+            return
+
+
+def process_file(path, heights):
+    fd, path_tmp = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        # binary, so encoding and line endings of the slicer stay as they are
+        with open(path, "rb") as f_in:
+            with open(fd, "wb") as f_out:
+                insert_m600(f_in, f_out, heights)
+        shutil.copymode(path, path_tmp)
+        os.replace(path_tmp, path)
+    except BaseException:
+        os.unlink(path_tmp)
+        raise
+
 
-z_color_change = "2.15"  # millimeters, as string to prevent float rounding
+def main(argv):
+    if len(argv) not in (2, 3):
+        sys.exit(f"usage: {argv[0]} [HEIGHTS] GCODE_FILE")
+    heights = argv[1] if len(argv) == 3 else DEFAULT_HEIGHTS
+    process_file(argv[-1], parse_heights(heights))
 
-with open(sys.argv[1], "r") as file:
-    gcode = file.readlines()
 
-with open(sys.argv[1], "w") as file:
-    for line in gcode:
-        file.write(line)
-        if f";Z:{z_color_change}" in line:
-            file.write("M600 ; filament change\n")
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,89 @@
+import mmap
+import re
+
+import numpy as np
+
+BINARY_HEADER_SIZE = 84
+BINARY_TRIANGLE = np.dtype(
+    [
+        ("normal", "<f4", (3,)),
+        ("vertices", "<f4", (3, 3)),
+        ("attributes", "<u2"),
+    ]
+)
+# everything in an ASCII STL but the vertex coordinates
+ASCII_NOISE_RE = re.compile(
+    rb"endsolid[^\n]*|solid[^\n]*|facet normal[^\n]*|outer loop|endloop"
+    rb"|endfacet|vertex"
+)
+# triangles per step of the volume sum, bounds the temporary arrays
+CHUNK_SIZE = 1024 * 1024
+
+# rough estimates for parts which are not sliced yet, the slicer's own
+# estimate replaces them later
+PLA_DENSITY = 1.24  # g/cm³
+VOLUMETRIC_SPEED = 4  # mm³/s, averaged over infill, perimeters and travel
+PRINT_OVERHEAD = 5 * 60  # s, heating and homing
+
+
+def read_stl(path):
+    """
+    Return the vertices of all triangles of an STL file as an array of
+    shape (triangles, 3, 3). Binary files are memory-mapped, not read.
+    """
+    with open(path, "rb") as f:
+        header = f.read(BINARY_HEADER_SIZE)
+        f.seek(0, 2)
+        size = f.tell()
+    if len(header) == BINARY_HEADER_SIZE:
+        count = int.from_bytes(header[80:84], "little")
+        # ASCII files start with "solid", but so do some binary ones
+        if size == BINARY_HEADER_SIZE + count * BINARY_TRIANGLE.itemsize:
+            if count == 0:
+                return np.zeros((0, 3, 3), dtype="<f4")
+            triangles = np.memmap(
+                path,
+                dtype=BINARY_TRIANGLE,
+                mode="r",
+                offset=BINARY_HEADER_SIZE,
+                shape=(count,),
+            )
+            return triangles["vertices"]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        numbers = np.fromstring(ASCII_NOISE_RE.sub(b" ", m), sep=" ")
+    if len(numbers) % 9:
+        raise ValueError(f"{path} is not a valid STL file")
+    return numbers.reshape(-1, 3, 3)
+
+
+def mesh_info(path):
+    """
+    Triangle count, bounding box size and volume of an STL file in mm and
+    mm³, and rough estimates of the filament in g and the print time in s.
+    """
+    vertices = read_stl(path)
+    count = len(vertices)
+    if count == 0:
+        raise ValueError(f"{path} has no triangles")
+    low = np.full(3, np.inf)
+    high = np.full(3, -np.inf)
+    volume = 0.0
+    for start in range(0, count, CHUNK_SIZE):
+        chunk = np.asarray(vertices[start : start + CHUNK_SIZE], dtype=np.float64)
+        points = chunk.reshape(-1, 3)
+        low = np.minimum(low, points.min(axis=0))
+        high = np.maximum(high, points.max(axis=0))
+        # sum of the signed volumes of the tetrahedra from the origin to each
+        # triangle, which is the volume of a closed mesh
+        volume += np.einsum("ij,ij->", chunk[:, 0], np.cross(chunk[:, 1], chunk[:, 2]))
+    volume = abs(float(volume)) / 6
+    size_x, size_y, size_z = (high - low).tolist()
+    return {
+        "triangle_count": count,
+        "size_x": size_x,
+        "size_y": size_y,
+        "size_z": size_z,
+        "volume": volume,
+        "filament_g": volume / 1000 * PLA_DENSITY,
+        "print_time": round(PRINT_OVERHEAD + volume / VOLUMETRIC_SPEED),
+    }
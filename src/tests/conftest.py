@@ -2,11 +2,29 @@ from io import BytesIO
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
 
+import stl_generator
 from crowdprinter.models import PrintAttempt
 from crowdprinter.models import Printer
 from crowdprinter.models import PrintJob
+from stl_generator import mesh
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings, tmp_path_factory):
+    location = tmp_path_factory.mktemp("cache")
+    settings.CACHES = {"default": {**settings.CACHES["default"], "LOCATION": location}}
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
 
 
 @pytest.fixture
@@ -15,6 +33,26 @@ def client_user(client, user):
     return client
 
 
+@pytest.fixture
+def count_queries():
+    """
+    Returns a function which GETs `url` with `client` and returns the number
+    of queries the response took. The page is requested once before, so
+    one-off work like storing a new session isn't counted, and caches are
+    cleared, so the count doesn't depend on earlier requests.
+    """
+
+    def count(client, url):
+        client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    return count
+
+
 @pytest.fixture
 def printer_prusa_xl():
     return Printer.objects.create(
@@ -43,6 +81,12 @@ def make_file(id):
     )
 
 
+def make_png(size=800):
+    buffer = BytesIO()
+    Image.new("RGB", (size, size), "orange").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
 def make_job(name, **kwargs):
     return PrintJob.objects.create(
         slug=name,
@@ -52,6 +96,15 @@ def make_job(name, **kwargs):
     )
 
 
+def make_attempts(user, count, **kwargs):
+    return [
+        PrintAttempt.objects.create(
+            job=make_job(f"job_{i}", public=True), user=user, **kwargs
+        )
+        for i in range(count)
+    ]
+
+
 @pytest.fixture
 def job_basic():
     return make_job("job_basic")
@@ -69,7 +122,7 @@ def job_taken(user):
 
 @pytest.fixture
 def job_basic_x50():
-    return [make_job(f"job_basic_{i}") for i in range(100)]
+    return [make_job(f"job_basic_{i}", public=True) for i in range(100)]
 
 
 @pytest.fixture
@@ -83,3 +136,38 @@ def user():
         "user",
         "user@example.org",
     )
+
+
+MESH_INFO = {
+    "triangle_count": 4,
+    "size_x": 10.0,
+    "size_y": 20.0,
+    "size_z": 2.5,
+    "volume": 300.0,
+    "filament_g": 0.4,
+    "print_time": 375,
+}
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    def write(content):
+        def tool(
+            source,
+            f_out,
+            cache=None,
+            profile=None,
+            color_changes=None,
+            profile_letters=True,
+        ):
+            f_out.write(content)
+            if profile:
+                f_out.write(open(profile, "rb").read())
+            return False
+
+        return tool
+
+    monkeypatch.setattr(stl_generator, "text_to_stl", write(b"stl"))
+    monkeypatch.setattr(stl_generator, "stl_to_png", write(make_png()))
+    monkeypatch.setattr(stl_generator, "stl_to_gcode", write(b"gcode"))
+    monkeypatch.setattr(mesh, "mesh_info", lambda path: MESH_INFO)
@@ -0,0 +1,129 @@
+import datetime
+
+import pytest
+from conftest import make_attempts
+
+from crowdprinter import bulk
+from crowdprinter.models import LiveEvent
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+CHANGELIST = "/admin/crowdprinter/printattempt/"
+SCAN = "/admin/crowdprinter/printattempt/scan/"
+
+
+@pytest.mark.django_db
+def test_action_mark_dropped_off(admin_client, user):
+    open_attempt, ended_attempt = make_attempts(user, 2)
+    ended = datetime.date.today() - datetime.timedelta(days=3)
+    PrintAttempt.objects.filter(pk=ended_attempt.pk).update(ended=ended)
+
+    resp = admin_client.post(
+        CHANGELIST,
+        {
+            "action": "mark_dropped_off",
+            "_selected_action": [open_attempt.pk, ended_attempt.pk],
+        },
+    )
+    assert resp.status_code == 302
+
+    open_attempt.refresh_from_db()
+    assert open_attempt.ended == datetime.date.today()
+    assert open_attempt.finished and open_attempt.dropped_off
+    ended_attempt.refresh_from_db()
+    assert ended_attempt.ended == ended
+    assert ended_attempt.finished and ended_attempt.dropped_off
+    assert list(PrintJob.objects.values_list("finished_count", flat=True)) == [1, 1]
+
+
+@pytest.mark.django_db
+def test_action_end_attempts(admin_client, user):
+    attempt, finished = make_attempts(user, 2)
+    PrintAttempt.objects.filter(pk=finished.pk).update(
+        ended=datetime.date.today(), finished=True
+    )
+
+    admin_client.post(
+        CHANGELIST,
+        {"action": "end_attempts", "_selected_action": [attempt.pk, finished.pk]},
+    )
+
+    attempt.refresh_from_db()
+    assert attempt.ended == datetime.date.today()
+    assert attempt.finished is False
+    attempt.job.refresh_from_db()
+    assert attempt.job.can_attempt is True
+    assert PrintAttempt.objects.get(pk=finished.pk).finished is True
+    assert {"slug": "job_0", "available": True} in LiveEvent.objects.values_list(
+        "data", flat=True
+    )
+
+
+@pytest.mark.django_db
+def test_job_actions(admin_client, job_basic):
+    changelist = "/admin/crowdprinter/printjob/"
+    selected = {"_selected_action": [job_basic.pk]}
+
+    admin_client.post(changelist, {"action": "publish", **selected})
+    job_basic.refresh_from_db()
+    assert job_basic.public is True
+
+    admin_client.post(
+        changelist, {"action": "set_priority", "priority": "7", **selected}
+    )
+    job_basic.refresh_from_db()
+    assert job_basic.priority == 7
+
+    # without a priority nothing changes
+    admin_client.post(changelist, {"action": "set_priority", **selected})
+    job_basic.refresh_from_db()
+    assert job_basic.priority == 7
+
+    admin_client.post(changelist, {"action": "unpublish", **selected})
+    job_basic.refresh_from_db()
+    assert job_basic.public is False
+
+
+@pytest.mark.django_db
+def test_job_actions_invalidate_list(admin_client, client, job_basic):
+    job_basic.public = True
+    job_basic.save()
+    assert "job_basic" in client.get("/").content.decode()
+
+    admin_client.post(
+        "/admin/crowdprinter/printjob/",
+        {"action": "unpublish", "_selected_action": [job_basic.pk]},
+    )
+    assert "job_basic" not in client.get("/").content.decode()
+
+
+@pytest.mark.django_db
+def test_scan(admin_client, user):
+    attempts = make_attempts(user, 3)
+    assert "Scan drop-offs" in admin_client.get(CHANGELIST).content.decode()
+    assert admin_client.get(SCAN).status_code == 200
+
+    codes = [
+        bulk.attempt_code(attempts[0]),
+        str(attempts[1].pk),
+        f"{attempts[2].pk}/job_0",
+        "99999",
+        "nonsense",
+    ]
+    resp = admin_client.post(SCAN, {"codes": "\n".join(codes)}, follow=True)
+
+    content = resp.content.decode()
+    assert "Marked 2 print attempts as dropped off." in content
+    # the slug of the third doesn't match its job, like in the check-in
+    assert f"Unknown print attempts: {attempts[2].pk}/job_0, 99999" in content
+    assert "Not a label: nonsense" in content
+    assert list(
+        PrintAttempt.objects.order_by("pk").values_list("dropped_off", flat=True)
+    ) == [True, True, False]
+
+
+@pytest.mark.django_db
+def test_scan_requires_staff(client_user):
+    resp = client_user.get(SCAN)
+    assert resp.status_code == 302
+    assert "/admin/login/" in resp.url
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import stl_generator
+from stl_generator.cache import ArtifactCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(tmp_path / "cache", max_bytes=100, evict_interval=0)
+
+
+def test_key():
+    assert ArtifactCache.key("ab", "c") != ArtifactCache.key("a", "bc")
+    assert ArtifactCache.key("a", b"b") == ArtifactCache.key(b"a", "b")
+
+
+def test_get_put(cache, tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.write_bytes(b"gcode")
+    assert not cache.get("abcd", dst)
+    cache.put("abcd", src)
+    assert cache.get("abcd", dst)
+    assert dst.read_bytes() == b"gcode"
+
+
+def test_evict_least_recently_used(cache, tmp_path):
+    src = tmp_path / "src"
+    src.write_bytes(b"x" * 40)
+    for i, key in enumerate(["aa", "bb"]):
+        cache.put(key, src)
+        os.utime(cache.path(key), (i, i))
+    # reading aa makes bb the least recently used entry
+    cache.get("aa", tmp_path / "dst")
+    cache.put("cc", src)
+    assert cache.path("aa").exists()
+    assert not cache.path("bb").exists()
+    assert cache.path("cc").exists()
+
+
+def test_evict_interval(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=100)
+    src = tmp_path / "src"
+    src.write_bytes(b"x" * 40)
+    for key in ["aa", "bb", "cc"]:
+        cache.put(key, src)
+    # the first put evicted, the next ones wait for the interval
+    assert cache.path("aa").exists()
+    os.utime(cache.root / "evicted", (0, 0))
+    cache.put("dd", src)
+    assert len(list(cache.root.glob("*/*"))) == 2
+
+
+def test_put_too_large(cache, tmp_path):
+    src = tmp_path / "src"
+    src.write_bytes(b"x" * 40)
+    cache.put("aa", src)
+    src.write_bytes(b"x" * 101)
+    cache.put("bb", src)
+    assert cache.path("aa").exists()
+    assert not cache.path("bb").exists()
+
+
+def test_cached_tool(cache, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(stl_generator, "tool_version", lambda tool: "1.0")
+    monkeypatch.setattr(
+        stl_generator.subprocess,
+        "check_call",
+        lambda args: calls.append(args) or open(args[-1], "w").write("gcode"),
+    )
+    stl = tmp_path / "part.stl"
+    stl.write_bytes(b"solid")
+    for expected_hit in (False, True):
+        with open(tmp_path / "out.gcode", "wb") as f_gcode:
+            assert stl_generator.stl_to_gcode(stl, f_gcode, cache=cache) is expected_hit
+        assert (tmp_path / "out.gcode").read_text() == "gcode"
+    assert len(calls) == 1
@@ -0,0 +1,53 @@
+import re
+
+import pytest
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+
+from crowdprinter import assets
+
+
+def test_sprite_up_to_date():
+    call_command("buildsprite", "--check")
+
+
+def test_icon_symbol():
+    symbol = assets.icon_symbol("close--filled")
+    assert symbol.get("id") == "close--filled"
+    assert symbol.get("viewBox") == "0 0 32 32"
+    # the invisible helper shapes are dropped, no classes are left
+    assert [child.tag.split("}")[1] for child in symbol] == ["path"]
+    assert not [child for child in symbol.iter() if child.get("class")]
+
+
+def test_references():
+    css = 'a { background: url("../img/a.svg#x"); } b { src: url(data:x) }'
+    css += "\n/*# sourceMappingURL=style.css.map */"
+    assert assets.references("app/styles/style.css", css) == {
+        "app/img/a.svg",
+        "app/styles/style.css.map",
+    }
+
+
+def test_finder():
+    paths = {
+        path
+        for path, storage in finders.get_finder(
+            "crowdprinter.assets.ReferencedAppDirectoriesFinder"
+        ).list([])
+    }
+    assert assets.SPRITE in paths
+    assert "crowdprinter/c3ioc/fonts/Ubuntu-R.woff2" in paths
+    assert "crowdprinter/38c3/icons/32/logo--github.svg" not in paths
+    # other apps keep all their files
+    assert "admin/css/base.css" in paths
+    assert finders.find("crowdprinter/38c3/icons/32/logo--github.svg") is None
+    assert finders.find(assets.SPRITE)
+
+
+@pytest.mark.django_db
+def test_icon_tag(client):
+    content = client.get("/").content.decode()
+    assert 'aria-label="Link zu GitHub"' in content
+    assert re.search(r"/icons\.\w+\.svg#logo--github\"", content)
+    assert "icons/32/" not in content
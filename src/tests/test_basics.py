@@ -43,7 +43,7 @@ def test_detail_noauth(client, job_basic):
     resp = client.get(f"/printjob/{job_basic.slug}/")
     assert resp.status_code == 200
     content = resp.content.decode()
-    assert "need to be logged in" in content
+    assert "Bitte melde dich an" in content
 
 
 @pytest.mark.django_db
@@ -0,0 +1,85 @@
+import collections
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+import stl_generator
+from stl_generator import braille
+from stl_generator import mesh
+
+
+def open_edges(triangles):
+    # in a closed mesh every edge is used once in each direction
+    edges = collections.Counter()
+    for triangle in np.round(triangles, 5).tolist():
+        for a, b in [(0, 1), (1, 2), (2, 0)]:
+            edges[tuple(triangle[a]), tuple(triangle[b])] += 1
+    return [
+        edge
+        for edge, count in edges.items()
+        if count != 1 or edges[edge[1], edge[0]] != 1
+    ]
+
+
+def mesh_volume(triangles):
+    cross = np.cross(triangles[:, 1], triangles[:, 2])
+    return np.einsum("ij,ij->", triangles[:, 0], cross) / 6
+
+
+def test_cells():
+    assert braille.cells("Ab 1/") == ["1", "12", "", "3456", "1", "5", "2"]
+    with pytest.raises(ValueError):
+        braille.cells("a€")
+
+
+@pytest.mark.parametrize("oese", [False, True])
+def test_closed(oese):
+    triangles = braille.sign_triangles("zimmer 12", oese=oese)
+    assert not open_edges(triangles)
+
+
+def test_sign(tmp_path):
+    path = tmp_path / "sign.stl"
+    with open(path, "wb") as f:
+        braille.text_to_stl("Klo 1", f)
+    info = mesh.mesh_info(path)
+    # 6 cells of 6.4 mm, the rounding of the plate doesn't reach its corners
+    rounding = 1 - np.sin(np.radians(75))
+    assert info["size_x"] == pytest.approx(6 * 6.4 + 1 - 2 * rounding, abs=1e-4)
+    assert info["size_y"] == pytest.approx(10 - 2 * rounding, abs=1e-4)
+    assert info["size_z"] == pytest.approx(1 + 0.25 + np.cos(np.radians(18)))
+
+    # the dots are separate shells on the plate, each adds the same volume
+    dot_volume = mesh_volume(braille.sign_triangles("a")) - mesh_volume(
+        braille.sign_triangles(" ")
+    )
+    assert dot_volume > 0
+    plate = mesh_volume(braille.sign_triangles("      "))
+    assert info["volume"] == pytest.approx(plate + 13 * dot_volume)
+
+
+def test_scad_string():
+    assert stl_generator.scad_string('a"b\\c\n') == '"a\\"b\\\\c\\n"'
+
+
+@pytest.mark.skipif(not shutil.which("openscad"), reason="needs openscad")
+@pytest.mark.parametrize("text", ["a", "w 1cf zimmer", "äöü ß!"])
+def test_like_openscad(tmp_path, text):
+    path_scad = tmp_path / "sign.scad"
+    path_scad.write_text(
+        f"use<{stl_generator.BASE_DIR / 'generate_braille_lib.scad'}>;"
+        f"Braille({stl_generator.scad_string(text)});"
+    )
+    path_openscad = tmp_path / "openscad.stl"
+    subprocess.check_call(["openscad", path_scad, "-o", path_openscad])
+    path_native = tmp_path / "native.stl"
+    with open(path_native, "wb") as f:
+        braille.text_to_stl(text, f)
+
+    expected = mesh.mesh_info(path_openscad)
+    info = mesh.mesh_info(path_native)
+    for size in ["size_x", "size_y", "size_z"]:
+        assert info[size] == pytest.approx(expected[size], abs=0.01)
+    assert info["volume"] == pytest.approx(expected["volume"], rel=0.01)
@@ -0,0 +1,331 @@
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import make_png
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from prometheus_client import REGISTRY
+
+import stl_generator
+from crowdprinter import builds
+from crowdprinter.models import BuildState
+from crowdprinter.models import BuildStep
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+from crowdprinter.models import PrintJobFile
+from stl_generator import mesh
+
+
+def run_worker():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        builds.run_worker(executor, 2, once=True, poll_interval=0.01)
+
+
+@pytest.mark.django_db
+def test_build_text_job(admin_client, printer_prusa_mini, fake_tools):
+    resp = admin_client.post(
+        "/create/text",
+        {"slug": "sign", "priority": 1, "count_needed": 1, "text": "Klo"},
+    )
+    assert resp.status_code == 302
+    job = PrintJob.objects.get()
+    assert job.build_state == BuildState.BUILDING
+    assert job.build_steps.count() == 4
+    job.public = True
+    job.save()
+    assert "/printjob/sign/" not in admin_client.get("/").content.decode()
+
+    run_worker()
+
+    job.refresh_from_db()
+    assert job.build_state == BuildState.READY
+    assert job.file_stl.read() == b"stl"
+    assert job.file_render.read() == make_png()
+    assert job.render_variants
+    resp = admin_client.get("/printjob/sign/render/thumb.avif")
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "image/avif"
+    assert job.files.get().file_gcode.read() == b"gcode"
+    assert job.files.get().printer == printer_prusa_mini
+    assert "/printjob/sign/" in admin_client.get("/").content.decode()
+
+
+@pytest.mark.django_db
+def test_build_native_sign(settings, job_basic, printer_prusa_mini, fake_tools):
+    settings.CROWDPRINTER_SIGN_GENERATOR = "native"
+    builds.enqueue(job_basic, text="Klo", profile_letters=False)
+    run_worker()
+
+    job_basic.refresh_from_db()
+    assert job_basic.build_state == BuildState.READY
+    assert len(mesh.read_stl(job_basic.file_stl.path)) > 0
+
+
+# with profile letters, or characters without Braille cells, openscad builds it
+@pytest.mark.django_db
+@pytest.mark.parametrize("text, profile_letters", [("Klo", True), ("Klo €", False)])
+def test_build_native_sign_fallback(
+    settings,
+    job_basic,
+    printer_prusa_mini,
+    fake_tools,
+    monkeypatch,
+    text,
+    profile_letters,
+):
+    calls = []
+
+    def text_to_stl(source, f_out, cache=None, profile_letters=True):
+        calls.append((source, profile_letters))
+        f_out.write(b"stl")
+        return False
+
+    monkeypatch.setattr(stl_generator, "text_to_stl", text_to_stl)
+    settings.CROWDPRINTER_SIGN_GENERATOR = "native"
+    builds.enqueue(job_basic, text=text, profile_letters=profile_letters)
+    run_worker()
+
+    job_basic.refresh_from_db()
+    assert job_basic.build_state == BuildState.READY
+    assert calls == [(text, profile_letters)]
+
+
+@pytest.mark.django_db
+def test_build_metrics(job_basic, printer_prusa_mini, fake_tools):
+    def runs(step, printer=""):
+        return (
+            REGISTRY.get_sample_value(
+                "crowdprinter_tool_duration_seconds_count",
+                {"step": step, "printer": printer},
+            )
+            or 0
+        )
+
+    before = [runs("render"), runs("gcode", "mini")]
+    builds.enqueue(job_basic)
+    run_worker()
+    assert [runs("render"), runs("gcode", "mini")] == [n + 1 for n in before]
+
+
+@pytest.mark.django_db
+def test_build_retries(job_basic, printer_prusa_mini, fake_tools, monkeypatch):
+    def broken(source, f_out, **kwargs):
+        raise subprocess.CalledProcessError(1, "prusa-slicer")
+
+    monkeypatch.setattr(stl_generator, "stl_to_gcode", broken)
+    PrintJob.objects.update(build_state=BuildState.BUILDING)
+    builds.enqueue(job_basic)
+    run_worker()
+
+    job_basic.refresh_from_db()
+    assert job_basic.build_state == BuildState.FAILED
+    step = job_basic.build_steps.get(step=BuildStep.Step.GCODE)
+    assert step.status == BuildStep.Status.FAILED
+    assert step.tries == 3
+    assert "CalledProcessError" in step.error
+    assert job_basic.build_steps.get(step=BuildStep.Step.RENDER).status == "done"
+
+
+@pytest.mark.django_db
+def test_build_stl_job_without_file(admin_client, printer_prusa_mini, fake_tools):
+    resp = admin_client.post(
+        "/create/stl", {"slug": "part", "priority": 1, "count_needed": 1}
+    )
+    assert resp.status_code == 200
+    assert not PrintJob.objects.exists()
+
+    # one that got queued anyway fails without stopping the worker
+    job = PrintJob.objects.create(slug="part", build_state=BuildState.BUILDING)
+    builds.enqueue(job)
+    run_worker()
+
+    job.refresh_from_db()
+    assert job.build_state == BuildState.FAILED
+    step = job.build_steps.get(step=BuildStep.Step.MESH)
+    assert step.status == BuildStep.Status.FAILED
+    assert "no file associated" in step.error
+
+
+@pytest.mark.django_db
+def test_build_broken_outputs(job_basic, printer_prusa_mini, fake_tools, monkeypatch):
+    monkeypatch.setattr(mesh, "mesh_info", lambda path: {"size_q": 1.0})
+    PrintJob.objects.update(build_state=BuildState.BUILDING)
+    builds.enqueue(job_basic)
+    run_worker()
+
+    job_basic.refresh_from_db()
+    assert job_basic.build_state == BuildState.FAILED
+    step = job_basic.build_steps.get(step=BuildStep.Step.MESH)
+    assert (step.status, step.tries) == (BuildStep.Status.FAILED, 1)
+    assert "size_q" in step.error
+
+
+@pytest.mark.django_db
+def test_take_building(client_user, job_basic):
+    PrintJob.objects.update(build_state=BuildState.BUILDING)
+    resp = client_user.post(f"/printjob/{job_basic.slug}/take")
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+def test_build_all_printers(
+    job_basic, printer_prusa_mini, printer_prusa_xl, fake_tools
+):
+    printer_prusa_xl.slicer_profile = ContentFile(b" xl", name="xl.ini")
+    printer_prusa_xl.save()
+    builds.enqueue(job_basic)
+    run_worker()
+
+    files = {file.printer.slug: file for file in job_basic.files.all()}
+    assert files["mini"].file_gcode.read() == b"gcode"
+    assert files["mini"].profile_hash == ""
+    assert files["xl"].file_gcode.read() == b"gcode xl"
+    assert files["xl"].profile_hash == printer_prusa_xl.profile_hash != ""
+
+
+@pytest.mark.django_db
+def test_build_estimates(job_basic, printer_prusa_mini, fake_tools, monkeypatch):
+    def tool(source, f_out, cache=None, profile=None, color_changes=None):
+        f_out.write(
+            b"G1 X1\n"
+            b"; filament used [g] = 3.68\n"
+            b"; estimated printing time (normal mode) = 1h 2m 3s\n"
+        )
+        return False
+
+    builds.enqueue(job_basic)
+    run_worker()
+    job_basic.refresh_from_db()
+    assert job_basic.size_z == 2.5
+    assert job_basic.volume == 300.0
+    assert job_basic.print_time == 375
+
+    monkeypatch.setattr(stl_generator, "stl_to_gcode", tool)
+    builds.enqueue(job_basic)
+    run_worker()
+    job_basic.refresh_from_db()
+    file = job_basic.files.get()
+    assert file.print_time == job_basic.print_time == 3723
+    assert file.filament_g == job_basic.filament_g == 3.68
+    assert PrintJob.objects.filter(print_time__lt=2 * 3600).exists()
+
+    # reading the mesh again keeps the slicer's estimates
+    call_command("updatemeshinfo", "--all")
+    run_worker()
+    job_basic.refresh_from_db()
+    assert job_basic.print_time == 3723
+    assert job_basic.filament_g == 3.68
+    assert job_basic.volume == 300.0
+
+
+@pytest.mark.django_db
+def test_build_unfit(
+    client_user, user, job_basic, printer_prusa_mini, printer_prusa_xl, fake_tools
+):
+    # 10 x 20 mm only fits turned by 90°
+    printer_prusa_xl.build_x, printer_prusa_xl.build_y = 25, 15
+    printer_prusa_xl.save()
+    printer_prusa_mini.build_x = printer_prusa_mini.build_y = 15
+    printer_prusa_mini.save()
+    builds.enqueue(job_basic)
+    run_worker()
+    assert [file.printer for file in job_basic.files.all()] == [printer_prusa_xl]
+    assert list(job_basic.unfit_printers.all()) == [printer_prusa_mini]
+    # no slicing for printers the part doesn't fit
+    call_command("reslice")
+    assert not BuildStep.objects.exclude(status=BuildStep.Status.DONE).exists()
+
+    PrintAttempt.objects.create(job=job_basic, user=user)
+    content = client_user.get(f"/printjob/{job_basic.slug}/").content.decode()
+    assert "Zu groß für diesen Drucker" in content
+    resp = client_user.get(f"/printjob/{job_basic.slug}/file/mini/gcode")
+    assert resp.status_code == 404
+
+    printer_prusa_mini.build_y = 25
+    printer_prusa_mini.save()
+    call_command("reslice")
+    run_worker()
+    assert job_basic.files.count() == 2
+    assert not job_basic.unfit_printers.exists()
+
+
+@pytest.mark.django_db
+def test_build_color_changes(
+    job_basic, printer_prusa_mini, printer_prusa_xl, fake_tools, monkeypatch
+):
+    seen = []
+
+    def tool(source, f_out, cache=None, profile=None, color_changes=None):
+        seen.append(color_changes)
+        return False
+
+    monkeypatch.setattr(stl_generator, "stl_to_gcode", tool)
+    printer_prusa_xl.color_changes = "1.5,3"
+    printer_prusa_xl.save()
+
+    def build(job_color_changes):
+        seen.clear()
+        job_basic.color_changes = job_color_changes
+        job_basic.save()
+        builds.enqueue(job_basic)
+        run_worker()
+        return sorted(seen)
+
+    assert build("") == ["1.5,3", "2.15"]
+    assert build("4") == ["4", "4"]
+    assert build("0") == ["", ""]
+
+
+@pytest.mark.django_db
+def test_build_retries_ready(job_basic, printer_prusa_mini, fake_tools, monkeypatch):
+    def broken(source, f_out, **kwargs):
+        raise subprocess.CalledProcessError(1, "prusa-slicer")
+
+    builds.enqueue(job_basic)
+    run_worker()
+    monkeypatch.setattr(stl_generator, "stl_to_gcode", broken)
+    PrintJobFile.objects.update(profile_hash="outdated")
+    call_command("reslice")
+    call_command("updatemeshinfo", "--all")
+    run_worker()
+
+    # the job keeps its G-code and stays on the list
+    job_basic.refresh_from_db()
+    assert job_basic.build_state == BuildState.READY
+    assert job_basic.build_steps.filter(status=BuildStep.Status.FAILED).count() == 1
+    assert job_basic.files.get().file_gcode.read() == b"gcode"
+
+
+@pytest.mark.django_db
+def test_reslice(
+    job_basic,
+    printer_prusa_mini,
+    printer_prusa_xl,
+    fake_tools,
+    django_capture_on_commit_callbacks,
+):
+    builds.enqueue(job_basic)
+    run_worker()
+    call_command("reslice")
+    assert not BuildStep.objects.exclude(status=BuildStep.Status.DONE).exists()
+
+    printer_prusa_xl.slicer_profile = ContentFile(b" xl", name="xl.ini")
+    printer_prusa_xl.save()
+    PrintJobFile.objects.filter(printer=printer_prusa_mini).delete()
+    call_command("reslice")
+    step = BuildStep.objects.get(status=BuildStep.Status.QUEUED)
+    assert step.argument == "mini,xl"
+    # already queued
+    call_command("reslice")
+    assert BuildStep.objects.filter(status=BuildStep.Status.QUEUED).count() == 1
+
+    replaced = job_basic.files.get(printer=printer_prusa_xl).file_gcode
+    with django_capture_on_commit_callbacks(execute=True):
+        run_worker()
+    assert job_basic.files.get(printer=printer_prusa_xl).file_gcode.read() == (
+        b"gcode xl"
+    )
+    assert job_basic.files.count() == 2
+    # the replaced G-code is removed from the storage
+    assert not replaced.storage.exists(replaced.name)
@@ -0,0 +1,75 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache import caches
+from prometheus_client import REGISTRY
+
+from crowdprinter import caching
+from crowdprinter.models import PrintAttempt
+from crowdprinter.progress import get_progress
+
+
+def cache_requests(result):
+    return (
+        REGISTRY.get_sample_value(
+            "crowdprinter_cache_requests_total", {"cache": "job", "result": result}
+        )
+        or 0
+    )
+
+
+@pytest.mark.django_db
+def test_progress(user, job_basic):
+    job_basic.public = True
+    job_basic.save()
+    assert get_progress()["done_count"] == 0
+    PrintAttempt.objects.create(job=job_basic, user=user, finished=True)
+    assert get_progress()["done_count"] == 1
+
+
+@pytest.mark.django_db
+def test_list(client, user, job_basic):
+    job_basic.public = True
+    job_basic.save()
+    assert "/printjob/job_basic/" in client.get("/").content.decode()
+    PrintAttempt.objects.create(job=job_basic, user=user)
+    assert "/printjob/job_basic/" not in client.get("/").content.decode()
+
+
+@pytest.mark.django_db
+def test_detail(client_user, job_basic):
+    url = "/printjob/job_basic/"
+    client_user.get(url)
+    hits, misses = cache_requests("hit"), cache_requests("miss")
+    assert "Mehr Drucke benötigt" in client_user.get(url).content.decode()
+    assert (cache_requests("hit"), cache_requests("miss")) == (hits + 1, misses)
+
+    job_basic.comment = "Bitte in Weiß"
+    job_basic.save()
+    assert "Bitte in Weiß" in client_user.get(url).content.decode()
+    other = get_user_model().objects.create_user("other")
+    PrintAttempt.objects.create(job=job_basic, user=other)
+    assert "Keine Drucke mehr nötig" in client_user.get(url).content.decode()
+    assert cache_requests("miss") == misses + 2
+    assert client_user.get("/printjob/missing/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_evicted_version():
+    assert caching.get_or_set("test", lambda: 1, ["test"]) == 1
+    assert caching.get_or_set("test", lambda: 2, ["test"]) == 1
+    cache.delete(caching.version_key("test"))
+    assert caching.get_or_set("test", lambda: 3, ["test"]) == 3
+    caching.invalidate("test")
+    assert caching.get_or_set("test", lambda: 4, ["test"]) == 4
+
+
+@pytest.mark.django_db
+def test_shared_between_processes(monkeypatch):
+    assert caching.get_or_set("test", lambda: 1, ["test"]) == 1
+    # the build worker's cache, in another process, on the same files
+    worker_cache = caches.create_connection("default")
+    monkeypatch.setattr(caching, "cache", worker_cache)
+    caching.bump(["test"])
+    monkeypatch.undo()
+    assert caching.get_or_set("test", lambda: 2, ["test"]) == 2
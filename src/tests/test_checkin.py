@@ -0,0 +1,133 @@
+import json
+
+import pytest
+from conftest import make_attempts
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from crowdprinter import bulk
+from crowdprinter import labels
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+
+def post_codes(client, codes):
+    return client.post(
+        "/checkin", json.dumps({"codes": codes}), content_type="application/json"
+    )
+
+
+def test_parse_attempt_code():
+    assert bulk.parse_attempt_code("12/job-a_1") == (12, "job-a_1")
+    assert bulk.parse_attempt_code(" 12 ") == (12, None)
+    assert bulk.parse_attempt_code("https://example.org/a/34/job/") == (34, "job")
+    assert bulk.parse_attempt_code("label") is None
+    # slugs and other text ending in digits aren't ids
+    assert bulk.parse_attempt_code("job_2") is None
+    assert bulk.parse_attempt_code("braille_sign_12") is None
+    assert bulk.parse_attempt_code("12-34") is None
+    assert bulk.parse_attempt_code("https://example.org/a/34/") is None
+
+
+@pytest.mark.django_db
+def test_check_in(user):
+    first, second, third = make_attempts(user, 3)
+    codes = [
+        bulk.attempt_code(first),
+        str(second.pk),
+        f"{third.pk}/job_0",
+        "99999/job_0",
+        "label",
+        "job_1",
+    ]
+
+    checked_in, unknown, invalid = bulk.check_in(codes)
+
+    assert checked_in == codes[:2]
+    assert unknown == codes[2:4]
+    assert invalid == ["label", "job_1"]
+    assert list(
+        PrintAttempt.objects.order_by("pk").values_list("dropped_off", "finished")
+    ) == [(True, True), (True, True), (False, False)]
+    assert list(
+        PrintJob.objects.order_by("pk").values_list("finished_count", flat=True)
+    ) == [1, 1, 0]
+    # scanning again, e.g. when a sync is retried, reports them again
+    assert bulk.check_in(codes[:1]) == (codes[:1], [], [])
+
+
+@pytest.mark.django_db
+def test_check_in_queries(user):
+    attempts = make_attempts(user, 11)
+    with CaptureQueriesContext(connection) as one:
+        bulk.check_in([bulk.attempt_code(attempts[0])])
+    with CaptureQueriesContext(connection) as many:
+        bulk.check_in([bulk.attempt_code(attempt) for attempt in attempts[1:]])
+    assert len(many.captured_queries) == len(one.captured_queries)
+
+
+@pytest.mark.django_db
+def test_checkin_view(admin_client, user):
+    (attempt,) = make_attempts(user, 1)
+    assert admin_client.get("/checkin").status_code == 200
+
+    resp = post_codes(admin_client, [bulk.attempt_code(attempt), "x"])
+
+    assert resp.json() == {
+        "checked_in": [bulk.attempt_code(attempt)],
+        "unknown": [],
+        "invalid": ["x"],
+    }
+    attempt.refresh_from_db()
+    assert attempt.dropped_off is True
+
+
+@pytest.mark.django_db
+def test_checkin_view_invalid(admin_client):
+    assert post_codes(admin_client, "1/job").status_code == 400
+    resp = admin_client.post("/checkin", "{", content_type="application/json")
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_checkin_view_requires_superuser(client_user, user):
+    (attempt,) = make_attempts(user, 1)
+    assert post_codes(client_user, [bulk.attempt_code(attempt)]).status_code == 403
+    attempt.refresh_from_db()
+    assert attempt.dropped_off is False
+
+
+@pytest.mark.django_db
+def test_label_pages(settings, user):
+    settings.CROWDPRINTER_LABEL_GRID = (2, 3)
+    attempts = make_attempts(user, 7)
+
+    pages = labels.label_pages(attempts)
+
+    assert len(pages) == 2
+    assert pages[0].size == labels.PAGE_SIZE
+    # the QR code of the first label starts after the padding
+    assert pages[0].getpixel((labels.PADDING, labels.PADDING + 10)) == 255
+    assert min(pages[0].crop((0, 0, 400, 400)).getdata()) == 0
+
+
+@pytest.mark.django_db
+def test_print_labels_action(admin_client, user):
+    attempts = make_attempts(user, 2)
+
+    resp = admin_client.post(
+        "/admin/crowdprinter/printattempt/",
+        {
+            "action": "print_labels",
+            "_selected_action": [attempt.pk for attempt in attempts],
+        },
+    )
+
+    assert resp["Content-Type"] == "application/pdf"
+    assert resp.content.startswith(b"%PDF")
+
+    resp = admin_client.post(
+        "/admin/crowdprinter/printjob/",
+        {"action": "print_labels", "_selected_action": ["job_0"]},
+    )
+    assert resp.content.startswith(b"%PDF")
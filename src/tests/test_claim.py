@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+from conftest import make_job
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.db import connection
+
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+
+@pytest.mark.django_db
+def test_claim_user_limit(user, settings):
+    settings.CROWDPRINTER_DEFAULT_MAX_ATTEMPTS = 2
+    jobs = [make_job(f"job_{i}") for i in range(3)]
+    assert jobs[0].claim(user)
+    assert jobs[0].claim(user) is None  # already attempting
+    assert jobs[1].claim(user)
+    assert jobs[2].claim(user) is None  # limit reached
+
+    user.max_attempts = 0
+    user.save()
+    assert jobs[2].claim(user)
+    assert PrintJob.objects.get(slug="job_2").running_or_finished_count == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_claim_concurrent():
+    claims, needed = 12, 3
+    job = make_job("popular", count_needed=needed)
+    users = [
+        get_user_model().objects.create_user(f"user_{i}", f"user_{i}@example.org")
+        for i in range(claims)
+    ]
+    barrier = threading.Barrier(claims)
+    results = []
+
+    def claim(user):
+        barrier.wait()
+        try:
+            while True:
+                try:
+                    results.append(job.claim(user))
+                    return
+                except OperationalError:
+                    # sqlite reports lock contention instead of waiting
+                    pass
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=claim, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == claims
+    assert len([attempt for attempt in results if attempt]) == needed
+    assert PrintAttempt.objects.filter(job=job).count() == needed
+    job.refresh_from_db()
+    assert job.running_or_finished_count == needed
+    assert job.can_attempt is False
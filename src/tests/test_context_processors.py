@@ -0,0 +1,27 @@
+import pytest
+
+from crowdprinter.context_processors import add_header_footer_stls
+from crowdprinter.context_processors import get_sample_pool
+
+
+@pytest.mark.django_db
+def test_header_footer_lazy(django_assert_num_queries, job_basic_x50):
+    with django_assert_num_queries(0):
+        add_header_footer_stls(None)
+
+
+@pytest.mark.django_db
+def test_header_footer_sample(django_assert_num_queries, job_basic_x50):
+    with django_assert_num_queries(1):
+        context = add_header_footer_stls(None)
+        assert len(context["stls_header"]) == 40
+    with django_assert_num_queries(0):
+        assert len(set(context["stls_footer"])) == 40
+        assert set(context["stls_footer"]) <= {job.slug for job in job_basic_x50}
+
+
+@pytest.mark.django_db
+def test_sample_pool_invalidated(job_basic):
+    assert get_sample_pool() == [job_basic.slug]
+    job_basic.delete()
+    assert get_sample_pool() == []
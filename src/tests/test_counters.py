@@ -0,0 +1,61 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+
+@pytest.mark.django_db
+def test_counters_take_give_back(client_user, job_basic):
+    client_user.post(f"/printjob/{job_basic.slug}/take")
+    job_basic.refresh_from_db()
+    assert job_basic.finished_count == 0
+    assert job_basic.running_or_finished_count == 1
+    assert job_basic.can_attempt is False
+    assert job_basic.finished is False
+
+    client_user.post(f"/printjob/{job_basic.slug}/give_back")
+    job_basic.refresh_from_db()
+    assert job_basic.running_or_finished_count == 0
+    assert job_basic.can_attempt is True
+
+
+@pytest.mark.django_db
+def test_counters_done(client_user, job_taken):
+    client_user.post(f"/printjob/{job_taken.slug}/done")
+    job_taken.refresh_from_db()
+    assert job_taken.finished_count == 1
+    assert job_taken.running_or_finished_count == 1
+    assert job_taken.finished is True
+
+
+@pytest.mark.django_db
+def test_counters_count_needed_changed(job_taken):
+    job_taken.count_needed = 2
+    job_taken.save()
+    job_taken.refresh_from_db()
+    assert job_taken.can_attempt is True
+
+
+@pytest.mark.django_db
+def test_counters_attempt_moved(job_taken, job_basic):
+    attempt = PrintAttempt.objects.get()
+    attempt.job = job_basic
+    attempt.save()
+    assert PrintJob.objects.get(slug=job_taken.slug).running_or_finished_count == 0
+    assert PrintJob.objects.get(slug=job_basic.slug).running_or_finished_count == 1
+
+    attempt.delete()
+    assert PrintJob.objects.get(slug=job_basic.slug).running_or_finished_count == 0
+
+
+@pytest.mark.django_db
+def test_recountjobs(job_taken):
+    PrintJob.objects.update(running_or_finished_count=0)
+    with pytest.raises(CommandError):
+        call_command("recountjobs", "--check")
+
+    call_command("recountjobs")
+    assert PrintJob.objects.get().running_or_finished_count == 1
+    call_command("recountjobs", "--check")
@@ -0,0 +1,73 @@
+import os
+import stat
+
+import pytest
+
+import stl_generator
+from stl_generator import display
+
+
+def write_script(path, content):
+    path.write_text("#!/bin/sh\n" + content)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    """
+    Fake Xvfb, xvfb-run and openscad. The rendered PNG contains the display
+    it was rendered on, every start of an X server is logged to `starts`.
+    """
+    bin = tmp_path / "bin"
+    bin.mkdir()
+    starts = tmp_path / "starts"
+    # called as: Xvfb -displayfd FD ...
+    write_script(
+        bin / "Xvfb",
+        f"echo xvfb >> {starts}\necho 42 > /proc/self/fd/$2\nexec sleep 60\n",
+    )
+    write_script(
+        bin / "xvfb-run",
+        f'echo xvfb-run >> {starts}\nshift\nDISPLAY=:99 exec "$@"\n',
+    )
+    # called as: openscad FILE.scad -o FILE.png ...
+    write_script(bin / "openscad", 'echo "$DISPLAY" > "$3"\n')
+    monkeypatch.setenv("PATH", f"{bin}:{os.environ['PATH']}")
+    monkeypatch.setattr(stl_generator, "tool_version", lambda tool: tool)
+    yield starts
+    display.close_display()
+
+
+def render(tmp_path, count, **kwargs):
+    paths_stl = []
+    for i in range(count):
+        path = tmp_path / f"{i}.stl"
+        path.write_bytes(b"solid %d" % i)
+        paths_stl.append(path)
+    outputs = stl_generator.stl_to_pngs(paths_stl, **kwargs)
+    try:
+        return [open(path).read().strip() for path, _ in outputs]
+    finally:
+        for path, _ in outputs:
+            os.unlink(path)
+
+
+def test_persistent_display(fake_bin, tmp_path):
+    assert render(tmp_path, 6, workers=3) == [":42"] * 6
+    assert render(tmp_path, 2) == [":42"] * 2
+    assert fake_bin.read_text() == "xvfb\n"
+
+
+def test_restart_display(fake_bin, tmp_path):
+    render(tmp_path, 1)
+    xvfb = display.get_display().process
+    xvfb.kill()
+    xvfb.wait()
+    assert render(tmp_path, 1) == [":42"]
+    assert fake_bin.read_text() == "xvfb\nxvfb\n"
+
+
+def test_without_xvfb(fake_bin, tmp_path):
+    os.unlink(fake_bin.parent / "bin" / "Xvfb")
+    assert render(tmp_path, 2) == [":99"] * 2
+    assert fake_bin.read_text() == "xvfb-run\nxvfb-run\n"
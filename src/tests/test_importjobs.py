@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from crowdprinter.models import BuildState
+from crowdprinter.models import BuildStep
+from crowdprinter.models import PrintJob
+
+
+@pytest.fixture
+def stl_dir(tmp_path):
+    for i in range(5):
+        (tmp_path / f"Part {i}.stl").write_bytes(b"solid part")
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_importjobs_directory(stl_dir):
+    call_command("importjobs", str(stl_dir), "--no-build", "--batch-size", "2")
+    jobs = PrintJob.objects.order_by("slug")
+    assert [job.slug for job in jobs] == [f"part-{i}" for i in range(5)]
+    for job in jobs:
+        assert job.build_state == BuildState.BUILDING
+        assert job.file_stl.read() == b"solid part"
+        assert sorted(job.build_steps.values_list("step", flat=True)) == [
+            "gcode",
+            "mesh",
+            "render",
+        ]
+
+
+@pytest.mark.django_db
+def test_importjobs_resume(stl_dir):
+    call_command("importjobs", str(stl_dir / "Part 1.stl"), "--no-build")
+    call_command("importjobs", str(stl_dir / "*.stl"), "--no-build")
+    assert PrintJob.objects.count() == 5
+    assert PrintJob.objects.get(slug="part-1").build_steps.count() == 3
+
+
+@pytest.mark.django_db
+def test_importjobs_manifest(stl_dir):
+    manifest = stl_dir / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            [
+                {"slug": "klo", "priority": 3, "count_needed": 2, "text": "Klo"},
+                {"stl": "Part 0.stl", "priority": 5},
+            ]
+        )
+    )
+    call_command("importjobs", str(manifest), "--no-build", "--public")
+    klo = PrintJob.objects.get(slug="klo")
+    assert (klo.priority, klo.count_needed, klo.public) == (3, 2, True)
+    assert json.loads(klo.build_steps.get(step="stl").argument) == {
+        "text": "Klo",
+        "profile_letters": True,
+    }
+    assert PrintJob.objects.get(slug="part-0").priority == 5
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "row",
+    [
+        {"slug": "klo", "text": "Klo", "color_changes": "10,abc"},
+        {"slug": "klo", "text": "Klo", "count_needed": -1},
+        {"slug": "klo", "text": "Klo", "priority": "high"},
+    ],
+)
+def test_importjobs_invalid_row(tmp_path, row):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([row]))
+    with pytest.raises(CommandError, match="invalid manifest row"):
+        call_command("importjobs", str(manifest), "--no-build")
+    assert not PrintJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_importjobs_build(stl_dir, printer_prusa_mini, fake_tools, capsys):
+    call_command("importjobs", str(stl_dir / "Part 1.stl"), "--no-build")
+    # as left by an interrupted import
+    BuildStep.objects.update(status=BuildStep.Status.RUNNING)
+
+    call_command("importjobs", str(stl_dir), "--processes", "1")
+
+    assert "built 5 parts" in capsys.readouterr().out
+    assert set(PrintJob.objects.values_list("build_state", flat=True)) == {
+        BuildState.READY
+    }
@@ -0,0 +1,13 @@
+import pytest
+from django.core.management import call_command
+
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+
+@pytest.mark.django_db
+def test_hot_queries_use_indexes():
+    call_command("explainqueries", jobs=500, attempts=5000, check=True)
+    # the generated data is rolled back
+    assert not PrintJob.objects.exists()
+    assert not PrintAttempt.objects.exists()
@@ -0,0 +1,63 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from stl_generator import insert_m600
+
+GCODE = (
+    "G1 Z0.2\n"
+    ";Z:0.2\n"
+    "G1 X1\n"
+    ";Z:2.15\n"
+    "G1 X2\n"
+    ";Z:12.15\n"
+    "G1 X3\n"
+    ";Z:4.300\n"
+    "G1 X4\n"
+)
+
+
+@pytest.fixture
+def gcode_file(tmp_path):
+    path = tmp_path / "part.gcode"
+    path.write_text(GCODE)
+    path.chmod(0o644)
+    return path
+
+
+def test_insert_heights(gcode_file):
+    insert_m600.process_file(gcode_file, insert_m600.parse_heights("2.15,4.3"))
+    lines = gcode_file.read_text().splitlines()
+    assert lines.count("M600 ; filament change") == 2
+    assert lines[lines.index(";Z:2.15") + 1] == "M600 ; filament change"
+    assert lines[lines.index(";Z:4.300") + 1] == "M600 ; filament change"
+    assert lines[lines.index(";Z:12.15") + 1] == "G1 X3"
+
+
+def test_keeps_file(gcode_file):
+    insert_m600.process_file(gcode_file, set())
+    assert gcode_file.read_text() == GCODE
+    assert gcode_file.stat().st_mode & 0o777 == 0o644
+    assert os.listdir(gcode_file.parent) == ["part.gcode"]
+
+
+def test_script(gcode_file):
+    # called like prusa-slicer does, with the G-code file as last argument
+    subprocess.check_call([sys.executable, insert_m600.__file__, str(gcode_file)])
+    assert "\n;Z:2.15\nM600 ; filament change\n" in gcode_file.read_text()
+
+
+def test_chunk_boundaries(tmp_path):
+    heights = insert_m600.parse_heights("2.15,4.3")
+    path_expected = tmp_path / "expected.gcode"
+    path_expected.write_text(GCODE)
+    insert_m600.process_file(path_expected, heights)
+    for buffer_size in range(1, 20):
+        f_out = io.BytesIO()
+        insert_m600.insert_m600(
+            io.BytesIO(GCODE.encode()), f_out, heights, buffer_size=buffer_size
+        )
+        assert f_out.getvalue() == path_expected.read_bytes()
@@ -0,0 +1,83 @@
+import datetime
+
+import pytest
+from conftest import make_job
+from django.core.management import call_command
+
+from crowdprinter import leases
+from crowdprinter.models import LiveEvent
+from crowdprinter.models import PrintAttempt
+
+
+def make_attempt(user, slug, days_ago, **kwargs):
+    attempt = PrintAttempt.objects.create(
+        job=make_job(slug, public=True, **kwargs), user=user
+    )
+    started = datetime.date.today() - datetime.timedelta(days=days_ago)
+    PrintAttempt.objects.filter(pk=attempt.pk).update(started=started)
+    attempt.refresh_from_db()
+    return attempt
+
+
+@pytest.mark.django_db
+def test_expire_attempts(settings, user):
+    settings.CROWDPRINTER_ATTEMPT_LEASE_DAYS = 7
+    old = make_attempt(user, "old", 8)
+    last_day = make_attempt(user, "last_day", 7)
+    assert old.job.can_attempt is False
+
+    call_command("expireattempts")
+
+    old.refresh_from_db()
+    assert old.ended == datetime.date.today()
+    assert old.expired is True
+    assert old.finished is False
+    old.job.refresh_from_db()
+    assert old.job.running_or_finished_count == 0
+    assert old.job.can_attempt is True
+    assert list(LiveEvent.objects.values_list("data", flat=True)) == [
+        {"slug": "old", "available": True}
+    ]
+
+    last_day.refresh_from_db()
+    assert last_day.ended is None
+    assert last_day.expires == datetime.date.today()
+
+
+@pytest.mark.django_db
+def test_expire_attempts_batches(settings, user):
+    settings.CROWDPRINTER_ATTEMPT_LEASE_DAYS = 7
+    for i in range(5):
+        make_attempt(user, f"job_{i}", 10, count_needed=2)
+
+    assert leases.expire_attempts(batch_size=2) == 5
+    assert not PrintAttempt.objects.filter(ended__isnull=True).exists()
+    # no job became available again
+    assert not LiveEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_send_reminders(settings, user, mailoutbox):
+    settings.CROWDPRINTER_ATTEMPT_LEASE_DAYS = 7
+    due = make_attempt(user, "due", 6)
+    make_attempt(user, "not_due", 5)
+
+    assert leases.send_reminders() == 1
+    assert len(mailoutbox) == 1
+    assert mailoutbox[0].to == ["user@example.org"]
+    assert "\n" not in mailoutbox[0].subject
+    assert f"{settings.CROWDPRINTER_EXTERNAL_URL}/printjob/due/" in mailoutbox[0].body
+    due.refresh_from_db()
+    assert due.reminded == datetime.date.today()
+
+    # once per attempt
+    assert leases.send_reminders() == 0
+
+
+@pytest.mark.django_db
+def test_expire_attempts_without_lease(user):
+    attempt = make_attempt(user, "old", 1000)
+    call_command("expireattempts")
+    attempt.refresh_from_db()
+    assert attempt.ended is None
+    assert attempt.expires is None
@@ -0,0 +1,85 @@
+import re
+
+import pytest
+
+from crowdprinter.models import PrintJob
+
+
+def job_slugs(content):
+    return re.findall('/printjob/([^/]+)/"', content)
+
+
+def next_page(content):
+    match = re.search('data-fragment="([^"]+)"', content)
+    return match and match.group(1).replace("&amp;", "&")
+
+
+@pytest.mark.django_db
+def test_index_pages(client, settings, job_basic_x50):
+    settings.CROWDPRINTER_LIST_PAGE_SIZE = 30
+    resp = client.get("/")
+    content = resp.content.decode()
+    slugs = job_slugs(content)
+    assert len(slugs) == 30
+    url = next_page(content)
+    pages = 1
+    while url:
+        resp = client.get(f"/{url}")
+        assert resp.status_code == 200
+        assert "public" in resp["Cache-Control"]
+        content = resp.content.decode()
+        assert "<html" not in content
+        slugs += job_slugs(content)
+        url = next_page(content)
+        pages += 1
+    assert pages == 4
+    assert sorted(slugs) == sorted(job.slug for job in job_basic_x50)
+
+
+@pytest.mark.django_db
+def test_index_seeded(client, job_basic_x50):
+    first = job_slugs(client.get("/").content.decode())
+    seed = client.session["shuffle_seed"]
+    assert first == job_slugs(client.get("/").content.decode())
+    other_seed = seed % 32 + 1
+    other = job_slugs(client.get(f"/?seed={other_seed}").content.decode())
+    assert first != other
+
+
+@pytest.mark.django_db
+def test_index_priority(client, job_basic_x50):
+    PrintJob.objects.filter(slug="job_basic_42").update(priority=1)
+    assert job_slugs(client.get("/").content.decode())[0] == "job_basic_42"
+
+
+@pytest.mark.django_db
+def test_index_progress_cached(client, django_assert_max_num_queries, job_basic_x50):
+    client.get("/")
+    # session + seeded page, no aggregates
+    with django_assert_max_num_queries(2):
+        client.get("/?seed=1")
+
+
+@pytest.mark.django_db
+def test_index_bad_cursor(client, job_basic_x50):
+    assert client.get("/?after=foo").status_code == 404
+
+
+@pytest.mark.django_db
+def test_index_print_time(client, settings, job_basic_x50):
+    settings.CROWDPRINTER_LIST_PAGE_SIZE = 10
+    for i, job in enumerate(job_basic_x50):
+        job.print_time = i * 60
+        job.save()
+    short = {job.slug for job in job_basic_x50 if job.print_time <= 3600}
+    content = client.get("/?hours=1").content.decode()
+    slugs = job_slugs(content)
+    url = next_page(content)
+    assert "hours=1" in url
+    while url:
+        content = client.get(f"/{url}").content.decode()
+        slugs += job_slugs(content)
+        url = next_page(content)
+    assert set(slugs) == short
+    # unknown filters are ignored
+    assert len(job_slugs(client.get("/?hours=2").content.decode())) == 10
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from asgiref.sync import sync_to_async
+from conftest import make_job
+from django.test import AsyncClient
+
+from crowdprinter import live
+from crowdprinter.models import LiveEvent
+
+
+def events():
+    return list(LiveEvent.objects.order_by("pk").values_list("kind", "data"))
+
+
+@pytest.mark.django_db
+def test_live_take_give_back(client_user):
+    job = make_job("job_public", public=True)
+    client_user.post(f"/printjob/{job.slug}/take")
+    assert events() == [("job", {"slug": job.slug, "available": False})]
+
+    client_user.post(f"/printjob/{job.slug}/give_back")
+    assert events()[1:] == [("job", {"slug": job.slug, "available": True})]
+
+
+@pytest.mark.django_db
+def test_live_take_still_available(client_user):
+    job = make_job("job_public", public=True, count_needed=2)
+    client_user.post(f"/printjob/{job.slug}/take")
+    assert events() == []
+
+
+@pytest.mark.django_db
+def test_live_take_private(client_user, job_basic):
+    client_user.post(f"/printjob/{job_basic.slug}/take")
+    assert events() == []
+
+
+@pytest.mark.django_db
+def test_live_done(client_user, user):
+    job = make_job("job_public", public=True)
+    client_user.post(f"/printjob/{job.slug}/take")
+    LiveEvent.objects.all().delete()
+
+    client_user.post(f"/printjob/{job.slug}/done")
+    assert events() == [
+        ("progress", {"all_count": 1, "done_count": 1, "progress_percent": 100})
+    ]
+
+
+@pytest.mark.django_db
+def test_live_events_wsgi(client):
+    assert client.get("/events").status_code == 204
+
+
+async def read_events(stream, count):
+    async def read():
+        chunks = []
+        while len(chunks) < count:
+            chunk = await anext(stream)
+            if chunk != b": keepalive\n\n":
+                chunks.append(chunk.decode())
+        return chunks
+
+    # keepalives arrive while waiting, so time out on the events
+    return await asyncio.wait_for(read(), 5)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_live_events_stream(settings):
+    settings.CROWDPRINTER_LIVE_POLL_INTERVAL = 0.01
+    settings.CROWDPRINTER_LIVE_KEEPALIVE = 0.1
+    seen = live.publish(LiveEvent.Kind.JOB, {"slug": "seen", "available": True})
+
+    async def connect(client, **kwargs):
+        response = await client.get("/events", **kwargs)
+        assert response["Content-Type"] == "text/event-stream"
+        stream = aiter(response.streaming_content)
+        assert await read_events(stream, 1) == [f"retry: {live.RETRY}\n\n"]
+        return stream
+
+    async def listen():
+        client = AsyncClient()
+        stream = await connect(client, headers={"Last-Event-ID": str(seen.pk)})
+        event = await sync_to_async(live.publish)(
+            LiveEvent.Kind.JOB, {"slug": "job", "available": False}
+        )
+        assert await read_events(stream, 1) == [
+            f'id: {event.pk}\nevent: job\ndata: {{"slug":"job","available":false}}\n\n'
+        ]
+
+        # a new browser only gets new events, idle streams are kept open
+        stream = await connect(client)
+        assert await asyncio.wait_for(anext(stream), 5) == b": keepalive\n\n"
+
+    asyncio.run(listen())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_live_events_late_commit(settings):
+    settings.CROWDPRINTER_LIVE_POLL_INTERVAL = 0.01
+    settings.CROWDPRINTER_LIVE_KEEPALIVE = 0.1
+    # an event whose transaction commits only after a later one was read
+    late = live.publish(LiveEvent.Kind.JOB, {"slug": "late", "available": True})
+    late_pk = late.pk
+    late.delete()
+
+    async def listen():
+        response = await AsyncClient().get("/events")
+        stream = aiter(response.streaming_content)
+        await read_events(stream, 1)
+        # subscribes, only events published from now on are sent
+        assert await anext(stream) == b": keepalive\n\n"
+        event = await sync_to_async(live.publish)(
+            LiveEvent.Kind.JOB, {"slug": "early", "available": True}
+        )
+        assert await read_events(stream, 1) == [live.format_event(event)]
+
+        late = await LiveEvent.objects.acreate(
+            pk=late_pk,
+            kind=LiveEvent.Kind.JOB,
+            data={"slug": "late", "available": True},
+        )
+        assert await read_events(stream, 1) == [live.format_event(late)]
+
+    asyncio.run(listen())
@@ -0,0 +1,58 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import models
+
+from crowdprinter import loadgen
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import PrintJob
+
+
+@pytest.mark.django_db
+def test_generate(settings):
+    users, jobs = loadgen.generate(200, 20, 600)
+    assert len(users) == 20
+    assert len(jobs) == 200
+    assert PrintAttempt.objects.count() == 600
+    # like claims, attempts never take more prints than a job needs
+    assert not PrintJob.objects.filter(
+        running_or_finished_count__gt=models.F("count_needed")
+    ).exists()
+    assert (
+        not PrintJob.objects.with_live_counts()
+        .exclude(running_or_finished_count=models.F("live_running_or_finished_count"))
+        .exists()
+    )
+    # every user can take one more job
+    open_counts = (
+        PrintAttempt.objects.filter(ended__isnull=True)
+        .values("user")
+        .annotate(count=models.Count("pk"))
+        .values_list("count", flat=True)
+    )
+    assert max(open_counts) < settings.CROWDPRINTER_DEFAULT_MAX_ATTEMPTS
+
+
+@pytest.mark.django_db
+def test_benchviews():
+    out = StringIO()
+    call_command(
+        "benchviews", jobs=50, users=10, attempts=100, requests=5, json=True, stdout=out
+    )
+    results = json.loads(out.getvalue())
+    assert [result["workload"] for result in results] == [
+        "list",
+        "detail",
+        "take",
+        "give_back",
+        "download",
+        "done",
+    ]
+    for result in results:
+        assert result["requests"] == 5
+        assert result["errors"] == 0
+        assert result["p50_ms"] <= result["p99_ms"]
+    # the generated data is rolled back
+    assert not PrintJob.objects.exists()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from stl_generator import gcode
+from stl_generator import mesh
+
+# a cube of 10 mm, two triangles per side, normals pointing outwards
+CUBE = np.array(
+    [
+        [[0, 0, 0], [0, 1, 0], [1, 1, 0]],
+        [[0, 0, 0], [1, 1, 0], [1, 0, 0]],
+        [[0, 0, 1], [1, 0, 1], [1, 1, 1]],
+        [[0, 0, 1], [1, 1, 1], [0, 1, 1]],
+        [[0, 0, 0], [1, 0, 0], [1, 0, 1]],
+        [[0, 0, 0], [1, 0, 1], [0, 0, 1]],
+        [[0, 1, 0], [0, 1, 1], [1, 1, 1]],
+        [[0, 1, 0], [1, 1, 1], [1, 1, 0]],
+        [[0, 0, 0], [0, 0, 1], [0, 1, 1]],
+        [[0, 0, 0], [0, 1, 1], [0, 1, 0]],
+        [[1, 0, 0], [1, 1, 0], [1, 1, 1]],
+        [[1, 0, 0], [1, 1, 1], [1, 0, 1]],
+    ],
+    dtype="<f4",
+) * [10, 20, 5] + [3, 4, 0]
+
+
+def write_binary(path, triangles):
+    data = np.zeros(len(triangles), dtype=mesh.BINARY_TRIANGLE)
+    data["vertices"] = triangles
+    with open(path, "wb") as f:
+        # binary files may start with "solid" as well
+        f.write(b"solid binary".ljust(80, b" "))
+        f.write(len(triangles).to_bytes(4, "little"))
+        f.write(data.tobytes())
+
+
+def write_ascii(path, triangles):
+    with open(path, "w") as f:
+        f.write("solid OpenSCAD_Model\n")
+        for triangle in triangles:
+            f.write("  facet normal 0 0 1\n    outer loop\n")
+            for x, y, z in triangle:
+                f.write(f"      vertex {x:e} {y:e} {z:e}\n")
+            f.write("    endloop\n  endfacet\n")
+        f.write("endsolid OpenSCAD_Model\n")
+
+
+@pytest.mark.parametrize("write", [write_binary, write_ascii])
+def test_mesh_info(tmp_path, write):
+    path = tmp_path / "cube.stl"
+    write(path, CUBE)
+    info = mesh.mesh_info(path)
+    assert info["triangle_count"] == 12
+    assert info["size_x"] == pytest.approx(10)
+    assert info["size_y"] == pytest.approx(20)
+    assert info["size_z"] == pytest.approx(5)
+    assert info["volume"] == pytest.approx(1000)
+    assert info["filament_g"] == pytest.approx(1.24)
+    assert info["print_time"] > 0
+
+
+def test_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(mesh, "CHUNK_SIZE", 5)
+    path = tmp_path / "cubes.stl"
+    write_binary(path, np.concatenate([CUBE, CUBE + [100, 0, 0]]))
+    info = mesh.mesh_info(path)
+    assert info["size_x"] == pytest.approx(110)
+    assert info["volume"] == pytest.approx(2000)
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "broken.stl"
+    path.write_text("solid x\nfacet normal 0 0 1\nouter loop\nvertex 1 2\n")
+    with pytest.raises(ValueError):
+        mesh.mesh_info(path)
+
+
+def test_read_estimate(tmp_path):
+    path = tmp_path / "part.gcode"
+    path.write_text(
+        "G1 X1\n" * 100000
+        + "; filament used [mm] = 1234.56\n"
+        + "; filament used [g] = 3.68\n"
+        + "; estimated printing time (normal mode) = 1d 2h 3m 4s\n"
+        + "; prusaslicer_config = begin\n"
+    )
+    assert gcode.read_estimate(path) == {
+        "print_time": 93784,
+        "filament_g": 3.68,
+    }
+    path.write_text("G1 X1\n")
+    assert gcode.read_estimate(path) == {"print_time": None, "filament_g": None}
@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+
+from crowdprinter.models import PrintJob
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+def test_view_queries(client_user, job_basic):
+    labels = {"view": "printjob_detail"}
+    count = sample("crowdprinter_view_queries_count", **labels)
+    queries = sample("crowdprinter_view_queries_sum", **labels)
+
+    with CaptureQueriesContext(connection) as context:
+        client_user.get(f"/printjob/{job_basic.slug}/")
+
+    assert sample("crowdprinter_view_queries_count", **labels) == count + 1
+    assert sample("crowdprinter_view_queries_sum", **labels) == queries + len(
+        context.captured_queries
+    )
+    assert sample("crowdprinter_view_db_duration_seconds_sum", **labels) > 0
+
+
+@pytest.mark.django_db
+def test_claims(client_user, job_basic):
+    accepted = sample("crowdprinter_claims_total", result="accepted")
+    rejected = sample("crowdprinter_claims_total", result="rejected")
+
+    client_user.post(f"/printjob/{job_basic.slug}/take")
+    # the user already has an attempt on it
+    client_user.post(f"/printjob/{job_basic.slug}/take")
+
+    assert sample("crowdprinter_claims_total", result="accepted") == accepted + 1
+    assert sample("crowdprinter_claims_total", result="rejected") == rejected + 1
+
+
+@pytest.mark.django_db
+def test_slow_query_log(settings, caplog):
+    settings.CROWDPRINTER_SLOW_QUERY_SECONDS = 0
+    slow = sample("crowdprinter_slow_queries_total")
+    with caplog.at_level(logging.WARNING, logger="crowdprinter.slow_queries"):
+        PrintJob.objects.count()
+
+    assert sample("crowdprinter_slow_queries_total") == slow + 1
+    [record] = caplog.records
+    assert "COUNT(*)" in record.getMessage()
+    # the stack leads to the code running the query
+    assert "test_metrics.py" in record.getMessage()
+    assert "crowdprinter/metrics.py" not in record.getMessage()
+
+
+@pytest.mark.django_db
+def test_slow_query_log_disabled(caplog):
+    with caplog.at_level(logging.WARNING, logger="crowdprinter.slow_queries"):
+        PrintJob.objects.count()
+    assert not caplog.records
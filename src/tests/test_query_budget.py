@@ -0,0 +1,94 @@
+import pytest
+from conftest import make_file
+from conftest import make_job
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from crowdprinter.models import PrintAttempt
+from crowdprinter.models import Printer
+from crowdprinter.models import PrintJobFile
+
+# Every page must take the same number of queries, however many attempts,
+# files or jobs there are. Each test measures a page, grows the data behind
+# it and measures again.
+
+
+def add_other_attempts(job, count):
+    for i in range(count):
+        other = get_user_model().objects.create_user(f"other{job.slug}{i}")
+        PrintAttempt.objects.create(job=job, user=other)
+
+
+def add_files(job, start, count):
+    for i in range(start, start + count):
+        printer = Printer.objects.create(slug=f"p{job.slug}{i}", name=f"P {i}")
+        PrintJobFile.objects.create(
+            job=job, printer=printer, file_gcode=make_file(f"gcode_{i}")
+        )
+
+
+@pytest.mark.django_db
+def test_detail_attempting(client_user, count_queries, job_taken):
+    job_taken.count_needed = 20
+    job_taken.save()
+    url = reverse("printjob_detail", kwargs={"slug": job_taken.slug})
+    add_files(job_taken, 0, 1)
+    before = count_queries(client_user, url)
+
+    add_files(job_taken, 1, 5)
+    add_other_attempts(job_taken, 5)
+    assert count_queries(client_user, url) == before
+
+
+@pytest.mark.django_db
+def test_detail_not_attempting(client_user, count_queries, job_basic):
+    job_basic.count_needed = 20
+    job_basic.save()
+    url = reverse("printjob_detail", kwargs={"slug": job_basic.slug})
+    before = count_queries(client_user, url)
+
+    add_files(job_basic, 0, 5)
+    add_other_attempts(job_basic, 5)
+    assert count_queries(client_user, url) == before
+
+
+@pytest.mark.django_db
+def test_detail_anonymous(client, count_queries, job_basic):
+    url = reverse("printjob_detail", kwargs={"slug": job_basic.slug})
+    before = count_queries(client, url)
+
+    add_other_attempts(job_basic, 5)
+    assert count_queries(client, url) == before
+
+
+@pytest.mark.django_db
+def test_myprintattempts(client_user, count_queries, user):
+    url = reverse("my_printattempts")
+
+    def add_attempts(start, count):
+        for i in range(start, start + count):
+            PrintAttempt.objects.create(job=make_job(f"running_{i}"), user=user)
+            PrintAttempt.objects.create(
+                job=make_job(f"finished_{i}"),
+                user=user,
+                ended="2024-12-27",
+                finished=True,
+            )
+
+    add_attempts(0, 1)
+    before = count_queries(client_user, url)
+
+    add_attempts(1, 10)
+    assert count_queries(client_user, url) == before
+
+
+@pytest.mark.django_db
+def test_index(client_user, count_queries):
+    url = "/"
+    for i in range(2):
+        make_job(f"job_{i}", public=True)
+    before = count_queries(client_user, url)
+
+    for i in range(2, 40):
+        make_job(f"job_{i}", public=True)
+    assert count_queries(client_user, url) == before
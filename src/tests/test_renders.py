@@ -0,0 +1,44 @@
+import re
+from io import BytesIO
+
+import pytest
+from conftest import make_png
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+from crowdprinter.models import PrintJob
+
+
+@pytest.fixture
+def job_rendered(job_basic):
+    job_basic.file_render = ContentFile(make_png(), name="job_basic.png")
+    job_basic.public = True
+    job_basic.save()
+    return job_basic
+
+
+@pytest.mark.django_db
+def test_makerendervariants(client, job_rendered):
+    url = f"/printjob/{job_rendered.slug}/render"
+    assert client.get(f"{url}/thumb.webp").status_code == 404
+    assert 'loading="lazy"' in client.get("/").content.decode()
+
+    call_command("makerendervariants", "--processes", "1")
+    assert PrintJob.objects.get().render_variants
+
+    for variant, fmt, width in [
+        ("thumb.avif", "AVIF", 320),
+        ("thumb.webp", "WEBP", 320),
+        ("thumb.png", "PNG", 320),
+        ("detail.webp", "WEBP", 800),
+    ]:
+        resp = client.get(f"{url}/{variant}")
+        assert resp.status_code == 200
+        image = Image.open(BytesIO(b"".join(resp.streaming_content)))
+        assert (image.format, image.width) == (fmt, width)
+    assert client.get(f"{url}/detail.png").status_code == 404
+
+    content = client.get("/").content.decode()
+    assert re.search(r'<source type="image/avif" sizes="15em"', content)
+    assert f"{url}/thumb.png 320w, {url} 800w" in content
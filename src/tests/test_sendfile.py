@@ -0,0 +1,66 @@
+import pytest
+
+from crowdprinter.sendfile import parse_range
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("lines=0-1", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.mark.django_db
+def test_render_conditional(client, job_basic):
+    url = f"/printjob/{job_basic.slug}/render"
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp["Accept-Ranges"] == "bytes"
+    assert b"".join(resp.streaming_content) == b"render_job_basic" * 100
+    etag, last_modified = resp["ETag"], resp["Last-Modified"]
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+
+@pytest.mark.django_db
+def test_stl_range(client_user, job_taken):
+    url = f"/printjob/{job_taken.slug}/stl"
+    resp = client_user.get(url, HTTP_RANGE="bytes=4-9")
+    assert resp.status_code == 206
+    assert resp["Content-Length"] == "6"
+    assert resp["Content-Range"] == "bytes 4-9/1300"
+    assert b"".join(resp.streaming_content) == b"job_ta"
+    assert "attachment" in resp["Content-Disposition"]
+
+    resp = client_user.get(url, HTTP_RANGE="bytes=4-9", HTTP_IF_RANGE='"stale"')
+    assert resp.status_code == 200
+
+    resp = client_user.get(url, HTTP_RANGE="bytes=5000-")
+    assert resp.status_code == 416
+    assert resp["Content-Range"] == "bytes */1300"
+
+
+@pytest.mark.django_db
+def test_stl_offload(client_user, settings, job_taken):
+    url = f"/printjob/{job_taken.slug}/stl"
+    settings.CROWDPRINTER_SENDFILE = "x-accel-redirect"
+    resp = client_user.get(url)
+    assert resp.status_code == 200
+    assert resp["X-Accel-Redirect"] == f"/protected-media/{job_taken.file_stl.name}"
+    assert resp.content == b""
+    assert 'filename="job_taken"' in resp["Content-Disposition"]
+
+    settings.CROWDPRINTER_SENDFILE = "x-sendfile"
+    resp = client_user.get(url)
+    assert resp["X-Sendfile"] == job_taken.file_stl.path
+
+    # access checks still apply
+    client_user.logout()
+    client_user.force_login(
+        type(job_taken.attempts.get().user).objects.create_user("other")
+    )
+    assert client_user.get(url).status_code == 404